@@ -1,16 +1,22 @@
 from flask import Flask
+from commands.media_commands import media_cli
 from config.app_config import AppConfig
 from extensions.logger import logger
-from routes.file_routes import file_bp
+from routes.file_routes import file_bp, init_file_routes
 from routes.health_check import health_bp
 from routes.setup_routes import setup_app
+from utils.upload_spool import MediaRequest
+from typing import Any, Mapping, Optional
 import os
 
 
-def create_app():
+def create_app(config_overrides: Optional[Mapping[str, Any]] = None):
     app = Flask(__name__)
+    app.request_class = MediaRequest
     config = AppConfig()
     app.config.from_object(config)
+    if config_overrides:
+        app.config.update(config_overrides)
 
     setup_app(app)
 
@@ -18,6 +24,9 @@ def create_app():
 
     app.register_blueprint(file_bp)
     app.register_blueprint(health_bp)
+    app.cli.add_command(media_cli)
+    # Services shared by all requests are created here, not per request.
+    init_file_routes(app)
 
     return app
 
@@ -0,0 +1,72 @@
+"""
+Compares the raw PDF structure scan, which rejects blocked names before pypdf
+parses a file, with the pypdf structural checks that still run on the files
+passing it, over a directory of PDF files:
+
+    python -m benchmarks.pdf_scan path/to/pdfs [--repeat 3]
+"""
+import argparse
+import pathlib
+import time
+
+from pypdf import PdfReader
+
+from config.validation_config import FileValidationConfig
+from utils.upload_context import UploadContext
+from validators.pdf_scanner import scan_pdf
+from validators.pdf_validator import PDFValidator
+
+
+def pypdf_structure(upload: UploadContext) -> bool:
+    """
+    The document-level checks as pypdf runs them: catalog lookup for embedded
+    files and JavaScript keys on every page.
+    """
+    reader = PdfReader(upload.reader())
+    if "/EmbeddedFiles" in reader.trailer["/Root"]:
+        return False
+    return not any("/JS" in page or "/JavaScript" in page for page in reader.pages)
+
+
+def raw_structure(upload: UploadContext) -> bool:
+    config = FileValidationConfig.get_config("pdf")
+    return not scan_pdf(
+        upload.content, config.blocked_names, config.max_object_stream_size
+    ).names
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("corpus", type=pathlib.Path)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    files = [path.read_bytes() for path in sorted(args.corpus.rglob("*.pdf"))]
+    print(f"{len(files)} files, {sum(map(len, files)) / 2**20:.1f} MiB")
+    validator = PDFValidator()
+    for name, check in (
+        ("pypdf structure", pypdf_structure),
+        ("raw structure", raw_structure),
+        ("full validation", validator.is_valid),
+    ):
+        best = float("inf")
+        for _ in range(args.repeat):
+            accepted = 0
+            started = time.perf_counter()
+            for content in files:
+                upload = UploadContext.from_buffer(content)
+                try:
+                    accepted += bool(check(upload))
+                except Exception:
+                    pass
+                finally:
+                    upload.close()
+            best = min(best, time.perf_counter() - started)
+        print(
+            f"{name:16} {best * 1000:9.1f} ms  "
+            f"{best * 1000 / max(len(files), 1):7.2f} ms/file  {accepted} accepted"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Measures the per-request overhead of the media routes, outside of storage and
+validation work:
+
+    python -m benchmarks.request_overhead [--requests 2000] [--repeat 3]
+
+"validator dispatch" picks the validator of an upload whose type was already
+sniffed; "GET /health" is a request that does not touch the media routes, and
+"GET missing file" goes through the media routes to a 404.
+"""
+import argparse
+import io
+import logging
+import shutil
+import tempfile
+import time
+from typing import Callable
+
+from app import create_app
+from utils.upload_context import UploadContext
+from validators.factory import ValidatorFactory
+
+
+def best_of(repeat: int, requests: int, run: Callable[[], object]) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(requests):
+            run()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    media_files_dest = tempfile.mkdtemp()
+    try:
+        app = create_app({"MEDIA_FILES_DEST": media_files_dest})
+        # Log records are still formatted, just not printed.
+        null_stream = io.StringIO()
+        for handler in app.logger.handlers:
+            if isinstance(handler, logging.StreamHandler):
+                handler.setStream(null_stream)
+        client = app.test_client()
+        upload = UploadContext.from_buffer(b"\x89PNG\r\n\x1a\n", "a.png")
+        upload.mime_type = "image/png"
+        factory = ValidatorFactory()
+
+        def dispatch() -> None:
+            factory.get_validator("png", upload)
+
+        def clear_log() -> None:
+            null_stream.seek(0)
+            null_stream.truncate()
+
+        for name, run in (
+            ("validator dispatch", dispatch),
+            ("GET /health", lambda: client.get("/health")),
+            ("GET missing file", lambda: client.get("/media/images/missing.png")),
+        ):
+            best = best_of(args.repeat, args.requests, run)
+            clear_log()
+            print(f"{name:18} {best * 1e6 / args.requests:9.1f} us/request")
+    finally:
+        shutil.rmtree(media_files_dest)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from routes.file_routes import get_metadata_index, get_storage_strategy
+from storage.cached_storage import CachedStorage
+from storage.content_addressed_storage import ContentAddressedStorage
+from storage.local_storage import LocalFileSystemStorage
+from storage.storage_strategy import StorageStrategy
+from storage.media_indexer import reindex_media
+
+
+media_cli = AppGroup("media", help="Media storage maintenance commands.")
+
+
+@media_cli.command("reindex")
+def reindex_command() -> None:
+    """
+    Brings the metadata catalog in line with the files on disk.
+    """
+    counts = reindex_media(
+        get_storage_strategy(),
+        get_metadata_index(),
+        current_app.config["ALLOWED_DIRECTORIES"],
+        current_app.config["STREAM_CHUNK_SIZE"],
+    )
+    click.echo(
+        f"Indexed {counts['indexed']}, unchanged {counts['unchanged']}, "
+        f"removed {counts['removed']}"
+    )
+
+
+@media_cli.command("gc")
+def collect_garbage_command() -> None:
+    """
+    Removes content-addressed blobs that no file links to anymore.
+    """
+    storage = _unwrap_storage()
+    if not isinstance(storage, ContentAddressedStorage):
+        raise click.ClickException("STORAGE_BACKEND is not content_addressed")
+    click.echo(f"Removed {storage.collect_garbage()} unreferenced blobs")
+
+
+@media_cli.command("reshard")
+def reshard_command() -> None:
+    """
+    Moves existing files into the fan-out layout configured by SHARD_DEPTH.
+
+    Safe to run while the service is handling requests.
+    """
+    storage = _unwrap_storage()
+    if not isinstance(storage, LocalFileSystemStorage) or storage.shard_depth == 0:
+        raise click.ClickException("SHARD_DEPTH is not set for local storage")
+    for directory in current_app.config["ALLOWED_DIRECTORIES"]:
+        click.echo(f"{directory}: moved {storage.reshard(directory)} files")
+
+
+def _unwrap_storage() -> StorageStrategy:
+    storage = get_storage_strategy()
+    if isinstance(storage, CachedStorage):
+        return storage.storage
+    return storage
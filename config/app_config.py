@@ -1,7 +1,10 @@
 from dotenv import load_dotenv
+from typing import Any, Mapping
 import os
 import secrets
 
+from config.validation_config import FileValidationConfig
+
 
 load_dotenv()
 
@@ -11,5 +14,76 @@ class AppConfig:
     API_KEY = os.getenv("API_KEY")
     ALLOWED_DIRECTORIES = ["images", "files"]
     MEDIA_FILES_DEST = "media"
+    # "local" stores every upload as is, "content_addressed" deduplicates content.
+    STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local")
+    # Number of hashed fan-out levels (e.g. images/ab/cd/<name> for 2), 0 keeps a flat layout.
+    SHARD_DEPTH = int(os.getenv("SHARD_DEPTH", 0))
+    # Defaults to `.catalog.sqlite3` inside MEDIA_FILES_DEST.
+    METADATA_CATALOG_PATH = os.getenv("METADATA_CATALOG_PATH")
+    STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", 64 * 1024))
+    # Uploads are streamed to a temporary file in this directory and renamed into
+    # place; it must be on the same file system as MEDIA_FILES_DEST.
+    # Defaults to `.uploads` inside MEDIA_FILES_DEST.
+    UPLOAD_STAGING_DIR = os.getenv("UPLOAD_STAGING_DIR")
+    UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 64 * 1024))
+    # Room for multipart boundaries and part headers on top of the file itself.
+    UPLOAD_FORM_OVERHEAD = 64 * 1024
+    # Requests declaring a larger body are refused before it is read; defaults to
+    # the largest per-type `max_file_size` from the validation config.
+    MAX_CONTENT_LENGTH = int(
+        os.getenv(
+            "MAX_CONTENT_LENGTH",
+            max(
+                config.max_file_size for config in FileValidationConfig.CONFIGS.values()
+            )
+            + UPLOAD_FORM_OVERHEAD,
+        )
+    )
+    MAX_BYTE_RANGES = int(os.getenv("MAX_BYTE_RANGES", 16))
+    # Compressed variants are generated lazily on first request (or on upload).
+    RESPONSE_COMPRESSION = os.getenv("RESPONSE_COMPRESSION", "1") == "1"
+    PRECOMPRESS_ON_UPLOAD = os.getenv("PRECOMPRESS_ON_UPLOAD", "0") == "1"
+    COMPRESSION_MIN_SIZE = 1024
+    COMPRESSIBLE_MIME_TYPES = {
+        "application/pdf",
+        "application/msword",
+        "application/rtf",
+        "application/json",
+        "application/xml",
+        "image/svg+xml",
+    }
+    # "inline" validates uploads on the request thread, "process" in a pool of
+    # worker processes that are killed when a file takes longer than the timeout.
+    VALIDATION_EXECUTOR = os.getenv("VALIDATION_EXECUTOR", "inline")
+    VALIDATION_WORKERS = int(os.getenv("VALIDATION_WORKERS", os.cpu_count() or 2))
+    VALIDATION_TIMEOUT = float(os.getenv("VALIDATION_TIMEOUT", 30))
+    # Interpreter running the workers; defaults to sys.executable.
+    VALIDATION_PYTHON = os.getenv("VALIDATION_PYTHON")
+    # Verdicts of content that passed validation, keyed by its SHA-256 and the
+    # validation config; 0 disables the cache. Persisted when a path is set.
+    VERDICT_CACHE_SIZE = int(os.getenv("VERDICT_CACHE_SIZE", 10000))
+    VERDICT_CACHE_PATH = os.getenv("VERDICT_CACHE_PATH")
+    LIST_PAGE_SIZE = 100
+    LIST_MAX_PAGE_SIZE = 1000
+    # In-memory hot-file cache per worker; a budget of 0 disables it.
+    HOT_CACHE_MAX_BYTES = int(os.getenv("HOT_CACHE_MAX_BYTES", 0))
+    HOT_CACHE_MAX_OBJECT_BYTES = int(
+        os.getenv("HOT_CACHE_MAX_OBJECT_BYTES", 256 * 1024)
+    )
+    # Per-request dispatch messages are logged at DEBUG.
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
     ENV = os.environ.get("ENV", "development") == "production"
     DEBUG = os.environ.get("FLASK_DEBUG", "0") == "1"
+
+    @classmethod
+    def from_mapping(cls, settings: Mapping[str, Any]) -> "AppConfig":
+        """
+        Returns a config holding the upper-case `settings`, such as the merged
+        `app.config` of an app created with overrides, and the class defaults
+        for everything else.
+        """
+        config = cls()
+        for key, value in settings.items():
+            if key.isupper():
+                setattr(config, key, value)
+        return config
@@ -1,4 +1,5 @@
-from typing import List, Set, Union, Dict
+from types import MappingProxyType
+from typing import List, Mapping, Set, Union, Dict
 from dataclasses import dataclass, field
 
 
@@ -26,9 +27,43 @@ def default_allowed_png_chunks() -> List[bytes]:
         b"pHYs",
         b"sPLT",
         b"tIME",
+        # Exif metadata (PNG 1.5 extensions, PNG third edition)
+        b"eXIf",
+        # Parallel decoding hint written by Apple platforms
+        b"iDOT",
+        # Animation control and frames of APNG files
+        b"acTL",
+        b"fcTL",
+        b"fdAT",
+        # Colour space and HDR metadata (PNG third edition)
+        b"cICP",
+        b"mDCV",
+        b"cLLI",
     ]
 
 
+@dataclass
+class ValidationBudget:
+    """
+    Resources a single validation may use before the upload is rejected, so one
+    pathological file cannot hold up the other uploads of its worker.
+
+    `max_memory_growth` is only enforced in validation worker processes
+    (`VALIDATION_EXECUTOR=process`), each of which validates one upload at a
+    time. Resident memory belongs to the whole process, so inline validations
+    running on concurrent request threads would count against each other.
+    """
+
+    # CPU time of the validating thread
+    max_cpu_seconds: float = 5.0
+    # Growth of the worker process's resident memory while validating
+    max_memory_growth: int = 512 * 1024 * 1024  # 512 MB
+    # Data inflated from compressed streams, parts and object streams
+    max_decompressed_bytes: int = 200 * 1024 * 1024  # 200 MB
+    # Frames of an animated image; document pages are limited by `max_pages`
+    max_frames: int = 1000
+
+
 @dataclass
 class BaseValidationConfig:
     suspicious_keywords: List[str] = field(default_factory=default_suspicious_keywords)
@@ -42,6 +77,7 @@ class BaseValidationConfig:
     # ])
     max_file_size: int = 10 * 1024 * 1024  # 10 MB
     allowed_extensions: Set[str] = field(default_factory=set)
+    budget: ValidationBudget = field(default_factory=ValidationBudget)
 
 
 @dataclass
@@ -51,6 +87,16 @@ class ImageValidationConfig(BaseValidationConfig):
     )
     allowed_png_chunks: List[str] = field(default_factory=default_allowed_png_chunks)
     max_dimensions: tuple = (8000, 8000)
+    max_pixels: int = 8000 * 8000
+    # Markers of injected code, searched for in JPEG COM/APPn segments and GIF
+    # comment, application and plain text extensions.
+    metadata_markers: List[str] = field(
+        default_factory=lambda: ["<script", "<svg", "<?php", "javascript:"]
+    )
+
+
+def default_script_markers() -> List[str]:
+    return ["<script", "javascript:", "data:"]
 
 
 @dataclass
@@ -59,11 +105,24 @@ class DocumentValidationConfig(BaseValidationConfig):
 
 
 @dataclass
-class PDFValidationConfig(BaseValidationConfig):
+class PDFValidationConfig(DocumentValidationConfig):
     allowed_extensions: Set[str] = field(default_factory=lambda: {"pdf"})
     allowed_versions: List[str] = field(
         default_factory=lambda: ["1.4", "1.5", "1.6", "1.7"]
     )
+    # Names rejected wherever they occur in the document structure. /OpenAction
+    # is left out: on its own it only sets the initial view, and the actions that
+    # make it dangerous are blocked themselves.
+    blocked_names: List[str] = field(
+        default_factory=lambda: [
+            "/JavaScript",
+            "/JS",
+            "/EmbeddedFiles",
+            "/Launch",
+            "/URI",
+        ]
+    )
+    max_object_stream_size: int = 16 * 1024 * 1024  # 16 MB
 
 
 @dataclass
@@ -72,6 +131,8 @@ class DOCValidationConfig(DocumentValidationConfig):
     suspicious_keywords: List[bytes] = field(
         default_factory=lambda: [b"cmd", b"powershell", b"exec", b"system", b"eval"]
     )
+    # Markers of script injection, matched case-insensitively like the keywords.
+    script_markers: List[str] = field(default_factory=default_script_markers)
     macros: List[bytes] = field(
         default_factory=lambda: ["Macros", "_VBA_PROJECT_CUR", "VBA"]
     )
@@ -88,6 +149,15 @@ class DOCXValidationConfig(DocumentValidationConfig):
             )
         )
     )
+    script_markers: List[str] = field(
+        default_factory=lambda: ["<script", "javascript:", "data:>"]
+    )
+    # "streaming" inspects the package parts with an incremental XML parser;
+    # "document" loads the whole document with python-docx.
+    inspection_mode: str = "streaming"
+    # Zip bomb protection, checked against the archive's central directory.
+    max_entries: int = 1000
+    max_uncompressed_size: int = 100 * 1024 * 1024  # 100 MB
 
 
 ValidatorConfigType = Union[
@@ -106,6 +176,22 @@ class FileValidationConfig:
         "doc": DOCValidationConfig(),
         "docx": DOCXValidationConfig(),
     }
+    # Validator type by extension, derived from CONFIGS by `build_extension_table`.
+    # Read-only: the table is replaced as a whole, never changed in place.
+    EXTENSION_TYPES: Mapping[str, str] = MappingProxyType({})
+
+    @classmethod
+    def build_extension_table(cls) -> None:
+        """
+        Rebuilds the extension lookup table; call again after changing CONFIGS.
+        """
+        cls.EXTENSION_TYPES = MappingProxyType(
+            {
+                extension.lower(): validator_type
+                for validator_type, config in cls.CONFIGS.items()
+                for extension in config.allowed_extensions
+            }
+        )
 
     @classmethod
     def get_config(cls, file_type: str) -> ValidatorConfigType:
@@ -113,14 +199,11 @@ class FileValidationConfig:
 
     @classmethod
     def get_validator_type(cls, file_extension: str) -> str:
-        for validator_type, config in cls.CONFIGS.items():
-            if file_extension in config.allowed_extensions:
-                return validator_type
-        return "unknown"
+        return cls.EXTENSION_TYPES.get(file_extension.lower(), "unknown")
 
     @classmethod
     def is_extension_allowed(cls, file_extension: str) -> bool:
-        return any(
-            file_extension.lower() in config.allowed_extensions
-            for config in cls.CONFIGS.values()
-        )
+        return file_extension.lower() in cls.EXTENSION_TYPES
+
+
+FileValidationConfig.build_extension_table()
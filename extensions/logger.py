@@ -12,7 +12,7 @@ class Logger:
 
     def init_app(self, app):
         self.logger = app.logger
-        self.logger.setLevel(logging.DEBUG)
+        self.logger.setLevel(app.config.get("LOG_LEVEL", logging.INFO))
         handler = logging.StreamHandler()
         formatter = logging.Formatter(
             "%(asctime)s - %(name)s - %(levelname)s - %(caller_file)s:%(caller_line)d - %(message)s"
@@ -21,6 +21,11 @@ class Logger:
         self.logger.addHandler(handler)
 
     def _log(self, level, msg):
+        target = self.app.logger if self.app else self.logger
+        # Skip the frame inspection for messages that would be dropped anyway
+        if not target.isEnabledFor(getattr(logging, level.upper())):
+            return
+
         # Get the caller's frame
         current_frame = inspect.currentframe()
         caller_frame = current_frame.f_back
@@ -37,10 +42,7 @@ class Logger:
         extra = {"caller_file": filename, "caller_line": lineno}
 
         # Log the message with extra info
-        if self.app:
-            getattr(self.app.logger, level)(msg, extra=extra)
-        else:
-            getattr(self.logger, level)(msg, extra=extra)
+        getattr(target, level)(msg, extra=extra)
 
     def info(self, msg):
         self._log("info", msg)
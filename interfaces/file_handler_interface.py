@@ -15,3 +15,13 @@ class IFileHandler(ABC):
         self, file_path: str
     ) -> Union[Response, Tuple[Response, int]]:
         pass
+
+    @abstractmethod
+    def handle_list_request(self) -> Union[Response, Tuple[Response, int]]:
+        pass
+
+    @abstractmethod
+    def handle_delete_request(
+        self, file_path: str
+    ) -> Union[Response, Tuple[Response, int]]:
+        pass
@@ -1,8 +1,8 @@
 from abc import ABC, abstractmethod
-from werkzeug.datastructures.file_storage import FileStorage
+from utils.upload_context import UploadContext
 
 
 class IFileValidator(ABC):
     @abstractmethod
-    def is_valid(self, uploaded_file: "FileStorage") -> bool:
+    def is_valid(self, upload: "UploadContext") -> bool:
         pass
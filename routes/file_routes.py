@@ -1,7 +1,9 @@
-from http.client import HTTPException
+import os
+from werkzeug.exceptions import HTTPException
 from werkzeug.wrappers import Response as WerkzeugResponse
 from flask import (
     Blueprint,
+    Flask,
     current_app,
     Response,
     g,
@@ -9,10 +11,18 @@ from flask import (
 
 from config.app_config import AppConfig
 from middleware.auth import create_auth_middleware
+from storage.cached_storage import CachedStorage
+from storage.compressed_variants import CompressedVariantStore
+from storage.content_addressed_storage import ContentAddressedStorage
 from storage.local_storage import LocalFileSystemStorage
+from storage.metadata_catalog import SQLiteMetadataCatalog
+from storage.metadata_index import MetadataIndex
+from storage.storage_strategy import StorageStrategy
 from utils.file_route_handler import FileRouteHandler
-from typing import Tuple, Union
+from typing import Optional, Tuple, Union
+from validators.executor import ValidationWorkerPool
 from validators.factory import ValidatorFactory
+from validators.verdict_cache import VerdictCache
 
 
 file_bp = Blueprint("file", __name__)
@@ -22,23 +32,152 @@ config = AppConfig()
 auth = create_auth_middleware(config)
 
 
+def get_metadata_index() -> MetadataIndex:
+    """
+    Returns the metadata index shared by all requests of the current app,
+    creating it on first use.
+    """
+    if "media_metadata_index" not in current_app.extensions:
+        catalog_path = current_app.config["METADATA_CATALOG_PATH"] or os.path.join(
+            current_app.config["MEDIA_FILES_DEST"], ".catalog.sqlite3"
+        )
+        current_app.extensions["media_metadata_index"] = SQLiteMetadataCatalog(
+            catalog_path
+        )
+    return current_app.extensions["media_metadata_index"]
+
+
+def get_storage_strategy() -> StorageStrategy:
+    """
+    Returns the storage backend shared by all requests of the current app,
+    creating it on first use. `STORAGE_BACKEND` selects the backend, which is
+    wrapped in a hot-file cache when `HOT_CACHE_MAX_BYTES` is set.
+    """
+    if "media_storage" not in current_app.extensions:
+        media_files_dest = current_app.config["MEDIA_FILES_DEST"]
+        storage: StorageStrategy
+        shard_depth = current_app.config["SHARD_DEPTH"]
+        if current_app.config["STORAGE_BACKEND"] == "content_addressed":
+            storage = ContentAddressedStorage(media_files_dest, shard_depth)
+        else:
+            storage = LocalFileSystemStorage(media_files_dest, shard_depth)
+        if current_app.config["HOT_CACHE_MAX_BYTES"] > 0:
+            storage = CachedStorage(
+                storage,
+                max_bytes=current_app.config["HOT_CACHE_MAX_BYTES"],
+                max_object_bytes=current_app.config["HOT_CACHE_MAX_OBJECT_BYTES"],
+            )
+        current_app.extensions["media_storage"] = storage
+    return current_app.extensions["media_storage"]
+
+
+def get_variant_store() -> Optional[CompressedVariantStore]:
+    """
+    Returns the store of compressed variants shared by all requests of the
+    current app, or None if `RESPONSE_COMPRESSION` is disabled.
+    """
+    if not current_app.config["RESPONSE_COMPRESSION"]:
+        return None
+    if "media_variant_store" not in current_app.extensions:
+        current_app.extensions["media_variant_store"] = CompressedVariantStore(
+            os.path.join(current_app.config["MEDIA_FILES_DEST"], ".variants"),
+            chunk_size=current_app.config["STREAM_CHUNK_SIZE"],
+        )
+    return current_app.extensions["media_variant_store"]
+
+
+def get_validation_pool() -> Optional[ValidationWorkerPool]:
+    """
+    Returns the validation worker pool shared by all requests of the current app,
+    or None if `VALIDATION_EXECUTOR` runs validators inline. The pool's workers
+    are started by each server process on its first upload.
+    """
+    if current_app.config["VALIDATION_EXECUTOR"] != "process":
+        return None
+    if "media_validation_pool" not in current_app.extensions:
+        current_app.extensions["media_validation_pool"] = ValidationWorkerPool(
+            workers=current_app.config["VALIDATION_WORKERS"],
+            timeout=current_app.config["VALIDATION_TIMEOUT"],
+            executable=current_app.config["VALIDATION_PYTHON"],
+        )
+    return current_app.extensions["media_validation_pool"]
+
+
+def get_verdict_cache() -> Optional[VerdictCache]:
+    """
+    Returns the validation verdict cache shared by all requests of the current
+    app, or None if `VERDICT_CACHE_SIZE` is 0.
+    """
+    if current_app.config["VERDICT_CACHE_SIZE"] <= 0:
+        return None
+    if "media_verdict_cache" not in current_app.extensions:
+        current_app.extensions["media_verdict_cache"] = VerdictCache(
+            max_entries=current_app.config["VERDICT_CACHE_SIZE"],
+            db_path=current_app.config["VERDICT_CACHE_PATH"],
+        )
+    return current_app.extensions["media_verdict_cache"]
+
+
+def init_file_routes(app: Flask) -> None:
+    """
+    Creates the file handler of the app together with the storage, catalog,
+    validators and caches it uses, once for the life of the app.
+
+    Everything the handler holds is shared by all request threads, so requests
+    only look the handler up. Call after the app config is complete: the
+    handler's settings are taken from `app.config`, overrides included.
+    """
+    with app.app_context():
+        app.extensions["media_file_handler"] = FileRouteHandler(
+            config=AppConfig.from_mapping(app.config),
+            storage_strategy=get_storage_strategy(),
+            validator_factory=ValidatorFactory(get_validation_pool()),
+            metadata_index=get_metadata_index(),
+            variant_store=get_variant_store(),
+            verdict_cache=get_verdict_cache(),
+        )
+
+
+def get_file_handler() -> FileRouteHandler:
+    """
+    Returns the file handler of the current app, see `init_file_routes`.
+    """
+    return current_app.extensions["media_file_handler"]
+
+
 @file_bp.before_request
 def init_file_handler() -> None:
     """
-    Initializes the file handler before each request.
-    The file handler is stored in `g` for use in routes.
+    Makes the app's file handler available to the routes in `g`.
+    """
+    g.file_handler = get_file_handler()
+
+
+@file_bp.route("/media", methods=["GET"])
+@auth.check_api_key
+def handle_list_request() -> Union[Response, Tuple[Response, int]]:
     """
-    g.file_handler = FileRouteHandler(
-        config=config,
-        storage_strategy=LocalFileSystemStorage(current_app.config["MEDIA_FILES_DEST"]),
-        validator_factory=ValidatorFactory(),
-    )
+    Handles GET requests listing the files of one media directory.
 
+    Returns:
+        Union[Response, Tuple[Response, int]]: A Flask response object containing a
+        page of file metadata or an error message.
+    """
+    try:
+        return g.file_handler.handle_list_request()
+    except HTTPException as e:
+        if isinstance(e.response, WerkzeugResponse):
+            return e.response
+        return str(e), e.code
+    except Exception as e:
+        current_app.logger.error(f"Error handling LIST request: {str(e)}")
+        return Response("Internal Server Error", status=500)
 
-@file_bp.route("/media/<path:file_path>", methods=["GET"])
+
+@file_bp.route("/media/<path:file_path>", methods=["GET", "HEAD"])
 def handle_get_request(file_path: str) -> Union[Response, Tuple[Response, int]]:
     """
-    Handles GET requests to retrieve files from the media directory.
+    Handles GET and HEAD requests to retrieve files from the media directory.
 
     Args:
         file_path (str): The path to the requested file relative to the media directory.
@@ -81,3 +220,27 @@ def handle_post_request(origin_file_path: str) -> Union[Response, Tuple[Response
     except Exception as e:
         current_app.logger.error(f"Error handling POST request: {str(e)}")
         return Response("Internal Server Error", status=500)
+
+
+@file_bp.route("/media/<path:file_path>", methods=["DELETE"])
+@auth.check_api_key
+def handle_delete_request(file_path: str) -> Union[Response, Tuple[Response, int]]:
+    """
+    Handles DELETE requests removing files from the media directory.
+
+    Args:
+        file_path (str): The path to the file relative to the media directory.
+
+    Returns:
+        Union[Response, Tuple[Response, int]]: A Flask response object indicating
+        success (200 OK) or an error message.
+    """
+    try:
+        return g.file_handler.handle_delete_request(file_path)
+    except HTTPException as e:
+        if isinstance(e.response, WerkzeugResponse):
+            return e.response
+        return str(e), e.code
+    except Exception as e:
+        current_app.logger.error(f"Error handling DELETE request: {str(e)}")
+        return Response("Internal Server Error", status=500)
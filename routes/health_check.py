@@ -1,5 +1,9 @@
 from flask import Blueprint, jsonify
 
+from routes.file_routes import get_storage_strategy
+from storage.cached_storage import CachedStorage
+from validators.pipeline import check_metrics
+
 
 health_bp = Blueprint("health", __name__)
 
@@ -7,3 +11,25 @@ health_bp = Blueprint("health", __name__)
 @health_bp.route("/health")
 def health_check():
     return jsonify({"status": "healthy"}), 200
+
+
+@health_bp.route("/health/cache")
+def cache_metrics():
+    """
+    Returns the hit, miss and eviction counters and the occupancy of this
+    process's hot-file cache, or `{"enabled": false}` if the cache is disabled.
+    """
+    storage = get_storage_strategy()
+    if not isinstance(storage, CachedStorage):
+        return jsonify({"enabled": False}), 200
+    return jsonify({"enabled": True, **storage.stats()}), 200
+
+
+@health_bp.route("/health/validation")
+def validation_metrics():
+    """
+    Returns call counts, outcomes and wall time of each validation check run in
+    this process or its validation workers, the most expensive checks of each
+    validator first.
+    """
+    return jsonify(check_metrics.stats()), 200
@@ -8,7 +8,7 @@ def initialize_directories(app):
     Creates media directories if they don't exist.
     This function should be called once during app initialization.
     """
-    config = AppConfig()
+    config = AppConfig.from_mapping(app.config)
     logger.info("Checking and creating media directories if necessary")
     try:
         if not os.path.exists(config.MEDIA_FILES_DEST):
@@ -0,0 +1,137 @@
+from collections import OrderedDict
+from typing import BinaryIO, Dict, Iterator, Optional, Tuple
+import io
+import threading
+
+from extensions.logger import logger
+from storage.storage_strategy import FileStat, StorageStrategy
+
+
+class CachedStorage(StorageStrategy):
+    """
+    StorageStrategy decorator keeping small, frequently requested files in memory.
+
+    Entries are evicted least-recently-used first once `max_bytes` is exceeded.
+    Every entry remembers the stat of the file it was read from and is dropped
+    when the file changes on disk, so uploads handled by other workers are picked
+    up as well. Writes through this decorator invalidate the path immediately.
+
+    Attributes:
+        storage (StorageStrategy): The wrapped storage backend.
+        max_bytes (int): Total byte budget of the cache.
+        max_object_bytes (int): Largest file that is admitted to the cache.
+    """
+
+    def __init__(
+        self, storage: StorageStrategy, max_bytes: int, max_object_bytes: int
+    ) -> None:
+        self.storage = storage
+        self.max_bytes = max_bytes
+        self.max_object_bytes = min(max_object_bytes, max_bytes)
+        self._entries: "OrderedDict[str, Tuple[FileStat, bytes]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def save_file(self, file_path: str, file_content: bytes) -> None:
+        self.invalidate(file_path)
+        try:
+            self.storage.save_file(file_path, file_content)
+        finally:
+            self.invalidate(file_path)
+
+    def save_stream(
+        self,
+        file_path: str,
+        file_stream: BinaryIO,
+        sha256: Optional[str] = None,
+        previous_sha256: Optional[str] = None,
+    ) -> None:
+        self.invalidate(file_path)
+        try:
+            self.storage.save_stream(file_path, file_stream, sha256, previous_sha256)
+        finally:
+            self.invalidate(file_path)
+
+    def delete_file(self, file_path: str, sha256: Optional[str] = None) -> None:
+        try:
+            self.storage.delete_file(file_path, sha256)
+        finally:
+            self.invalidate(file_path)
+
+    def get_file(self, file_path: str) -> bytes:
+        file_stat = self.storage.stat_file(file_path)
+        content = self._lookup(file_path, file_stat)
+        if content is None:
+            content = self.storage.get_file(file_path)
+            self._store(file_path, file_stat, content)
+        return content
+
+    def open_file(self, file_path: str) -> BinaryIO:
+        file_stat = self.storage.stat_file(file_path)
+        content = self._lookup(file_path, file_stat)
+        if content is not None:
+            return io.BytesIO(content)
+        if file_stat.size > self.max_object_bytes:
+            return self.storage.open_file(file_path)
+        content = self.storage.get_file(file_path)
+        self._store(file_path, file_stat, content)
+        return io.BytesIO(content)
+
+    def stat_file(self, file_path: str) -> FileStat:
+        return self.storage.stat_file(file_path)
+
+    def walk_files(self, directory: str) -> Iterator[str]:
+        return self.storage.walk_files(directory)
+
+    def invalidate(self, file_path: str) -> None:
+        """
+        Drops the cached copy of the file, if any.
+        """
+        with self._lock:
+            entry = self._entries.pop(file_path, None)
+            if entry is not None:
+                self._size -= len(entry[1])
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns the cache counters and current occupancy.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._size,
+            }
+
+    def _lookup(self, file_path: str, file_stat: FileStat) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(file_path)
+            if entry is not None and entry[0] == file_stat:
+                self._entries.move_to_end(file_path)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[file_path]
+                self._size -= len(entry[1])
+            self.misses += 1
+            return None
+
+    def _store(self, file_path: str, file_stat: FileStat, content: bytes) -> None:
+        if len(content) > self.max_object_bytes or len(content) != file_stat.size:
+            return
+        with self._lock:
+            previous = self._entries.pop(file_path, None)
+            if previous is not None:
+                self._size -= len(previous[1])
+            self._entries[file_path] = (file_stat, content)
+            self._size += len(content)
+            while self._size > self.max_bytes:
+                evicted_path, (_, evicted) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                self.evictions += 1
+                logger.debug(f"Evicted from hot-file cache: {evicted_path}")
@@ -0,0 +1,124 @@
+from typing import BinaryIO, Callable, Dict, Optional, Tuple
+import os
+import tempfile
+import zlib
+
+from extensions.logger import logger
+
+try:
+    import zstandard
+except ImportError:  # zstd support is optional
+    zstandard = None
+
+
+class CompressedVariantStore:
+    """
+    Stores compressed copies of media files, generated once and reused.
+
+    Variants are keyed by the SHA-256 of the original content, so they can never go
+    stale: new content gets a new key. Files are written to a temporary name and
+    renamed into place, so concurrent requests either see a complete variant or
+    generate their own.
+
+    Attributes:
+        variants_dest (str): Directory holding the variants.
+        chunk_size (int): Read size used while compressing.
+    """
+
+    EXTENSIONS = {"zstd": "zst", "gzip": "gz"}
+
+    def __init__(
+        self, variants_dest: str, chunk_size: int, compression_level: int = 6
+    ) -> None:
+        self.variants_dest = variants_dest
+        self.chunk_size = chunk_size
+        self._compressors: Dict[str, Callable] = {}
+        if zstandard is not None:
+            self._compressors["zstd"] = lambda: zstandard.ZstdCompressor(
+                level=compression_level
+            ).compressobj()
+        self._compressors["gzip"] = lambda: zlib.compressobj(
+            compression_level, zlib.DEFLATED, 31
+        )
+
+    @property
+    def encodings(self) -> Tuple[str, ...]:
+        """
+        Supported content codings, most preferred first.
+        """
+        return tuple(self._compressors)
+
+    def variant_path(self, sha256: str, encoding: str) -> str:
+        return os.path.join(
+            self.variants_dest, sha256[:2], f"{sha256}.{self.EXTENSIONS[encoding]}"
+        )
+
+    def variant_size(self, sha256: str, encoding: str) -> Optional[int]:
+        """
+        Returns the size of the stored variant in bytes, or None if it has not
+        been generated.
+        """
+        try:
+            return os.stat(self.variant_path(sha256, encoding)).st_size
+        except FileNotFoundError:
+            return None
+
+    def open_variant(
+        self, sha256: str, encoding: str, open_source: Callable[[], BinaryIO]
+    ) -> Tuple[BinaryIO, int]:
+        """
+        Opens the compressed variant, generating it from the source on first use.
+
+        Args:
+            sha256 (str): Digest of the original content.
+            encoding (str): One of `encodings`.
+            open_source (Callable[[], BinaryIO]): Opens the original file.
+
+        Returns:
+            Tuple[BinaryIO, int]: The opened variant and its size in bytes.
+        """
+        variant_path = self.variant_path(sha256, encoding)
+        try:
+            variant = open(variant_path, "rb")
+        except FileNotFoundError:
+            self._create_variant(variant_path, encoding, open_source)
+            variant = open(variant_path, "rb")
+        return variant, os.fstat(variant.fileno()).st_size
+
+    def ensure_variant(
+        self, sha256: str, encoding: str, open_source: Callable[[], BinaryIO]
+    ) -> None:
+        """
+        Generates the variant unless it already exists.
+        """
+        variant_path = self.variant_path(sha256, encoding)
+        if not os.path.exists(variant_path):
+            self._create_variant(variant_path, encoding, open_source)
+
+    def discard(self, sha256: str) -> None:
+        """
+        Deletes every variant of the given content.
+        """
+        for encoding in self.EXTENSIONS:
+            try:
+                os.unlink(self.variant_path(sha256, encoding))
+            except FileNotFoundError:
+                pass
+
+    def _create_variant(
+        self, variant_path: str, encoding: str, open_source: Callable[[], BinaryIO]
+    ) -> None:
+        directory = os.path.dirname(variant_path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as variant, open_source() as source:
+                compressor = self._compressors[encoding]()
+                for chunk in iter(lambda: source.read(self.chunk_size), b""):
+                    variant.write(compressor.compress(chunk))
+                variant.write(compressor.flush())
+            os.replace(temp_path, variant_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        logger.info(f"Created {encoding} variant: {variant_path}")
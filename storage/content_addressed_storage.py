@@ -0,0 +1,257 @@
+from typing import BinaryIO, Callable, Optional
+import errno
+import hashlib
+import os
+import secrets
+import shutil
+import tempfile
+
+from extensions.logger import logger
+from storage.local_storage import LocalFileSystemStorage
+from storage.metadata_index import compute_sha256
+
+
+class ContentAddressedStorage(LocalFileSystemStorage):
+    """
+    Local storage that keeps each distinct content once.
+
+    Content is stored as a blob named after its SHA-256 under
+    `<media>/.blobs/ab/cd/<sha256>`, and every logical path is a hard link to its
+    blob. Reads therefore go through the logical path exactly as with
+    `LocalFileSystemStorage`, and the blob's link count doubles as its reference
+    count: a blob whose only remaining link is itself is garbage.
+
+    If the file system refuses hard links the blob is copied instead, which keeps
+    the service working without the space savings.
+    """
+
+    BLOBS_DIR = ".blobs"
+    HASH_CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, media_files_dest: str, shard_depth: int = 0) -> None:
+        super().__init__(media_files_dest, shard_depth)
+        self.blobs_dest = os.path.join(self.media_files_dest, self.BLOBS_DIR)
+
+    def blob_path(self, sha256: str) -> str:
+        """
+        Returns the sharded location of the blob for the given digest.
+        """
+        return os.path.join(self.blobs_dest, sha256[:2], sha256[2:4], sha256)
+
+    def save_file(self, file_path: str, file_content: bytes) -> None:
+        """
+        Stores the content as a blob (unless it is already stored) and links the
+        logical path to it.
+
+        Args:
+            file_path (str): Path where the file should be saved relative to the media directory.
+            file_content (bytes): Content of the file to be saved.
+        """
+        full_path = self.make_full_path(file_path)
+        try:
+            sha256 = hashlib.sha256(file_content).hexdigest()
+            blob_path = self._store_blob(sha256, lambda f: f.write(file_content))
+            self._link_into_place(blob_path, full_path)
+            self._remove_legacy_copies(file_path)
+            logger.info(f"File saved successfully at: {full_path} (blob {sha256})")
+        except OSError as e:
+            logger.error(f"Failed to save file at: {full_path}. Error: {e}")
+            raise
+
+    def save_stream(
+        self,
+        file_path: str,
+        file_stream: BinaryIO,
+        sha256: Optional[str] = None,
+        previous_sha256: Optional[str] = None,
+    ) -> None:
+        """
+        Stores the file as a blob unless it is already stored. The file is hashed
+        in chunks unless the caller passes its digest. A spooled upload staged on
+        the same file system becomes the blob without being copied.
+
+        Args:
+            file_path (str): Path where the file should be saved relative to the media directory.
+            file_stream (BinaryIO): File holding the content to be saved.
+            sha256 (Optional[str]): Digest of the content, if already known.
+            previous_sha256 (Optional[str]): Digest of the file being replaced, if
+                already known; spares rehashing it to find its blob.
+        """
+        full_path = self.make_full_path(file_path)
+        try:
+            if sha256 is None:
+                file_stream.seek(0)
+                sha256 = compute_sha256(file_stream, self.HASH_CHUNK_SIZE)
+            if not self._link_staged_blob(sha256, file_stream):
+                file_stream.seek(0)
+                self._store_blob(
+                    sha256,
+                    lambda f: shutil.copyfileobj(file_stream, f, self.COPY_CHUNK_SIZE),
+                )
+            self._link_into_place(self.blob_path(sha256), full_path, previous_sha256)
+            self._remove_legacy_copies(file_path)
+            logger.info(f"File saved successfully at: {full_path} (blob {sha256})")
+        except OSError as e:
+            logger.error(f"Failed to save file at: {full_path}. Error: {e}")
+            raise
+
+    def _remove_physical_file(
+        self, full_path: str, sha256: Optional[str] = None
+    ) -> None:
+        """
+        Removes a logical file and drops its blob once nothing links to it.
+        """
+        sha256 = self._linked_blob_digest(full_path, os.stat(full_path), sha256)
+        os.unlink(full_path)
+        if sha256 is not None:
+            self._release_blob(sha256)
+
+    def collect_garbage(self) -> int:
+        """
+        Removes blobs that are no longer linked from any logical path, e.g. after a
+        crash between unlinking a path and releasing its blob.
+
+        Returns:
+            int: Number of blobs removed.
+        """
+        removed = 0
+        for dir_path, _, file_names in os.walk(self.blobs_dest):
+            for file_name in file_names:
+                if file_name.startswith("."):
+                    continue
+                blob_path = os.path.join(dir_path, file_name)
+                if os.stat(blob_path).st_nlink == 1:
+                    os.unlink(blob_path)
+                    removed += 1
+        return removed
+
+    def _link_staged_blob(self, sha256: str, file_stream: BinaryIO) -> bool:
+        """
+        Links a staged upload (see `utils.upload_spool.SpooledUpload`) as the blob.
+        Returns False if the stream is not staged on this file system.
+        """
+        link = getattr(file_stream, "link", None)
+        if link is None:
+            return False
+        blob_path = self.blob_path(sha256)
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        try:
+            link(blob_path)
+        except FileExistsError:
+            logger.info(f"Content already stored, reusing blob: {sha256}")
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                raise
+            return False
+        return True
+
+    def _store_blob(self, sha256: str, write: Callable[[BinaryIO], object]) -> str:
+        """
+        Lets `write` fill the blob unless it already exists. The blob is written to a
+        temporary file and linked into place, so a blob is never seen half-written.
+        """
+        blob_path = self.blob_path(sha256)
+        if os.path.exists(blob_path):
+            logger.info(f"Content already stored, reusing blob: {sha256}")
+            return blob_path
+
+        blob_dir = os.path.dirname(blob_path)
+        os.makedirs(blob_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=blob_dir, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.chmod(temp_path, 0o755)
+            try:
+                os.link(temp_path, blob_path)
+            except FileExistsError:
+                # A concurrent upload of the same content won the race.
+                pass
+        finally:
+            os.unlink(temp_path)
+        return blob_path
+
+    def _link_into_place(
+        self, blob_path: str, full_path: str, previous_sha256: Optional[str] = None
+    ) -> None:
+        """
+        Atomically points the logical path at the blob and releases the blob the
+        path referenced before, if any. `previous_sha256` is that blob's digest,
+        if already known.
+        """
+        blob_stat = os.stat(blob_path)
+        try:
+            previous_stat: Optional[os.stat_result] = os.stat(full_path)
+        except FileNotFoundError:
+            previous_stat = None
+
+        if previous_stat is not None and os.path.samestat(previous_stat, blob_stat):
+            return
+        previous_sha256 = (
+            self._linked_blob_digest(full_path, previous_stat, previous_sha256)
+            if previous_stat is not None
+            else None
+        )
+
+        directory, file_name = os.path.split(full_path)
+        os.makedirs(directory, exist_ok=True)
+        temp_path = os.path.join(directory, f".{file_name}.{secrets.token_hex(8)}.tmp")
+        try:
+            os.link(blob_path, temp_path)
+        except OSError as e:
+            logger.warning(f"Hard links unavailable, copying blob instead: {e}")
+            shutil.copy2(blob_path, temp_path)
+        try:
+            os.replace(temp_path, full_path)
+        except OSError:
+            os.unlink(temp_path)
+            raise
+
+        if previous_sha256 is not None:
+            self._release_blob(previous_sha256)
+
+    def _linked_blob_digest(
+        self, full_path: str, file_stat: os.stat_result, sha256: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Returns the digest of the blob the file is linked to, or None if the file
+        is not shared with a blob.
+
+        `sha256` is the digest recorded for the file, e.g. in the metadata
+        catalog; it is trusted once the blob it names turns out to be the file.
+        Without it, or if it is stale, only the file's content identifies its
+        blob, so the file is read and hashed.
+        """
+        if file_stat.st_nlink < 2:
+            return None
+        if sha256 is not None and self._is_blob_of(sha256, file_stat):
+            return sha256
+        with open(full_path, "rb") as f:
+            sha256 = compute_sha256(f, self.HASH_CHUNK_SIZE)
+        return sha256 if self._is_blob_of(sha256, file_stat) else None
+
+    def _is_blob_of(self, sha256: str, file_stat: os.stat_result) -> bool:
+        """
+        Checks whether the blob of the digest is the same inode as the file.
+        """
+        try:
+            blob_stat = os.stat(self.blob_path(sha256))
+        except FileNotFoundError:
+            return False
+        return os.path.samestat(blob_stat, file_stat)
+
+    def _release_blob(self, sha256: str) -> None:
+        """
+        Deletes the blob if no logical path links to it anymore.
+
+        A concurrent upload may link the blob between the check and the unlink; its
+        logical file keeps the data, only the deduplication for that content is lost
+        until the next upload recreates the blob.
+        """
+        blob_path = self.blob_path(sha256)
+        try:
+            if os.stat(blob_path).st_nlink == 1:
+                os.unlink(blob_path)
+                logger.info(f"Released unreferenced blob: {sha256}")
+        except FileNotFoundError:
+            pass
@@ -1,36 +1,95 @@
-from storage.storage_strategy import StorageStrategy
+from storage.storage_strategy import FileStat, StorageStrategy
 from flask import current_app
+import errno
+import hashlib
 import os
+import shutil
+import tempfile
+from typing import BinaryIO, Callable, Iterator, List, Optional, TypeVar
+from werkzeug.security import safe_join
 from extensions.logger import logger
 
 
+T = TypeVar("T")
+
+
 class LocalFileSystemStorage(StorageStrategy):
-    def __init__(self, media_files_dest: str) -> None:
+    COPY_CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, media_files_dest: str, shard_depth: int = 0) -> None:
         """
         Initializes the storage with a media files destination directory.
 
+        With `shard_depth` > 0 files are laid out in hashed fan-out directories, e.g.
+        `images/ab/cd/<name>` for a depth of 2, so no single directory grows huge.
+        The layout is invisible to callers: paths stay `images/<name>`. Files still
+        in the flat layout remain readable until `reshard` has moved them.
+
         Args:
             media_files_dest (str): Directory where media files are stored.
                                     If not provided, defaults to the config value.
+            shard_depth (int): Number of two-hex-digit fan-out levels, 0 for a flat layout.
         """
         self.media_files_dest = (
             media_files_dest or current_app.config["MEDIA_FILES_DEST"]
         )
+        self.shard_depth = shard_depth
 
     def save_file(self, file_path: str, file_content: bytes) -> None:
         """
         Saves the file to the local file system.
 
+        The content is written to a temporary file next to the destination and
+        renamed over it, so readers never see a partially written file.
+
         Args:
             file_path (str): Path where the file should be saved relative to the media directory.
             file_content (bytes): Content of the file to be saved.
         """
+        full_path = self.make_full_path(file_path)
         try:
-            with open(file_path, "wb") as f:
-                f.write(file_content)
-                logger.info(f"File saved successfully at: {file_path}")
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            self._write_atomically(full_path, lambda f: f.write(file_content))
+            self._remove_legacy_copies(file_path)
+            logger.info(f"File saved successfully at: {full_path}")
         except OSError as e:
-            logger.error(f"Failed to save file at: {file_path}. Error: {e}")
+            logger.error(f"Failed to save file at: {full_path}. Error: {e}")
+            raise
+
+    def save_stream(
+        self,
+        file_path: str,
+        file_stream: BinaryIO,
+        sha256: Optional[str] = None,
+        previous_sha256: Optional[str] = None,
+    ) -> None:
+        """
+        Saves the whole content of an opened file.
+
+        A spooled upload staged on the same file system is renamed into place
+        without copying; any other stream is copied in chunks to a temporary file
+        that is renamed over the destination.
+
+        Args:
+            file_path (str): Path where the file should be saved relative to the media directory.
+            file_stream (BinaryIO): File holding the content to be saved.
+            sha256 (Optional[str]): Digest of the content; not needed by this backend.
+            previous_sha256 (Optional[str]): Digest of the replaced file; not
+                needed by this backend.
+        """
+        full_path = self.make_full_path(file_path)
+        try:
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            if not self._publish_staged(file_stream, full_path):
+                file_stream.seek(0)
+                self._write_atomically(
+                    full_path,
+                    lambda f: shutil.copyfileobj(file_stream, f, self.COPY_CHUNK_SIZE),
+                )
+            self._remove_legacy_copies(file_path)
+            logger.info(f"File saved successfully at: {full_path}")
+        except OSError as e:
+            logger.error(f"Failed to save file at: {full_path}. Error: {e}")
             raise
 
     def get_file(self, file_path: str) -> bytes:
@@ -43,29 +102,256 @@ class LocalFileSystemStorage(StorageStrategy):
         Returns:
             bytes: The content of the file.
         """
-        full_path = self.make_full_path(file_path)
-        logger.info(f"Attempting to retrieve file from: {full_path}")
+        logger.info(f"Attempting to retrieve file: {file_path}")
         try:
-            with open(full_path, "rb") as f:
-                return f.read()
+            return self._resolve(file_path, self._read_all)
         except FileNotFoundError:
-            logger.error(f"File not found: {full_path}")
+            logger.error(f"File not found: {file_path}")
             raise
         except OSError as e:
-            logger.error(f"Error reading file: {full_path}. Error: {e}")
+            logger.error(f"Error reading file: {file_path}. Error: {e}")
             raise
 
+    def delete_file(self, file_path: str, sha256: Optional[str] = None) -> None:
+        """
+        Deletes the file from the local file system, in whichever layout it is stored.
+
+        Args:
+            file_path (str): Path of the file relative to the media directory.
+            sha256 (Optional[str]): Digest of the file, if already known.
+        """
+        existing_paths = [
+            path for path in self._layout_paths(file_path) if os.path.lexists(path)
+        ]
+        if not existing_paths:
+            raise FileNotFoundError(file_path)
+        for full_path in existing_paths:
+            self._remove_physical_file(full_path, sha256)
+            logger.info(f"File deleted: {full_path}")
+
+    def open_file(self, file_path: str) -> BinaryIO:
+        """
+        Opens the file for streaming reads without loading it into memory.
+
+        The returned file object exposes a real file descriptor, so WSGI servers
+        that provide `wsgi.file_wrapper` can hand it to `sendfile`.
+
+        Args:
+            file_path (str): Path of the file relative to the media directory.
+
+        Returns:
+            BinaryIO: The opened file object. The caller must close it.
+        """
+        logger.info(f"Opening file for streaming: {file_path}")
+        try:
+            return self._resolve(file_path, lambda full_path: open(full_path, "rb"))
+        except FileNotFoundError:
+            logger.error(f"File not found: {file_path}")
+            raise
+        except OSError as e:
+            logger.error(f"Error opening file: {file_path}. Error: {e}")
+            raise
+
+    def stat_file(self, file_path: str) -> FileStat:
+        """
+        Returns the size and modification time of the file.
+
+        Args:
+            file_path (str): Path of the file relative to the media directory.
+
+        Returns:
+            FileStat: Size in bytes and modification timestamp.
+        """
+        stat_result = self._resolve(file_path, os.stat)
+        return FileStat(size=stat_result.st_size, mtime=stat_result.st_mtime)
+
+    def walk_files(self, directory: str) -> Iterator[str]:
+        """
+        Walks a media directory, skipping hidden entries such as temporary files.
+
+        Args:
+            directory (str): Directory relative to the media directory.
+
+        Yields:
+            str: Path of each file relative to the media directory, independent of
+            the directory layout.
+        """
+        for full_path in self._walk_physical(directory):
+            yield self._logical_path(full_path)
+
+    def reshard(self, directory: str) -> int:
+        """
+        Moves files of a directory into the configured layout while it is in use.
+
+        Each file is hard-linked into its new location before the old name is
+        removed, so it can always be found under one of the two names, and readers
+        retry the new location when the old one disappears under them. A file
+        already present at the new location is newer (written after sharding was
+        enabled) and wins.
+
+        Args:
+            directory (str): Directory relative to the media directory.
+
+        Returns:
+            int: Number of files moved.
+        """
+        moved = 0
+        for full_path in list(self._walk_physical(directory)):
+            target_path = self.make_full_path(self._logical_path(full_path))
+            if target_path == full_path:
+                continue
+            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            try:
+                os.link(full_path, target_path)
+            except FileExistsError:
+                pass
+            except OSError:
+                if os.path.exists(target_path):
+                    continue
+                os.rename(full_path, target_path)
+                moved += 1
+                continue
+            os.unlink(full_path)
+            moved += 1
+        logger.info(f"Resharded {moved} files in: {directory}")
+        return moved
+
     def make_full_path(self, file_path: str) -> str:
         """
-        Constructs the full path to the file within the media directory.
+        Constructs the full path to the file within the media directory, in the
+        configured layout.
 
         Args:
             file_path (str): Path of the file relative to the media directory.
 
         Returns:
             str: Full path to the file.
+
+        Raises:
+            FileNotFoundError: If the path escapes the media directory.
+        """
+        return self._layout_paths(file_path)[0]
+
+    def _layout_paths(self, file_path: str) -> List[str]:
+        """
+        Returns the locations the file may be stored at, configured layout first.
+        Only `<directory>/<name>` paths are sharded.
+        """
+        flat_path = safe_join(self.media_files_dest, file_path)
+        if flat_path is None:
+            raise FileNotFoundError(file_path)
+        parts = file_path.split("/")
+        if self.shard_depth == 0 or len(parts) != 2:
+            return [flat_path]
+        directory, file_name = parts
+        sharded_path = os.path.join(
+            self.media_files_dest,
+            directory,
+            *self._shard_components(file_name, self.shard_depth),
+            file_name,
+        )
+        return [sharded_path, flat_path]
+
+    def _resolve(self, file_path: str, operation: Callable[[str], T]) -> T:
         """
-        return os.path.join(self.media_files_dest, file_path)
+        Applies `operation` to the first location holding the file.
+
+        The configured location is tried again last because a concurrent `reshard`
+        may move the file there between the first two attempts.
+        """
+        candidates = self._layout_paths(file_path)
+        if len(candidates) > 1:
+            candidates.append(candidates[0])
+        for full_path in candidates[:-1]:
+            try:
+                return operation(full_path)
+            except FileNotFoundError:
+                pass
+        return operation(candidates[-1])
+
+    @staticmethod
+    def _write_atomically(full_path: str, write: Callable[[BinaryIO], object]) -> None:
+        """
+        Lets `write` fill a temporary file in the destination directory and
+        renames it over `full_path`.
+        """
+        directory, file_name = os.path.split(full_path)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{file_name}.")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(temp_path, 0o755)
+            os.replace(temp_path, full_path)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+    @staticmethod
+    def _publish_staged(file_stream: BinaryIO, full_path: str) -> bool:
+        """
+        Renames a staged upload (see `utils.upload_spool.SpooledUpload`) into
+        place. Returns False if the stream is not staged on this file system.
+        """
+        publish = getattr(file_stream, "publish", None)
+        if publish is None:
+            return False
+        try:
+            publish(full_path)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            return False
+        return True
+
+    def _remove_legacy_copies(self, file_path: str) -> None:
+        """
+        Removes copies of the file left in a layout other than the configured one.
+        """
+        for full_path in self._layout_paths(file_path)[1:]:
+            if os.path.lexists(full_path):
+                self._remove_physical_file(full_path)
+
+    def _remove_physical_file(
+        self, full_path: str, sha256: Optional[str] = None
+    ) -> None:
+        os.unlink(full_path)
+
+    def _walk_physical(self, directory: str) -> Iterator[str]:
+        root = safe_join(self.media_files_dest, directory)
+        if root is None:
+            return
+        for dir_path, dir_names, file_names in os.walk(root):
+            dir_names[:] = [name for name in dir_names if not name.startswith(".")]
+            for file_name in file_names:
+                if not file_name.startswith("."):
+                    yield os.path.join(dir_path, file_name)
+
+    def _logical_path(self, full_path: str) -> str:
+        """
+        Maps a physical location back to the path callers use, stripping the
+        fan-out directories of sharded files.
+        """
+        parts = os.path.relpath(full_path, self.media_files_dest).split(os.sep)
+        if len(parts) > 2 and parts[1:-1] == self._shard_components(
+            parts[-1], len(parts) - 2
+        ):
+            return f"{parts[0]}/{parts[-1]}"
+        return "/".join(parts)
+
+    @staticmethod
+    def _shard_components(file_name: str, depth: int) -> List[str]:
+        digest = hashlib.md5(file_name.encode(), usedforsecurity=False).hexdigest()
+        return [digest[i * 2 : i * 2 + 2] for i in range(depth)]
+
+    @staticmethod
+    def _read_all(full_path: str) -> bytes:
+        with open(full_path, "rb") as f:
+            return f.read()
 
 
 #
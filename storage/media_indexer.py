@@ -0,0 +1,71 @@
+from typing import Dict, Iterable
+
+from extensions.logger import logger
+from storage.metadata_index import (
+    FileMetadata,
+    MetadataIndex,
+    compute_sha256,
+    guess_mime_type,
+)
+from storage.storage_strategy import StorageStrategy
+
+
+def reindex_media(
+    storage_strategy: StorageStrategy,
+    metadata_index: MetadataIndex,
+    directories: Iterable[str],
+    chunk_size: int,
+) -> Dict[str, int]:
+    """
+    Reconciles the metadata index with the files actually present in storage.
+
+    Files that are new or changed since they were indexed are hashed and recorded,
+    and records of files that no longer exist are removed. Unchanged files cost a
+    stat and an index lookup.
+
+    Args:
+        storage_strategy (StorageStrategy): Storage holding the media files.
+        metadata_index (MetadataIndex): Index to bring up to date.
+        directories (Iterable[str]): Media directories to scan.
+        chunk_size (int): Read size used while hashing.
+
+    Returns:
+        Dict[str, int]: Number of files indexed, unchanged and removed.
+    """
+    counts = {"indexed": 0, "unchanged": 0, "removed": 0}
+    for directory in directories:
+        seen = set()
+        for file_path in storage_strategy.walk_files(directory):
+            seen.add(file_path)
+            file_stat = storage_strategy.stat_file(file_path)
+            metadata = metadata_index.get(file_path)
+            if metadata is not None and metadata.matches(file_stat):
+                counts["unchanged"] += 1
+                continue
+
+            with storage_strategy.open_file(file_path) as file_stream:
+                sha256 = compute_sha256(file_stream, chunk_size)
+            metadata_index.put(
+                FileMetadata(
+                    path=file_path,
+                    sha256=sha256,
+                    size=file_stat.size,
+                    mtime=file_stat.mtime,
+                    mime_type=guess_mime_type(file_path),
+                )
+            )
+            counts["indexed"] += 1
+
+        cursor = None
+        while True:
+            page = metadata_index.list_files(directory, limit=500, cursor=cursor)
+            for metadata in page.items:
+                if metadata.path not in seen:
+                    metadata_index.delete(metadata.path)
+                    counts["removed"] += 1
+            if page.next_cursor is None:
+                break
+            cursor = page.next_cursor
+
+        logger.info(f"Reindexed media directory: {directory}")
+    return counts
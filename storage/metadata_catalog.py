@@ -0,0 +1,157 @@
+from typing import List, Optional
+import os
+import sqlite3
+import threading
+
+from extensions.logger import logger
+from storage.metadata_index import (
+    LIST_SORT_KEYS,
+    FileMetadata,
+    ListPage,
+    MetadataIndex,
+    decode_cursor,
+    make_page,
+)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS media_files (
+    path TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    mime_type TEXT NOT NULL,
+    validator TEXT,
+    verdict TEXT,
+    uploaded_at REAL,
+    directory TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_media_files_sha256 ON media_files (sha256);
+CREATE INDEX IF NOT EXISTS idx_media_files_mtime ON media_files (directory, mtime, path);
+CREATE INDEX IF NOT EXISTS idx_media_files_size ON media_files (directory, size, path);
+"""
+
+_SORT_COLUMNS = {"name": "path", "mtime": "mtime", "size": "size"}
+
+# Sorts after every character secure_filename() can produce.
+_PREFIX_UPPER_BOUND = "\U0010ffff"
+
+_COLUMNS = "path, sha256, size, mtime, mime_type, validator, verdict, uploaded_at"
+
+
+class SQLiteMetadataCatalog(MetadataIndex):
+    """
+    Persistent metadata catalog backed by SQLite.
+
+    Each thread gets its own connection. The database runs in WAL mode so several
+    worker processes can read while one of them records an upload.
+
+    Attributes:
+        db_path (str): Location of the SQLite database file.
+    """
+
+    def __init__(self, db_path: str) -> None:
+        self.db_path = db_path
+        self._local = threading.local()
+
+    def get(self, file_path: str) -> Optional[FileMetadata]:
+        row = (
+            self._connection()
+            .execute(f"SELECT {_COLUMNS} FROM media_files WHERE path = ?", (file_path,))
+            .fetchone()
+        )
+        return FileMetadata(*row) if row else None
+
+    def get_by_hash(self, sha256: str) -> List[FileMetadata]:
+        rows = self._connection().execute(
+            f"SELECT {_COLUMNS} FROM media_files WHERE sha256 = ?", (sha256,)
+        )
+        return [FileMetadata(*row) for row in rows]
+
+    def put(self, metadata: FileMetadata) -> None:
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                f"""
+                INSERT INTO media_files ({_COLUMNS}, directory)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (path) DO UPDATE SET
+                    sha256 = excluded.sha256,
+                    size = excluded.size,
+                    mtime = excluded.mtime,
+                    mime_type = excluded.mime_type,
+                    validator = excluded.validator,
+                    verdict = excluded.verdict,
+                    uploaded_at = excluded.uploaded_at
+                """,
+                (
+                    metadata.path,
+                    metadata.sha256,
+                    metadata.size,
+                    metadata.mtime,
+                    metadata.mime_type,
+                    metadata.validator,
+                    metadata.verdict,
+                    metadata.uploaded_at,
+                    metadata.path.split("/", 1)[0],
+                ),
+            )
+
+    def delete(self, file_path: str) -> None:
+        connection = self._connection()
+        with connection:
+            connection.execute("DELETE FROM media_files WHERE path = ?", (file_path,))
+
+    def list_files(
+        self,
+        directory: str,
+        prefix: str = "",
+        sort: str = "name",
+        descending: bool = False,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> ListPage:
+        if sort not in LIST_SORT_KEYS:
+            raise ValueError(f"Unknown sort key: {sort}")
+        column = _SORT_COLUMNS[sort]
+        order = "DESC" if descending else "ASC"
+        path_prefix = f"{directory}/{prefix}"
+        conditions = ["directory = ?", "path >= ?", "path < ?"]
+        params: list = [directory, path_prefix, path_prefix + _PREFIX_UPPER_BOUND]
+
+        if cursor is not None:
+            value, last_path = decode_cursor(cursor, sort)
+            operator = "<" if descending else ">"
+            if sort == "name":
+                conditions.append(f"path {operator} ?")
+                params.append(last_path)
+            else:
+                conditions.append(f"({column}, path) {operator} (?, ?)")
+                params.extend([value, last_path])
+
+        order_by = (
+            f"path {order}" if sort == "name" else f"{column} {order}, path {order}"
+        )
+        rows = self._connection().execute(
+            f"SELECT {_COLUMNS} FROM media_files WHERE {' AND '.join(conditions)} "
+            f"ORDER BY {order_by} LIMIT ?",
+            (*params, limit + 1),
+        )
+        return make_page([FileMetadata(*row) for row in rows], sort, limit)
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        Returns the calling thread's connection, opening it on first use.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.db_path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(_SCHEMA)
+            logger.debug(f"Opened metadata catalog: {self.db_path}")
+            self._local.connection = connection
+        return connection
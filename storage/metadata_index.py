@@ -0,0 +1,214 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+import base64
+import binascii
+import hashlib
+import json
+import mimetypes
+import threading
+
+from storage.storage_strategy import FileStat
+
+
+DEFAULT_MIME_TYPE = "application/octet-stream"
+LIST_SORT_KEYS = ("name", "mtime", "size")
+
+
+@dataclass(frozen=True)
+class FileMetadata:
+    path: str
+    sha256: str
+    size: int
+    mtime: float
+    mime_type: str = DEFAULT_MIME_TYPE
+    validator: Optional[str] = None
+    verdict: Optional[str] = None
+    uploaded_at: Optional[float] = None
+
+    def matches(self, file_stat: FileStat) -> bool:
+        """
+        Checks that the record still describes the file on disk, i.e. that it
+        can be trusted without reading the file.
+        """
+        return self.size == file_stat.size and self.mtime == file_stat.mtime
+
+
+@dataclass(frozen=True)
+class ListPage:
+    items: List[FileMetadata]
+    next_cursor: Optional[str]
+
+
+class MetadataIndex(ABC):
+    """
+    Maps logical media paths to the metadata recorded for them at upload time.
+    """
+
+    @abstractmethod
+    def get(self, file_path: str) -> Optional[FileMetadata]:
+        pass
+
+    @abstractmethod
+    def get_by_hash(self, sha256: str) -> List[FileMetadata]:
+        pass
+
+    @abstractmethod
+    def put(self, metadata: FileMetadata) -> None:
+        pass
+
+    @abstractmethod
+    def delete(self, file_path: str) -> None:
+        pass
+
+    @abstractmethod
+    def list_files(
+        self,
+        directory: str,
+        prefix: str = "",
+        sort: str = "name",
+        descending: bool = False,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> ListPage:
+        """
+        Returns one page of the files in `directory` whose name starts with `prefix`.
+
+        Pages are keyset-paginated: `cursor` is the opaque `next_cursor` of the
+        previous page, so the cost of a page does not grow with its position.
+
+        Raises:
+            ValueError: If `sort` is unknown or `cursor` is malformed.
+        """
+        pass
+
+
+class InMemoryMetadataIndex(MetadataIndex):
+    """
+    Process-local, thread-safe metadata index.
+    """
+
+    def __init__(self) -> None:
+        self._records: Dict[str, FileMetadata] = {}
+        self._lock = threading.Lock()
+
+    def get(self, file_path: str) -> Optional[FileMetadata]:
+        return self._records.get(file_path)
+
+    def get_by_hash(self, sha256: str) -> List[FileMetadata]:
+        with self._lock:
+            return [
+                metadata
+                for metadata in self._records.values()
+                if metadata.sha256 == sha256
+            ]
+
+    def put(self, metadata: FileMetadata) -> None:
+        with self._lock:
+            self._records[metadata.path] = metadata
+
+    def delete(self, file_path: str) -> None:
+        with self._lock:
+            self._records.pop(file_path, None)
+
+    def list_files(
+        self,
+        directory: str,
+        prefix: str = "",
+        sort: str = "name",
+        descending: bool = False,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> ListPage:
+        if sort not in LIST_SORT_KEYS:
+            raise ValueError(f"Unknown sort key: {sort}")
+        path_prefix = f"{directory}/{prefix}"
+        with self._lock:
+            records = [
+                metadata
+                for metadata in self._records.values()
+                if metadata.path.startswith(path_prefix)
+            ]
+        records.sort(key=lambda m: sort_key(m, sort), reverse=descending)
+        if cursor is not None:
+            position = decode_cursor(cursor, sort)
+            if descending:
+                records = [m for m in records if sort_key(m, sort) < position]
+            else:
+                records = [m for m in records if sort_key(m, sort) > position]
+        return make_page(records[: limit + 1], sort, limit)
+
+
+def guess_mime_type(file_path: str) -> str:
+    """
+    Guesses the content type from the file name.
+
+    Args:
+        file_path (str): Path of the file relative to the media directory.
+
+    Returns:
+        str: The MIME type, or `application/octet-stream` if unknown.
+    """
+    return mimetypes.guess_type(file_path)[0] or DEFAULT_MIME_TYPE
+
+
+def compute_sha256(file_stream: BinaryIO, chunk_size: int) -> str:
+    """
+    Hashes a file object from its current position in fixed-size chunks.
+
+    Args:
+        file_stream (BinaryIO): The file to hash.
+        chunk_size (int): Number of bytes read per iteration.
+
+    Returns:
+        str: Hex-encoded SHA-256 digest.
+    """
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: file_stream.read(chunk_size), b""):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def sort_key(metadata: FileMetadata, sort: str) -> Tuple[Any, str]:
+    """
+    Returns the keyset position of a record for the given sort order.
+    """
+    if sort == "name":
+        return metadata.path, metadata.path
+    return getattr(metadata, sort), metadata.path
+
+
+def encode_cursor(position: Tuple[Any, str]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(position)).encode()).decode()
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[Any, str]:
+    """
+    Decodes a cursor produced by `encode_cursor` for the `sort` order.
+
+    Raises:
+        ValueError: If the cursor is malformed or its value is not of the type
+            of the sort key: a string for `name`, a number for `mtime` and `size`.
+    """
+    try:
+        value, path = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+    if sort == "name":
+        value_valid = isinstance(value, str)
+    else:
+        value_valid = isinstance(value, (int, float)) and not isinstance(value, bool)
+    if not (value_valid and isinstance(path, str)):
+        raise ValueError("Invalid cursor")
+    return value, path
+
+
+def make_page(records: List[FileMetadata], sort: str, limit: int) -> ListPage:
+    """
+    Builds a page from up to `limit + 1` records; the extra record only signals
+    that another page exists.
+    """
+    if len(records) <= limit:
+        return ListPage(items=records, next_cursor=None)
+    items = records[:limit]
+    return ListPage(items=items, next_cursor=encode_cursor(sort_key(items[-1], sort)))
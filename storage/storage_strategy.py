@@ -1,4 +1,10 @@
 from abc import ABC, abstractmethod
+from typing import BinaryIO, Iterator, NamedTuple, Optional
+
+
+class FileStat(NamedTuple):
+    size: int
+    mtime: float
 
 
 class StorageStrategy(ABC):
@@ -6,10 +12,72 @@ class StorageStrategy(ABC):
     def save_file(self, file_path: str, file_content: bytes) -> None:
         pass
 
+    def save_stream(
+        self,
+        file_path: str,
+        file_stream: BinaryIO,
+        sha256: Optional[str] = None,
+        previous_sha256: Optional[str] = None,
+    ) -> None:
+        """
+        Saves the whole content of an opened file, e.g. a spooled upload. `sha256`
+        is the content's digest and `previous_sha256` that of the file being
+        replaced, if the caller already knows them.
+
+        Backends that can move or copy the file in chunks override this; the
+        default reads it into memory and calls `save_file`.
+        """
+        file_stream.seek(0)
+        self.save_file(file_path, file_stream.read())
+
     @abstractmethod
     def get_file(self, file_path: str) -> bytes:
         pass
 
+    @abstractmethod
+    def delete_file(self, file_path: str, sha256: Optional[str] = None) -> None:
+        """
+        Deletes the file. `sha256` is its digest, if the caller already knows it.
+        """
+        pass
+
+    @abstractmethod
+    def open_file(self, file_path: str) -> BinaryIO:
+        """
+        Opens the file for streaming reads. The caller is responsible for closing it.
+        """
+        pass
+
+    @abstractmethod
+    def stat_file(self, file_path: str) -> FileStat:
+        pass
+
+    @abstractmethod
+    def walk_files(self, directory: str) -> Iterator[str]:
+        """
+        Yields the paths, relative to the media directory, of all files stored in
+        `directory`.
+        """
+        pass
+
+    def iter_range(
+        self, file_stream: BinaryIO, start: int, length: int, chunk_size: int
+    ) -> Iterator[bytes]:
+        """
+        Yields `length` bytes of an opened file starting at offset `start`.
+
+        Seeks once and then reads at most `chunk_size` bytes at a time, so a range
+        never has to be held in memory as a whole.
+        """
+        file_stream.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = file_stream.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
     #
     # @abstractmethod
     # def make_full_path(self, file_path:str) -> str:
@@ -0,0 +1,28 @@
+import os
+import shutil
+import tempfile
+
+import pytest
+
+from app import create_app
+
+
+@pytest.fixture(scope="function")
+def media_app():
+    media_files_dest = tempfile.mkdtemp()
+    yield create_app({"TESTING": True, "MEDIA_FILES_DEST": media_files_dest})
+    shutil.rmtree(media_files_dest)
+
+
+def test_reindex_records_files_copied_into_media(media_app):
+    media_files_dest = media_app.config["MEDIA_FILES_DEST"]
+    with open(os.path.join(media_files_dest, "images", "copied.png"), "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+    runner = media_app.test_cli_runner()
+    result = runner.invoke(args=["media", "reindex"])
+    assert result.exit_code == 0
+    assert result.output.strip() == "Indexed 1, unchanged 0, removed 0"
+    metadata_index = media_app.extensions["media_metadata_index"]
+    assert metadata_index.get("images/copied.png").mime_type == "image/png"
+    result = runner.invoke(args=["media", "reindex"])
+    assert result.output.strip() == "Indexed 0, unchanged 1, removed 0"
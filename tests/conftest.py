@@ -1,5 +1,6 @@
 import pytest
 from app import create_app
+from routes import file_routes
 import os
 import tempfile
 import shutil
@@ -7,8 +8,7 @@ import shutil
 
 @pytest.fixture(scope="session")
 def app():
-    app = create_app()
-    app.config.update(
+    app = create_app(
         {
             "TESTING": True,
             "MEDIA_FILES_DEST": tempfile.mkdtemp(),
@@ -26,15 +26,15 @@ def client(app):
 
 @pytest.fixture(scope="session")
 def api_key():
-    key = os.getenv("API_KEY")
-    if not key:
-        pytest.skip("API_KEY environment variable not set")
-    return key
+    # The key of the environment, or a test key when none is set.
+    if not file_routes.config.API_KEY:
+        file_routes.config.API_KEY = "test-api-key"
+    return file_routes.config.API_KEY
 
 
 @pytest.fixture(scope="function")
 def valid_image_data():
-    return b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x06\x00\x00\x00\x1f\x15\xc4\x89\x00\x00\x00\x0bIDATx\x9cc\xfa\xff\xff?\x00\x05\xfe\x02\xfe\xdc\xcc\x59\xe7\x00\x00\x00\x00IEND\xaeB`\x82"
+    return b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x06\x00\x00\x00\x1f\x15\xc4\x89\x00\x00\x00\rIDATx\x9cc\xf8\xcf\xc0\xf0\x1f\x00\x05\x00\x01\xff\x89\x99=\x1d\x00\x00\x00\x00IEND\xaeB`\x82"
 
 
 @pytest.fixture(scope="function")
@@ -0,0 +1,71 @@
+import io
+import shutil
+import tempfile
+
+import pytest
+
+from app import create_app
+from validators.pipeline import check_metrics
+
+
+@pytest.fixture(scope="function")
+def cached_app():
+    media_files_dest = tempfile.mkdtemp()
+    yield create_app(
+        {
+            "TESTING": True,
+            "MEDIA_FILES_DEST": media_files_dest,
+            "HOT_CACHE_MAX_BYTES": 1024 * 1024,
+        }
+    )
+    shutil.rmtree(media_files_dest)
+
+
+def test_cache_metrics_report_disabled_cache(client):
+    response = client.get("/health/cache")
+    assert response.status_code == 200
+    assert response.get_json() == {"enabled": False}
+
+
+def test_cache_metrics_count_hits_and_misses(cached_app):
+    storage = cached_app.extensions["media_storage"]
+    storage.save_file("images/logo.png", b"x" * 100)
+    client = cached_app.test_client()
+    for _ in range(2):
+        assert client.get("/media/images/logo.png").data == b"x" * 100
+    stats = client.get("/health/cache").get_json()
+    assert stats["enabled"] is True
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+@pytest.fixture(scope="function")
+def process_app():
+    media_files_dest = tempfile.mkdtemp()
+    app = create_app(
+        {
+            "TESTING": True,
+            "MEDIA_FILES_DEST": media_files_dest,
+            "VALIDATION_EXECUTOR": "process",
+            "VALIDATION_WORKERS": 1,
+        }
+    )
+    yield app
+    app.extensions["media_validation_pool"].shutdown()
+    shutil.rmtree(media_files_dest)
+
+
+def test_validation_metrics_include_worker_checks(
+    process_app, api_key, valid_image_data
+):
+    check_metrics.reset()
+    client = process_app.test_client()
+    response = client.post(
+        "/media/images/logo.png",
+        data={"file": (io.BytesIO(valid_image_data), "logo.png")},
+        headers={"Authorization": api_key},
+        content_type="multipart/form-data",
+    )
+    assert response.status_code == 200
+    checks = client.get("/health/validation").get_json()["image"]
+    assert {check["check"] for check in checks} >= {"header_dimensions", "decode"}
+    assert all(check["calls"] == 1 for check in checks)
@@ -0,0 +1,59 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from storage.cached_storage import CachedStorage
+from storage.local_storage import LocalFileSystemStorage
+
+
+class TestCachedStorage(unittest.TestCase):
+    def setUp(self):
+        self.media_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.media_dir, "images"))
+        self.storage = CachedStorage(
+            LocalFileSystemStorage(self.media_dir),
+            max_bytes=100,
+            max_object_bytes=60,
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.media_dir)
+
+    def _write(self, file_path, content):
+        with open(os.path.join(self.media_dir, file_path), "wb") as f:
+            f.write(content)
+
+    def test_second_read_is_a_hit(self):
+        self._write("images/logo.png", b"x" * 40)
+        with self.storage.open_file("images/logo.png") as f:
+            self.assertEqual(f.read(), b"x" * 40)
+        with self.storage.open_file("images/logo.png") as f:
+            self.assertEqual(f.read(), b"x" * 40)
+        stats = self.storage.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def test_large_files_are_not_cached(self):
+        self._write("images/big.png", b"x" * 80)
+        self.storage.open_file("images/big.png").close()
+        self.assertEqual(self.storage.stats()["entries"], 0)
+
+    def test_evicts_least_recently_used(self):
+        self._write("images/a.png", b"a" * 50)
+        self._write("images/b.png", b"b" * 50)
+        self._write("images/c.png", b"c" * 50)
+        self.storage.get_file("images/a.png")
+        self.storage.get_file("images/b.png")
+        self.storage.get_file("images/a.png")
+        self.storage.get_file("images/c.png")
+        stats = self.storage.stats()
+        self.assertEqual(stats["evictions"], 1)
+        self.assertLessEqual(stats["bytes"], 100)
+        self.storage.get_file("images/a.png")
+        self.assertEqual(self.storage.stats()["hits"], 2)
+
+    def test_save_invalidates_cached_copy(self):
+        self._write("images/logo.png", b"old")
+        self.storage.get_file("images/logo.png")
+        self.storage.save_file("images/logo.png", b"new content")
+        self.assertEqual(self.storage.get_file("images/logo.png"), b"new content")
@@ -0,0 +1,72 @@
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from storage import content_addressed_storage
+from storage.content_addressed_storage import ContentAddressedStorage
+
+
+class TestContentAddressedStorage(unittest.TestCase):
+    def setUp(self):
+        self.media_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.media_dir, "images"))
+        os.makedirs(os.path.join(self.media_dir, "files"))
+        self.storage = ContentAddressedStorage(self.media_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.media_dir)
+
+    def _blob_count(self):
+        return sum(len(files) for _, _, files in os.walk(self.storage.blobs_dest))
+
+    def test_identical_uploads_share_one_blob(self):
+        self.storage.save_file("images/a.png", b"same content")
+        self.storage.save_file("files/b.png", b"same content")
+        self.assertEqual(self._blob_count(), 1)
+        self.assertEqual(self.storage.get_file("files/b.png"), b"same content")
+        a_stat = os.stat(self.storage.make_full_path("images/a.png"))
+        b_stat = os.stat(self.storage.make_full_path("files/b.png"))
+        self.assertTrue(os.path.samestat(a_stat, b_stat))
+
+    def test_blob_is_removed_with_last_reference(self):
+        self.storage.save_file("images/a.png", b"content")
+        self.storage.save_file("files/b.png", b"content")
+        self.storage.delete_file("images/a.png")
+        self.assertEqual(self._blob_count(), 1)
+        self.storage.delete_file("files/b.png")
+        self.assertEqual(self._blob_count(), 0)
+
+    def test_overwrite_releases_previous_blob(self):
+        self.storage.save_file("images/a.png", b"old")
+        self.storage.save_file("images/a.png", b"new")
+        self.assertEqual(self._blob_count(), 1)
+        self.assertEqual(self.storage.get_file("images/a.png"), b"new")
+
+    def test_known_digests_spare_rehashing_the_stored_file(self):
+        old_sha256 = hashlib.sha256(b"old").hexdigest()
+        new_sha256 = hashlib.sha256(b"new").hexdigest()
+        self.storage.save_file("images/a.png", b"old")
+        with mock.patch.object(
+            content_addressed_storage, "compute_sha256", side_effect=AssertionError
+        ):
+            self.storage.save_stream(
+                "images/a.png", io.BytesIO(b"new"), new_sha256, old_sha256
+            )
+            self.assertEqual(self._blob_count(), 1)
+            self.storage.delete_file("images/a.png", new_sha256)
+        self.assertEqual(self._blob_count(), 0)
+
+    def test_stale_digest_falls_back_to_hashing(self):
+        self.storage.save_file("images/a.png", b"content")
+        self.storage.delete_file("images/a.png", hashlib.sha256(b"other").hexdigest())
+        self.assertEqual(self._blob_count(), 0)
+
+    def test_collect_garbage_removes_orphaned_blobs(self):
+        self.storage.save_file("images/a.png", b"content")
+        os.unlink(self.storage.make_full_path("images/a.png"))
+        self.assertEqual(self.storage.collect_garbage(), 1)
+        self.assertEqual(self._blob_count(), 0)
@@ -0,0 +1,53 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from storage.local_storage import LocalFileSystemStorage
+
+
+class TestShardedLocalStorage(unittest.TestCase):
+    def setUp(self):
+        self.media_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.media_dir, "images"))
+        self.storage = LocalFileSystemStorage(self.media_dir, shard_depth=2)
+
+    def tearDown(self):
+        shutil.rmtree(self.media_dir)
+
+    def _write_flat(self, name, content):
+        with open(os.path.join(self.media_dir, "images", name), "wb") as f:
+            f.write(content)
+
+    def test_saves_into_fan_out_directories(self):
+        self.storage.save_file("images/a.png", b"content")
+        full_path = self.storage.make_full_path("images/a.png")
+        relative = os.path.relpath(full_path, self.media_dir).split(os.sep)
+        self.assertEqual(len(relative), 4)
+        self.assertTrue(os.path.isfile(full_path))
+        self.assertEqual(self.storage.get_file("images/a.png"), b"content")
+        self.assertEqual(list(self.storage.walk_files("images")), ["images/a.png"])
+
+    def test_reads_flat_files_until_resharded(self):
+        self._write_flat("old.png", b"legacy")
+        self.assertEqual(self.storage.get_file("images/old.png"), b"legacy")
+        self.assertEqual(self.storage.reshard("images"), 1)
+        self.assertFalse(
+            os.path.exists(os.path.join(self.media_dir, "images", "old.png"))
+        )
+        self.assertEqual(self.storage.get_file("images/old.png"), b"legacy")
+        self.assertEqual(list(self.storage.walk_files("images")), ["images/old.png"])
+
+    def test_save_removes_flat_copy(self):
+        self._write_flat("a.png", b"old")
+        self.storage.save_file("images/a.png", b"new")
+        self.assertFalse(
+            os.path.exists(os.path.join(self.media_dir, "images", "a.png"))
+        )
+        self.assertEqual(self.storage.get_file("images/a.png"), b"new")
+
+    def test_delete_removes_file_in_any_layout(self):
+        self._write_flat("a.png", b"old")
+        self.storage.delete_file("images/a.png")
+        with self.assertRaises(FileNotFoundError):
+            self.storage.stat_file("images/a.png")
@@ -0,0 +1,51 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from storage.local_storage import LocalFileSystemStorage
+from storage.media_indexer import reindex_media
+from storage.metadata_catalog import SQLiteMetadataCatalog
+
+
+class TestReindexMedia(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.storage = LocalFileSystemStorage(self.directory)
+        self.catalog = SQLiteMetadataCatalog(
+            os.path.join(self.directory, ".catalog.sqlite3")
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _write(self, file_path, content):
+        full_path = os.path.join(self.directory, file_path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "wb") as f:
+            f.write(content)
+
+    def _reindex(self):
+        return reindex_media(self.storage, self.catalog, ["images", "files"], 4)
+
+    def test_indexes_new_files_and_skips_unchanged_ones(self):
+        self._write("images/a.png", b"first")
+        self._write("files/b.pdf", b"second")
+        self.assertEqual(self._reindex(), {"indexed": 2, "unchanged": 0, "removed": 0})
+        metadata = self.catalog.get("images/a.png")
+        self.assertEqual((metadata.size, metadata.mime_type), (5, "image/png"))
+        self.assertEqual(self._reindex(), {"indexed": 0, "unchanged": 2, "removed": 0})
+
+    def test_reindexes_changed_files_and_removes_missing_ones(self):
+        self._write("images/a.png", b"first")
+        self._write("images/b.png", b"second")
+        self._reindex()
+        self._write("images/a.png", b"changed content")
+        os.unlink(os.path.join(self.directory, "images", "b.png"))
+        self.assertEqual(self._reindex(), {"indexed": 1, "unchanged": 0, "removed": 1})
+        self.assertEqual(self.catalog.get("images/a.png").size, 15)
+        self.assertIsNone(self.catalog.get("images/b.png"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from storage.metadata_catalog import SQLiteMetadataCatalog
+from storage.metadata_index import FileMetadata, encode_cursor
+
+
+class TestSQLiteMetadataCatalog(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.catalog = SQLiteMetadataCatalog(os.path.join(self.directory, "c.sqlite3"))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_put_and_get_by_path(self):
+        metadata = FileMetadata(
+            path="images/a.png",
+            sha256="ab" * 32,
+            size=10,
+            mtime=1700000000.123456,
+            mime_type="image/png",
+            validator="image",
+            verdict="valid",
+            uploaded_at=1700000001.0,
+        )
+        self.catalog.put(metadata)
+        self.assertEqual(self.catalog.get("images/a.png"), metadata)
+        self.assertIsNone(self.catalog.get("images/missing.png"))
+
+    def test_put_replaces_existing_record(self):
+        self.catalog.put(FileMetadata("images/a.png", "aa", 1, 1.0))
+        self.catalog.put(FileMetadata("images/a.png", "bb", 2, 2.0))
+        self.assertEqual(self.catalog.get("images/a.png").sha256, "bb")
+
+    def test_get_by_hash(self):
+        self.catalog.put(FileMetadata("images/a.png", "aa", 1, 1.0))
+        self.catalog.put(FileMetadata("files/b.png", "aa", 1, 1.0))
+        self.catalog.put(FileMetadata("files/c.png", "cc", 1, 1.0))
+        paths = {m.path for m in self.catalog.get_by_hash("aa")}
+        self.assertEqual(paths, {"images/a.png", "files/b.png"})
+
+    def test_delete(self):
+        self.catalog.put(FileMetadata("images/a.png", "aa", 1, 1.0))
+        self.catalog.delete("images/a.png")
+        self.assertIsNone(self.catalog.get("images/a.png"))
+
+
+class TestSQLiteMetadataCatalogListing(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.catalog = SQLiteMetadataCatalog(os.path.join(self.directory, "c.sqlite3"))
+        for i in range(7):
+            self.catalog.put(
+                FileMetadata(
+                    f"images/img{i}.png", "aa", size=100 - i, mtime=float(i % 3)
+                )
+            )
+        self.catalog.put(FileMetadata("images/logo.png", "aa", size=1, mtime=9.0))
+        self.catalog.put(FileMetadata("files/img9.png", "aa", size=1, mtime=9.0))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _all_pages(self, **kwargs):
+        paths, cursor = [], None
+        while True:
+            page = self.catalog.list_files("images", limit=3, cursor=cursor, **kwargs)
+            paths.extend(m.path for m in page.items)
+            if page.next_cursor is None:
+                return paths
+            cursor = page.next_cursor
+
+    def test_paginates_by_name_with_prefix(self):
+        paths = self._all_pages(prefix="img")
+        self.assertEqual(paths, [f"images/img{i}.png" for i in range(7)])
+
+    def test_paginates_by_mtime_descending(self):
+        paths = self._all_pages(prefix="img", sort="mtime", descending=True)
+        expected = sorted(
+            (f"images/img{i}.png" for i in range(7)),
+            key=lambda p: (int(p[10]) % 3, p),
+            reverse=True,
+        )
+        self.assertEqual(paths, expected)
+
+    def test_paginates_by_size(self):
+        paths = self._all_pages(sort="size")
+        self.assertEqual(paths[0], "images/logo.png")
+        self.assertEqual(len(paths), 8)
+
+    def test_rejects_invalid_cursor(self):
+        with self.assertRaises(ValueError):
+            self.catalog.list_files("images", cursor="not-a-cursor")
+
+    def test_rejects_cursor_values_not_matching_the_sort_key(self):
+        for sort, value in (("size", [1, 2]), ("mtime", "1"), ("name", 1)):
+            cursor = encode_cursor((value, "images/img1.png"))
+            with self.assertRaises(ValueError):
+                self.catalog.list_files("images", sort=sort, cursor=cursor)
@@ -0,0 +1,478 @@
+import gzip
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+
+import flask
+import pytest
+from pypdf import PdfWriter
+
+from app import create_app
+from config.validation_config import FileValidationConfig
+from storage.metadata_index import FileMetadata, encode_cursor
+
+
+@pytest.fixture(scope="function")
+def stored_file(media_files_destination):
+    directory = os.path.join(media_files_destination, "images")
+    os.makedirs(directory, exist_ok=True)
+    file_path = os.path.join(directory, "stream.bin")
+    content = os.urandom(200 * 1024)
+    with open(file_path, "wb") as f:
+        f.write(content)
+    yield "images/stream.bin", content
+    os.unlink(file_path)
+
+
+def test_get_streams_file_content(client, stored_file):
+    url_path, content = stored_file
+    response = client.get(f"/media/{url_path}")
+    assert response.status_code == 200
+    assert response.content_length == len(content)
+    assert response.is_streamed
+    assert response.data == content
+
+
+def test_requests_share_the_app_file_handler(app):
+    handlers = []
+    for _ in range(2):
+        with app.test_request_context("/media/images/missing.bin"):
+            app.preprocess_request()
+            handlers.append(flask.g.file_handler)
+    assert handlers == [app.extensions["media_file_handler"]] * 2
+
+
+def test_get_missing_file_returns_404(client):
+    response = client.get("/media/images/missing.bin")
+    assert response.status_code == 404
+    assert response.json["error"] == "File not found"
+
+
+def test_get_rejects_path_traversal(client):
+    response = client.get("/media/images/..%2F..%2Fetc%2Fpasswd")
+    assert response.status_code == 404
+
+
+def test_get_single_range(client, stored_file):
+    url_path, content = stored_file
+    response = client.get(f"/media/{url_path}", headers={"Range": "bytes=100-199"})
+    assert response.status_code == 206
+    assert response.headers["Content-Range"] == f"bytes 100-199/{len(content)}"
+    assert response.data == content[100:200]
+
+
+def test_get_suffix_range(client, stored_file):
+    url_path, content = stored_file
+    response = client.get(f"/media/{url_path}", headers={"Range": "bytes=-10"})
+    assert response.status_code == 206
+    assert response.data == content[-10:]
+
+
+def test_get_multiple_ranges(client, stored_file):
+    url_path, content = stored_file
+    response = client.get(
+        f"/media/{url_path}", headers={"Range": "bytes=0-9,1000-1009"}
+    )
+    assert response.status_code == 206
+    assert response.mimetype == "multipart/byteranges"
+    assert response.content_length == len(response.data)
+    assert content[0:10] in response.data
+    assert content[1000:1010] in response.data
+    assert f"Content-Range: bytes 1000-1009/{len(content)}".encode() in response.data
+
+
+def test_get_unsatisfiable_range(client, stored_file):
+    url_path, content = stored_file
+    response = client.get(
+        f"/media/{url_path}", headers={"Range": f"bytes={len(content)}-"}
+    )
+    assert response.status_code == 416
+    assert response.headers["Content-Range"] == f"bytes */{len(content)}"
+
+
+def test_get_stale_if_range_sends_full_file(client, stored_file):
+    url_path, content = stored_file
+    response = client.get(
+        f"/media/{url_path}",
+        headers={"Range": "bytes=0-9", "If-Range": "Wed, 21 Oct 2015 07:28:00 GMT"},
+    )
+    assert response.status_code == 200
+    assert response.data == content
+
+
+def test_get_sets_strong_etag_from_content_hash(client, stored_file):
+    url_path, content = stored_file
+    response = client.get(f"/media/{url_path}")
+    assert response.headers["ETag"] == f'"{hashlib.sha256(content).hexdigest()}"'
+    assert "Last-Modified" in response.headers
+
+
+def test_get_if_none_match_returns_304(client, stored_file):
+    url_path, content = stored_file
+    etag = client.get(f"/media/{url_path}").headers["ETag"]
+    response = client.get(f"/media/{url_path}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.data == b""
+    assert response.headers["ETag"] == etag
+
+
+def test_get_if_modified_since_returns_304(client, stored_file):
+    url_path, content = stored_file
+    last_modified = client.get(f"/media/{url_path}").headers["Last-Modified"]
+    response = client.get(
+        f"/media/{url_path}", headers={"If-Modified-Since": last_modified}
+    )
+    assert response.status_code == 304
+
+
+def test_get_rehashes_modified_file(client, stored_file, media_files_destination):
+    url_path, content = stored_file
+    etag = client.get(f"/media/{url_path}").headers["ETag"]
+    new_content = b"changed" + content
+    with open(os.path.join(media_files_destination, url_path), "wb") as f:
+        f.write(new_content)
+    response = client.get(f"/media/{url_path}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] == f'"{hashlib.sha256(new_content).hexdigest()}"'
+
+
+def test_get_if_range_with_current_etag_honours_range(client, stored_file):
+    url_path, content = stored_file
+    etag = client.get(f"/media/{url_path}").headers["ETag"]
+    response = client.get(
+        f"/media/{url_path}", headers={"Range": "bytes=0-9", "If-Range": etag}
+    )
+    assert response.status_code == 206
+    assert response.data == content[:10]
+
+
+def test_get_outside_allowed_directories_returns_404(client):
+    response = client.get("/media/.catalog.sqlite3")
+    assert response.status_code == 404
+
+
+def test_get_serves_content_type_from_catalog(client, media_files_destination):
+    file_path = os.path.join(media_files_destination, "images", "logo.png")
+    with open(file_path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+    try:
+        response = client.get("/media/images/logo.png")
+        assert response.mimetype == "image/png"
+    finally:
+        os.unlink(file_path)
+
+
+def test_head_returns_headers_without_body(client, stored_file):
+    url_path, content = stored_file
+    response = client.head(f"/media/{url_path}")
+    assert response.status_code == 200
+    assert response.content_length == len(content)
+    assert response.headers["ETag"] == f'"{hashlib.sha256(content).hexdigest()}"'
+    assert response.data == b""
+
+
+@pytest.fixture(scope="function")
+def stored_text_file(media_files_destination):
+    file_path = os.path.join(media_files_destination, "files", "notes.txt")
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    content = b"media proxy compresses text well. " * 200
+    with open(file_path, "wb") as f:
+        f.write(content)
+    yield "files/notes.txt", content
+    os.unlink(file_path)
+
+
+def test_get_serves_gzip_variant_when_accepted(client, stored_text_file):
+    url_path, content = stored_text_file
+    response = client.get(f"/media/{url_path}", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.content_encoding == "gzip"
+    assert "Accept-Encoding" in response.vary
+    assert response.headers["ETag"].endswith('-gzip"')
+    assert len(response.data) < len(content)
+    assert gzip.decompress(response.data) == content
+
+
+def test_get_compressed_variant_supports_304(client, stored_text_file):
+    url_path, content = stored_text_file
+    headers = {"Accept-Encoding": "gzip"}
+    etag = client.get(f"/media/{url_path}", headers=headers).headers["ETag"]
+    response = client.get(
+        f"/media/{url_path}", headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+
+
+def test_head_does_not_generate_compressed_variants(
+    app, client, media_files_destination
+):
+    file_path = os.path.join(media_files_destination, "files", "head.txt")
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    content = os.urandom(16).hex().encode() * 200
+    with open(file_path, "wb") as f:
+        f.write(content)
+    variants = app.extensions["media_variant_store"]
+    sha256 = hashlib.sha256(content).hexdigest()
+    headers = {"Accept-Encoding": "gzip"}
+    try:
+        response = client.head("/media/files/head.txt", headers=headers)
+        assert response.content_encoding is None
+        assert response.content_length == len(content)
+        assert "Accept-Encoding" in response.vary
+        assert variants.variant_size(sha256, "gzip") is None
+
+        compressed = client.get("/media/files/head.txt", headers=headers).data
+        response = client.head("/media/files/head.txt", headers=headers)
+        assert response.content_encoding == "gzip"
+        assert response.content_length == len(compressed)
+        assert response.headers["ETag"].endswith('-gzip"')
+    finally:
+        os.unlink(file_path)
+        variants.discard(sha256)
+
+
+def test_get_without_accept_encoding_is_identity(client, stored_text_file):
+    url_path, content = stored_text_file
+    response = client.get(f"/media/{url_path}")
+    assert response.content_encoding is None
+    assert response.data == content
+
+
+def test_get_skips_compression_for_images(client, stored_file):
+    url_path, content = stored_file
+    response = client.get(f"/media/{url_path}", headers={"Accept-Encoding": "gzip"})
+    assert response.content_encoding is None
+    assert response.data == content
+
+
+def post_file(client, api_key, url_path, content, filename):
+    return client.post(
+        f"/media/{url_path}",
+        data={"file": (io.BytesIO(content), filename)},
+        headers={"Authorization": api_key},
+        content_type="multipart/form-data",
+    )
+
+
+@pytest.fixture(scope="function")
+def uploads(client, api_key):
+    url_paths = []
+    yield url_paths
+    for url_path in url_paths:
+        client.delete(f"/media/{url_path}", headers={"Authorization": api_key})
+
+
+@pytest.fixture(scope="function")
+def small_image_limit(monkeypatch):
+    monkeypatch.setattr(FileValidationConfig.get_config("image"), "max_file_size", 1024)
+
+
+def test_post_publishes_upload_from_staging(
+    client, api_key, uploads, valid_image_data, media_files_destination
+):
+    uploads.append("images/upload.png")
+    response = post_file(
+        client, api_key, "images/upload.png", valid_image_data, "upload.png"
+    )
+    assert response.status_code == 200
+    with open(os.path.join(media_files_destination, "images", "upload.png"), "rb") as f:
+        assert f.read() == valid_image_data
+    assert os.listdir(os.path.join(media_files_destination, ".uploads")) == []
+    response = client.get("/media/images/upload.png")
+    assert response.mimetype == "image/png"
+    assert response.data == valid_image_data
+
+
+def test_post_rejects_invalid_image(client, api_key, uploads, invalid_image_data):
+    uploads.append("images/invalid.png")
+    response = post_file(
+        client, api_key, "images/invalid.png", invalid_image_data, "invalid.png"
+    )
+    assert response.status_code == 415
+    assert client.get("/media/images/invalid.png").status_code == 404
+
+
+def test_post_rejects_declared_oversized_body(client, api_key, small_image_limit):
+    response = post_file(
+        client, api_key, "images/large.png", os.urandom(128 * 1024), "large.png"
+    )
+    assert response.status_code == 413
+    assert response.json["error"].startswith("Upload exceeds")
+
+
+def test_post_rejects_oversized_file_while_spooling(
+    client, api_key, small_image_limit, valid_image_data, media_files_destination
+):
+    content = valid_image_data + os.urandom(4096)
+    response = post_file(client, api_key, "images/large.png", content, "large.png")
+    assert response.status_code == 413
+    assert response.json["error"] == "File exceeds 1024 bytes"
+    assert os.listdir(os.path.join(media_files_destination, ".uploads")) == []
+
+
+def test_post_rejects_mislabelled_file_while_spooling(
+    client, api_key, media_files_destination
+):
+    content = b"%PDF-1.7\n" + os.urandom(4096)
+    response = post_file(client, api_key, "images/fake.png", content, "fake.png")
+    assert response.status_code == 415
+    assert response.json["error"] == "File content does not match its type"
+    assert os.listdir(os.path.join(media_files_destination, ".uploads")) == []
+
+
+def test_post_reuses_verdict_for_same_content(
+    app, client, api_key, uploads, valid_image_data, monkeypatch
+):
+    validator = app.extensions["media_file_handler"].validator_factory.validators[
+        "image"
+    ]
+    calls = []
+
+    def is_valid(upload):
+        calls.append(upload.sha256)
+        return True
+
+    monkeypatch.setattr(validator, "is_valid", is_valid)
+    content = valid_image_data + os.urandom(16)
+    for name in ("first.png", "second.png"):
+        uploads.append(f"images/{name}")
+        response = post_file(client, api_key, f"images/{name}", content, name)
+        assert response.status_code == 200
+    assert calls == [hashlib.sha256(content).hexdigest()]
+
+
+def test_post_rejects_content_of_another_image_type(client, api_key, uploads):
+    uploads.append("images/animation.png")
+    content = b"GIF89a\x01\x00\x01\x00\x00\x00\x00;"
+    response = post_file(
+        client, api_key, "images/animation.png", content, "animation.png"
+    )
+    assert response.status_code == 415
+    assert client.get("/media/images/animation.png").status_code == 404
+
+
+def test_post_removes_file_when_catalog_write_fails(
+    app, client, api_key, valid_image_data, media_files_destination, monkeypatch
+):
+    def fail(metadata):
+        raise RuntimeError("catalog unavailable")
+
+    metadata_index = app.extensions["media_file_handler"].metadata_index
+    monkeypatch.setattr(metadata_index, "put", fail)
+    response = post_file(
+        client, api_key, "images/orphan.png", valid_image_data, "orphan.png"
+    )
+    assert response.status_code == 501
+    assert not os.path.exists(
+        os.path.join(media_files_destination, "images", "orphan.png")
+    )
+    assert metadata_index.get("images/orphan.png") is None
+
+
+@pytest.fixture(scope="function")
+def precompress_app():
+    media_files_dest = tempfile.mkdtemp()
+    yield create_app(
+        {
+            "TESTING": True,
+            "MEDIA_FILES_DEST": media_files_dest,
+            "PRECOMPRESS_ON_UPLOAD": True,
+            "COMPRESSION_MIN_SIZE": 0,
+        }
+    )
+    shutil.rmtree(media_files_dest)
+
+
+def test_config_overrides_reach_the_file_handler(precompress_app, api_key):
+    handler = precompress_app.extensions["media_file_handler"]
+    assert handler.config.MEDIA_FILES_DEST == precompress_app.config["MEDIA_FILES_DEST"]
+    writer = PdfWriter()
+    writer.add_blank_page(100, 100)
+    pdf = io.BytesIO()
+    writer.write(pdf)
+    response = post_file(
+        precompress_app.test_client(),
+        api_key,
+        "files/blank.pdf",
+        pdf.getvalue(),
+        "blank.pdf",
+    )
+    assert response.status_code == 200
+    sha256 = hashlib.sha256(pdf.getvalue()).hexdigest()
+    variants = handler.variant_store
+    assert all(
+        os.path.exists(variants.variant_path(sha256, encoding))
+        for encoding in variants.encodings
+    )
+
+
+@pytest.fixture(scope="function")
+def listing_app():
+    media_files_dest = tempfile.mkdtemp()
+    app = create_app({"TESTING": True, "MEDIA_FILES_DEST": media_files_dest})
+    metadata_index = app.extensions["media_metadata_index"]
+    for i in range(5):
+        metadata_index.put(
+            FileMetadata(f"images/img{i}.png", "aa", size=10 - i, mtime=float(i))
+        )
+    metadata_index.put(FileMetadata("files/doc.pdf", "bb", size=1, mtime=1.0))
+    yield app
+    shutil.rmtree(media_files_dest)
+
+
+def list_files(app, api_key, **params):
+    return app.test_client().get(
+        "/media", query_string=params, headers={"Authorization": api_key}
+    )
+
+
+def test_list_requires_api_key(listing_app):
+    response = listing_app.test_client().get("/media?directory=images")
+    assert response.status_code == 401
+
+
+def test_list_pages_through_directory(listing_app, api_key):
+    paths, cursor = [], None
+    while True:
+        params = {"directory": "images", "sort": "size", "limit": 2}
+        if cursor is not None:
+            params["cursor"] = cursor
+        response = list_files(listing_app, api_key, **params)
+        assert response.status_code == 200
+        assert len(response.json["items"]) <= 2
+        paths.extend(item["path"] for item in response.json["items"])
+        cursor = response.json["next_cursor"]
+        if cursor is None:
+            break
+    assert paths == [f"images/img{i}.png" for i in reversed(range(5))]
+
+
+def test_list_filters_by_prefix_in_descending_order(listing_app, api_key):
+    response = list_files(
+        listing_app, api_key, directory="images", prefix="img", order="desc"
+    )
+    assert [item["path"] for item in response.json["items"]][:2] == [
+        "images/img4.png",
+        "images/img3.png",
+    ]
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"directory": "secret"},
+        {"directory": "images", "order": "up"},
+        {"directory": "images", "limit": "many"},
+        {"directory": "images", "sort": "owner"},
+        {"directory": "images", "cursor": "not-a-cursor"},
+        {
+            "directory": "images",
+            "sort": "size",
+            "cursor": encode_cursor(([1, 2], "x")),
+        },
+    ],
+)
+def test_list_rejects_invalid_parameters(listing_app, api_key, params):
+    assert list_files(listing_app, api_key, **params).status_code == 400
@@ -0,0 +1,62 @@
+import hashlib
+import io
+import shutil
+import tempfile
+import unittest
+
+from PIL import Image
+
+from utils.upload_context import UploadContext
+from utils.upload_spool import SpooledUpload
+from validators.image_validator import ImageValidator
+
+
+class TestUploadContext(unittest.TestCase):
+    def setUp(self):
+        self.staging_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.staging_dir)
+
+    def _spool(self, content):
+        upload = SpooledUpload(self.staging_dir, chunk_size=4)
+        upload.write(content)
+        return upload
+
+    def test_maps_spooled_upload_once(self):
+        with self._spool(b"0123456789") as spool:
+            upload = UploadContext(spool, "a.bin")
+            self.assertIs(upload.content, upload.content)
+            self.assertTrue(upload.content.readonly)
+            self.assertEqual(upload.size, 10)
+            self.assertEqual(upload.sha256, hashlib.sha256(b"0123456789").hexdigest())
+            upload.close()
+
+    def test_reader_seeks_within_buffer(self):
+        upload = UploadContext(io.BytesIO(b"0123456789"))
+        reader = upload.reader()
+        reader.seek(-3, io.SEEK_END)
+        self.assertEqual(reader.read(), b"789")
+        reader.seek(2)
+        self.assertEqual(reader.read(3), b"234")
+        self.assertEqual(upload.reader().read(), b"0123456789")
+        upload.close()
+
+    def test_empty_upload(self):
+        with self._spool(b"") as spool:
+            upload = UploadContext(spool)
+            self.assertEqual(upload.size, 0)
+            self.assertEqual(upload.head(10), b"")
+            upload.close()
+
+    def test_validator_reads_shared_buffer(self):
+        buffer = io.BytesIO()
+        Image.new("RGB", (10, 10), "red").save(buffer, "PNG")
+        with self._spool(buffer.getvalue()) as spool:
+            upload = UploadContext(spool, "a.png")
+            self.assertTrue(ImageValidator().is_valid(upload))
+            upload.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
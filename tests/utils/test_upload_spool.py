@@ -0,0 +1,90 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
+
+from storage.content_addressed_storage import ContentAddressedStorage
+from storage.local_storage import LocalFileSystemStorage
+from utils.upload_spool import SpooledUpload
+
+
+class TestSpooledUpload(unittest.TestCase):
+    def setUp(self):
+        self.media_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.media_dir, "images"))
+        self.staging_dir = os.path.join(self.media_dir, ".uploads")
+
+    def tearDown(self):
+        shutil.rmtree(self.media_dir)
+
+    def _spool(self, content):
+        upload = SpooledUpload(self.staging_dir, chunk_size=4)
+        upload.write(content)
+        upload.seek(0)
+        return upload
+
+    def test_unpublished_upload_is_removed_on_close(self):
+        upload = self._spool(b"content")
+        self.assertTrue(os.path.exists(upload.name))
+        upload.close()
+        self.assertEqual(os.listdir(self.staging_dir), [])
+
+    def test_oversized_upload_is_refused_while_written(self):
+        upload = SpooledUpload(self.staging_dir, chunk_size=4, max_size=8)
+        upload.write(b"01234")
+        with self.assertRaises(RequestEntityTooLarge):
+            upload.write(b"56789")
+        self.assertEqual(os.listdir(self.staging_dir), [])
+
+    def test_content_type_is_sniffed_once_enough_is_written(self):
+        upload = SpooledUpload(self.staging_dir, chunk_size=4, expected_type="image")
+        upload.write(b"GIF")
+        self.assertIsNone(upload.mime_type)
+        upload.write(b"89a" + b"\0" * 2048)
+        self.assertEqual(upload.mime_type, "image/gif")
+        upload.close()
+
+    def test_mislabelled_upload_is_refused_while_written(self):
+        upload = SpooledUpload(self.staging_dir, chunk_size=4, expected_type="image")
+        with self.assertRaises(UnsupportedMediaType):
+            upload.write(b"%PDF-1.7" + b"\0" * 2048)
+        self.assertEqual(os.listdir(self.staging_dir), [])
+
+    def test_local_storage_publishes_staged_upload(self):
+        storage = LocalFileSystemStorage(self.media_dir)
+        with self._spool(b"content") as upload:
+            staged_inode = os.stat(upload.name).st_ino
+            storage.save_stream("images/a.png", upload)
+        full_path = storage.make_full_path("images/a.png")
+        self.assertEqual(os.stat(full_path).st_ino, staged_inode)
+        self.assertEqual(storage.get_file("images/a.png"), b"content")
+        self.assertEqual(os.listdir(self.staging_dir), [])
+
+    def test_local_storage_copies_plain_streams(self):
+        storage = LocalFileSystemStorage(self.media_dir)
+        storage.save_file("images/a.png", b"old")
+        storage.save_stream("images/a.png", io.BytesIO(b"new content"))
+        self.assertEqual(storage.get_file("images/a.png"), b"new content")
+        self.assertEqual(os.listdir(os.path.join(self.media_dir, "images")), ["a.png"])
+
+    def test_content_addressed_storage_links_staged_upload_as_blob(self):
+        storage = ContentAddressedStorage(self.media_dir)
+        storage.save_file("images/a.png", b"content")
+        with self._spool(b"content") as upload:
+            storage.save_stream("images/b.png", upload)
+        with self._spool(b"other") as upload:
+            storage.save_stream("images/c.png", upload)
+        a_stat = os.stat(storage.make_full_path("images/a.png"))
+        b_stat = os.stat(storage.make_full_path("images/b.png"))
+        self.assertTrue(os.path.samestat(a_stat, b_stat))
+        self.assertEqual(a_stat.st_nlink, 3)
+        self.assertEqual(os.stat(storage.make_full_path("images/c.png")).st_nlink, 2)
+        self.assertEqual(storage.get_file("images/c.png"), b"other")
+        self.assertEqual(os.listdir(self.staging_dir), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import pickle
+import unittest
+from unittest import mock
+
+from config.validation_config import ValidationBudget
+from validators import budget
+from validators.budget import BudgetTracker, ValidationBudgetExceeded
+from validators.pipeline import Check, CheckCost, CheckMetrics, CheckPipeline
+
+
+def exceeded_resource(function, *args):
+    try:
+        function(*args)
+    except ValidationBudgetExceeded as e:
+        return e.resource
+    return None
+
+
+class TestBudgetTracker(unittest.TestCase):
+    def test_charges_apply_to_the_active_tracker_only(self):
+        budget.charge_decompressed(1 << 40)
+        budget.charge_frame()
+        with BudgetTracker(ValidationBudget(max_decompressed_bytes=10)) as tracker:
+            budget.charge_decompressed(10)
+            self.assertEqual(
+                exceeded_resource(budget.charge_decompressed, 1),
+                "max_decompressed_bytes",
+            )
+        self.assertEqual(tracker.decompressed_bytes, 11)
+        self.assertIsNone(budget.current_tracker())
+
+    def test_limits_frames(self):
+        with BudgetTracker(ValidationBudget(max_frames=2)):
+            budget.charge_frame()
+            budget.charge_frame()
+            self.assertEqual(exceeded_resource(budget.charge_frame), "max_frames")
+
+    def test_checkpoints_enforce_cpu_time_and_memory_growth(self):
+        with BudgetTracker(ValidationBudget(max_cpu_seconds=0)):
+            sum(range(100000))
+            self.assertEqual(exceeded_resource(budget.checkpoint), "max_cpu_seconds")
+        with BudgetTracker(ValidationBudget(max_memory_growth=0)):
+            allocated = bytes(64 * 1024 * 1024)
+            # Only limited in worker processes, see `enable_memory_budget`.
+            self.assertIsNone(exceeded_resource(budget.checkpoint))
+            del allocated
+        with mock.patch.object(budget, "_memory_budget_enabled", True):
+            with BudgetTracker(ValidationBudget(max_memory_growth=0)) as tracker:
+                if tracker._memory_started is None:
+                    self.skipTest("Resident memory is not available")
+                allocated = bytes(64 * 1024 * 1024)
+                self.assertEqual(
+                    exceeded_resource(budget.checkpoint), "max_memory_growth"
+                )
+                del allocated
+
+    def test_exception_survives_pickling_and_broad_handlers(self):
+        error = pickle.loads(pickle.dumps(ValidationBudgetExceeded("max_frames", 3)))
+        self.assertEqual((error.resource, error.limit), ("max_frames", 3))
+        self.assertNotIsInstance(error, Exception)
+
+
+class TestPipelineBudget(unittest.TestCase):
+    def test_budget_stops_the_pipeline_and_is_recorded(self):
+        calls = []
+
+        def run(subject):
+            calls.append(subject)
+            budget.charge_frame()
+            return True
+
+        metrics = CheckMetrics()
+        pipeline = CheckPipeline(
+            "test",
+            [
+                Check("first", CheckCost.METADATA, run),
+                Check("second", CheckCost.CONTENT, run),
+            ],
+            metrics,
+        )
+        self.assertTrue(pipeline.run("upload"))
+        with self.assertRaises(ValidationBudgetExceeded):
+            pipeline.run("upload", ValidationBudget(max_frames=1))
+        self.assertEqual(len(calls), 4)
+        stats = {entry["check"]: entry for entry in metrics.stats()["test"]}
+        self.assertEqual(stats["second"]["errors"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import struct
+import unittest
+from unittest import mock
+
+from utils.upload_context import UploadContext
+from validators.doc_validator import DOCValidator
+
+
+SECTOR_SIZE = 512
+# Streams of at least this size live in regular sectors, so no mini stream is needed.
+STREAM_SIZE = 4096
+FREE, END_OF_CHAIN, FAT_SECTOR, NO_STREAM = (
+    0xFFFFFFFF,
+    0xFFFFFFFE,
+    0xFFFFFFFD,
+    0xFFFFFFFF,
+)
+
+
+def directory_entry(
+    name, entry_type, right=NO_STREAM, child=NO_STREAM, start=0, size=0
+):
+    encoded = (name + "\0").encode("utf-16-le")
+    return struct.pack(
+        "<64sHBBIII16sIQQIQ",
+        encoded,
+        len(encoded),
+        entry_type,
+        1,
+        NO_STREAM,
+        right,
+        child,
+        b"",
+        0,
+        0,
+        0,
+        start,
+        size,
+    )
+
+
+def make_doc(streams, storages=()):
+    """
+    Builds a minimal compound file (version 3) holding the given top-level streams
+    and empty storages.
+    """
+    names = list(streams) + list(storages)
+    fat = [FAT_SECTOR, END_OF_CHAIN]
+    entries = []
+    data = b""
+    for index, name in enumerate(names, start=1):
+        right = index + 1 if index < len(names) else NO_STREAM
+        if name in streams:
+            content = streams[name].ljust(STREAM_SIZE, b"\0")
+            content += b"\0" * (-len(content) % SECTOR_SIZE)
+            start = len(fat)
+            count = len(content) // SECTOR_SIZE
+            fat += list(range(start + 1, start + count)) + [END_OF_CHAIN]
+            entries.append(
+                directory_entry(name, 2, right, start=start, size=len(content))
+            )
+            data += content
+        else:
+            entries.append(directory_entry(name, 1, right))
+    root = directory_entry(
+        "Root Entry", 5, child=1 if names else NO_STREAM, start=END_OF_CHAIN
+    )
+    directory = b"".join([root] + entries).ljust(SECTOR_SIZE, b"\0")
+    assert len(directory) == SECTOR_SIZE and len(fat) <= SECTOR_SIZE // 4
+    fat_sector = struct.pack("<128I", *(fat + [FREE] * (128 - len(fat))))
+    header = struct.pack(
+        "<8s16sHHHHH6sIIIIIIIII109I",
+        b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1",
+        b"",
+        0x3E,
+        3,
+        0xFFFE,
+        9,
+        6,
+        b"",
+        0,
+        1,
+        1,
+        0,
+        STREAM_SIZE,
+        END_OF_CHAIN,
+        0,
+        END_OF_CHAIN,
+        0,
+        0,
+        *([FREE] * 108),
+    )
+    return UploadContext.from_buffer(header + fat_sector + directory + data, "a.doc")
+
+
+class TestDOCValidator(unittest.TestCase):
+    def setUp(self):
+        self.validator = DOCValidator()
+
+    def test_accepts_plain_document(self):
+        upload = make_doc({"WordDocument": b"plain text", "1Table": b"table"})
+        self.assertTrue(self.validator.is_valid(upload))
+
+    def test_rejects_non_word_containers(self):
+        self.assertFalse(self.validator.is_valid(make_doc({"Book": b"cells"})))
+
+    def test_rejects_keywords_and_script_markers(self):
+        for text in (b"run POWERSHELL -c", b"<SCRIPT>alert(1)"):
+            upload = make_doc({"WordDocument": b"x" * 5000 + text})
+            self.assertFalse(self.validator.is_valid(upload))
+
+    def test_rejects_links_in_the_table_stream(self):
+        upload = make_doc({"WordDocument": b"text", "1Table": b"HTTPS://example.com"})
+        self.assertFalse(self.validator.is_valid(upload))
+
+    def test_rejects_macros_and_embedded_objects(self):
+        for storage in ("Macros", "ObjectPool"):
+            upload = make_doc({"WordDocument": b"text"}, storages=[storage])
+            self.assertFalse(self.validator.is_valid(upload))
+
+    def test_validates_without_touching_the_filesystem(self):
+        upload = make_doc({"WordDocument": b"plain text"})
+        with mock.patch("builtins.open", side_effect=AssertionError("file opened")):
+            with mock.patch("tempfile.NamedTemporaryFile") as temporary_file:
+                self.assertTrue(self.validator.is_valid(upload))
+        temporary_file.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
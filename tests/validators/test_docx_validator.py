@@ -0,0 +1,106 @@
+import dataclasses
+import io
+import unittest
+import zipfile
+from unittest import mock
+
+import docx
+from docx.opc.constants import RELATIONSHIP_TYPE
+
+from config.validation_config import FileValidationConfig, ValidationBudget
+from utils.upload_context import UploadContext
+from validators.budget import ValidationBudgetExceeded
+from validators.docx_validator import DOCXValidator
+
+
+def make_docx(*paragraphs, hyperlink=False, extra_parts=None):
+    document = docx.Document()
+    for runs in paragraphs:
+        paragraph = document.add_paragraph()
+        for run in [runs] if isinstance(runs, str) else runs:
+            paragraph.add_run(run)
+    if hyperlink:
+        document.part.relate_to(
+            "https://example.com", RELATIONSHIP_TYPE.HYPERLINK, is_external=True
+        )
+    buffer = io.BytesIO()
+    document.save(buffer)
+    if extra_parts:
+        with zipfile.ZipFile(buffer, "a") as package:
+            for name, content in extra_parts.items():
+                package.writestr(name, content)
+    return UploadContext.from_buffer(buffer.getvalue(), "a.docx")
+
+
+class TestDOCXValidator(unittest.TestCase):
+    def setUp(self):
+        self.validator = DOCXValidator()
+
+    def configure(self, **changes):
+        self.validator.config = dataclasses.replace(
+            FileValidationConfig.get_config("docx"), **changes
+        )
+
+    def test_accepts_plain_document_in_both_modes(self):
+        for mode in ("streaming", "document"):
+            self.configure(inspection_mode=mode)
+            self.assertTrue(self.validator.is_valid(make_docx("hello", "world")))
+
+    def test_streaming_rejects_what_document_mode_rejects(self):
+        uploads = [
+            make_docx("fine", ["call ev", "AL", " now"]),
+            make_docx(["<scr", "ipt>"]),
+            make_docx("links", hyperlink=True),
+            make_docx("macro", extra_parts={"word/vbaProject.bin": b"\0"}),
+        ]
+        for mode in ("streaming", "document"):
+            self.configure(inspection_mode=mode)
+            for upload in uploads:
+                self.assertFalse(self.validator.is_valid(upload), mode)
+
+    def test_streaming_does_not_load_the_document(self):
+        upload = make_docx("hello")
+        with mock.patch("docx.Document") as document:
+            self.assertTrue(self.validator.is_valid(upload))
+        document.assert_not_called()
+
+    def test_rejects_archives_over_the_limits(self):
+        self.configure(max_entries=3)
+        self.assertFalse(self.validator.is_valid(make_docx("hello")))
+        self.configure(max_uncompressed_size=1024)
+        self.assertFalse(self.validator.is_valid(make_docx("hello")))
+
+    def test_rejects_parts_declaring_a_doctype(self):
+        upload = make_docx("hello")
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(upload.reader()) as source, zipfile.ZipFile(
+            buffer, "w"
+        ) as target:
+            for info in source.infolist():
+                content = source.read(info)
+                if info.filename == "word/document.xml":
+                    content = content.replace(
+                        b"?>", b'?><!DOCTYPE d [<!ENTITY a "eval">]>', 1
+                    )
+                target.writestr(info, content)
+        self.assertFalse(
+            self.validator.is_valid(UploadContext.from_buffer(buffer.getvalue()))
+        )
+
+    def test_rejects_packages_without_a_main_document(self):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as package:
+            package.writestr("hello.txt", "hello")
+        self.assertFalse(
+            self.validator.is_valid(UploadContext.from_buffer(buffer.getvalue()))
+        )
+
+    def test_streamed_parts_count_against_the_budget(self):
+        upload = make_docx("x" * 100000)
+        self.configure(budget=ValidationBudget(max_decompressed_bytes=64 * 1024))
+        with self.assertRaises(ValidationBudgetExceeded):
+            self.validator.is_valid(upload)
+
+
+if __name__ == "__main__":
+    unittest.main()
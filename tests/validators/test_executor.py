@@ -0,0 +1,120 @@
+import io
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+from PIL import Image
+
+from utils.upload_context import UploadContext
+from validators import executor
+from validators.executor import PooledValidator, ValidationWorkerPool
+from validators.factory import ValidatorFactory
+
+
+def _png():
+    buffer = io.BytesIO()
+    Image.new("RGB", (10, 10), "red").save(buffer, "PNG")
+    return UploadContext.from_buffer(buffer.getvalue(), "a.png")
+
+
+class TestValidationWorkerPool(unittest.TestCase):
+    def setUp(self):
+        self.pool = ValidationWorkerPool(workers=1, timeout=30)
+
+    def tearDown(self):
+        self.pool.shutdown()
+
+    def test_returns_worker_verdicts(self):
+        validator = ValidatorFactory(self.pool).get_validator("PNG")
+        self.assertIsInstance(validator, PooledValidator)
+        self.assertTrue(validator.is_valid(_png()))
+        self.assertFalse(
+            validator.is_valid(UploadContext.from_buffer(b"not an image", "a.png"))
+        )
+
+    def test_rejects_disallowed_extensions_before_dispatch(self):
+        with self.assertRaises(ValueError):
+            ValidatorFactory(self.pool).get_validator("exe")
+
+    def test_kills_and_replaces_worker_on_timeout(self):
+        self.pool._start()
+        worker = self.pool._all[0]
+        self.pool.timeout = 0
+        self.assertFalse(self.pool.validate("image", _png()))
+        self.pool.timeout = 30
+        self.assertTrue(self.pool.validate("image", _png()))
+        self.assertIsNotNone(worker.process.poll())
+        self.assertIsNot(self.pool._all[0], worker)
+
+    def test_rejects_upload_when_no_worker_becomes_idle(self):
+        self.pool._start()
+        busy = self.pool._idle.get()
+        self.pool.timeout = 0.1
+        try:
+            self.assertFalse(self.pool.validate("image", _png()))
+        finally:
+            self.pool._release(busy)
+
+    def test_replaces_worker_off_the_calling_thread(self):
+        self.pool._start()
+        spawned_by = []
+        spawn = self.pool._spawn
+
+        def record_spawn():
+            spawned_by.append(threading.current_thread())
+            return spawn()
+
+        self.pool._spawn = record_spawn
+        self.pool.timeout = 0
+        self.assertFalse(self.pool.validate("image", _png()))
+        self.pool.timeout = 30
+        self.assertTrue(self.pool.validate("image", _png()))
+        self.assertEqual(len(spawned_by), 1)
+        self.assertIsNot(spawned_by[0], threading.current_thread())
+
+    def test_runs_workers_with_the_configured_interpreter(self):
+        with tempfile.TemporaryDirectory() as directory:
+            python = os.path.join(directory, "python")
+            os.symlink(sys.executable, python)
+            pool = ValidationWorkerPool(workers=1, timeout=30, executable=python)
+            try:
+                self.assertTrue(pool.validate("image", _png()))
+                self.assertEqual(pool._all[0].process.args[0], python)
+            finally:
+                pool.shutdown()
+
+    def test_starts_workers_on_first_use(self):
+        self.assertEqual(self.pool._all, [])
+        self.assertTrue(self.pool.validate("image", _png()))
+        self.assertEqual(len(self.pool._all), 1)
+
+    @unittest.skipUnless(hasattr(os, "fork"), "requires os.fork")
+    def test_forked_child_starts_its_own_workers(self):
+        self.assertTrue(self.pool.validate("image", _png()))
+        parent_worker_pid = self.pool._all[0].process.pid
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                inherited = len(self.pool._all)
+                verdict = self.pool.validate("image", _png())
+                child_worker_pid = self.pool._all[0].process.pid
+                # What the child's exit handler runs.
+                executor._shutdown_pools()
+                os.write(write_fd, f"{inherited} {verdict} {child_worker_pid}".encode())
+            finally:
+                os._exit(0)
+        os.close(write_fd)
+        with os.fdopen(read_fd) as result:
+            inherited, verdict, child_worker_pid = result.read().split()
+        os.waitpid(pid, 0)
+        self.assertEqual((inherited, verdict), ("0", "True"))
+        self.assertNotEqual(int(child_worker_pid), parent_worker_pid)
+        self.assertIsNone(self.pool._all[0].process.poll())
+        self.assertTrue(self.pool.validate("image", _png()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import dataclasses
+import io
+import struct
+import unittest
+import zlib
+from unittest import mock
+
+from PIL import Image
+
+from config.validation_config import ValidationBudget
+from utils.upload_context import UploadContext
+from validators.budget import ValidationBudgetExceeded
+from validators.image_headers import read_dimensions
+from validators.image_validator import ImageValidator
+
+
+def png_chunk(chunk_type, data):
+    return (
+        struct.pack(">I", len(data))
+        + chunk_type
+        + data
+        + struct.pack(">I", zlib.crc32(chunk_type + data))
+    )
+
+
+def make_image(image_format, size=(4, 4), **params):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, "red").save(buffer, image_format, **params)
+    return buffer.getvalue()
+
+
+def png_header(width, height, *extra_chunks):
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + png_chunk(b"IHDR", ihdr) + b"".join(extra_chunks)
+
+
+class TestReadDimensions(unittest.TestCase):
+    def test_reads_headers_of_each_format(self):
+        for image_format in ("PNG", "JPEG", "GIF"):
+            content = memoryview(make_image(image_format, (123, 45)))
+            self.assertEqual(read_dimensions(content), (123, 45), image_format)
+
+    def test_returns_none_for_unknown_or_truncated_headers(self):
+        self.assertIsNone(read_dimensions(memoryview(b"not an image")))
+        self.assertIsNone(read_dimensions(memoryview(b"\x89PNG\r\n\x1a\n\0\0")))
+        self.assertIsNone(read_dimensions(memoryview(b"\xff\xd8\xff\xe0\0")))
+
+
+class TestImageValidator(unittest.TestCase):
+    def setUp(self):
+        self.validator = ImageValidator()
+
+    def test_accepts_small_images(self):
+        for image_format in ("PNG", "JPEG", "GIF"):
+            upload = UploadContext.from_buffer(make_image(image_format))
+            self.assertTrue(self.validator.is_valid(upload), image_format)
+
+    def test_rejects_oversized_headers_without_decoding(self):
+        jpeg = bytearray(make_image("JPEG"))
+        sof = jpeg.index(b"\xff\xc0")
+        jpeg[sof + 5 : sof + 9] = struct.pack(">HH", 30000, 30000)
+        gif = bytearray(make_image("GIF"))
+        gif[6:10] = struct.pack("<HH", 30000, 30000)
+        for content in (png_header(30000, 30000), bytes(jpeg), bytes(gif)):
+            with mock.patch("validators.image_validator.Image.open") as image_open:
+                self.assertFalse(
+                    self.validator.is_valid(UploadContext.from_buffer(content))
+                )
+            image_open.assert_not_called()
+
+    def test_rejects_pixel_counts_over_the_limit(self):
+        upload = UploadContext.from_buffer(png_header(8000, 8001))
+        self.assertFalse(self.validator.is_valid(upload))
+
+    def test_rejects_png_chunks_outside_the_allowlist(self):
+        png = make_image("PNG")
+        iend = png.rindex(b"IEND") - 4
+        content = png[:iend] + png_chunk(b"evIL", b"payload") + png[iend:]
+        self.assertFalse(self.validator.is_valid(UploadContext.from_buffer(content)))
+
+    def test_accepts_registered_ancillary_png_chunks(self):
+        exif = Image.Exif()
+        exif[0x010E] = "description"
+        frames = [Image.new("RGB", (4, 4), color) for color in ("red", "blue")]
+        animated = io.BytesIO()
+        frames[0].save(animated, "PNG", save_all=True, append_images=frames[1:])
+        png = make_image("PNG")
+        idat = png.index(b"IDAT") - 4
+        idot = png[:idat] + png_chunk(b"iDOT", bytes(28)) + png[idat:]
+        for content in (make_image("PNG", exif=exif), animated.getvalue(), idot):
+            self.assertTrue(self.validator.is_valid(UploadContext.from_buffer(content)))
+
+    def test_searches_only_jpeg_metadata_segments(self):
+        upload = UploadContext.from_buffer(
+            make_image("JPEG", comment=b"comment: taken with a camera")
+        )
+        self.assertTrue(self.validator.is_valid(upload))
+        for comment in (b"<script>alert(1)</script>", b"<?PHP system($_GET[0]);"):
+            upload = UploadContext.from_buffer(make_image("JPEG", comment=comment))
+            self.assertFalse(self.validator.is_valid(upload), comment)
+        # Markers in scan data are image data, not metadata.
+        jpeg = make_image("JPEG")
+        upload = UploadContext.from_buffer(jpeg[:-2] + b"<script>" + jpeg[-2:])
+        self.assertTrue(self.validator.is_valid(upload))
+
+    def test_searches_gif_extensions_and_trailing_data(self):
+        upload = UploadContext.from_buffer(
+            make_image("GIF", comment=b"a harmless comment")
+        )
+        self.assertTrue(self.validator.is_valid(upload))
+        for content in (
+            # Split across the 255-byte data sub-blocks.
+            make_image("GIF", comment=b"x" * 253 + b"<svg onload=alert(1)>"),
+            make_image("GIF") + b"<script>alert(1)</script>",
+        ):
+            upload = UploadContext.from_buffer(content)
+            self.assertFalse(self.validator.is_valid(upload))
+
+    def test_frames_count_against_the_budget(self):
+        buffer = io.BytesIO()
+        frames = [Image.new("RGB", (4, 4), color) for color in ("red", "green", "blue")]
+        frames[0].save(buffer, "GIF", save_all=True, append_images=frames[1:])
+        upload = UploadContext.from_buffer(buffer.getvalue())
+        self.assertTrue(self.validator.is_valid(upload))
+        self.validator.config = dataclasses.replace(
+            self.validator.config, budget=ValidationBudget(max_frames=2)
+        )
+        with self.assertRaises(ValidationBudgetExceeded):
+            self.validator.is_valid(upload)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+
+from validators.keyword_matcher import KeywordMatcher
+
+
+class TestKeywordMatcher(unittest.TestCase):
+    def test_matches_case_insensitively_over_str_and_bytes(self):
+        matcher = KeywordMatcher(["eval", b"os."])
+        self.assertEqual(matcher.search("call EVAL now"), "EVAL")
+        self.assertEqual(matcher.search(b"import OS.path"), "OS.")
+        self.assertEqual(matcher.search(memoryview(b"x = Eval(y)")), "Eval")
+        self.assertIsNone(matcher.search("ev al"))
+
+    def test_prefers_longest_keyword_at_a_position(self):
+        matcher = KeywordMatcher(["data:", "data:>"])
+        self.assertEqual(matcher.search("a data:> b"), "data:>")
+
+    def test_finds_matches_across_chunk_boundaries(self):
+        matcher = KeywordMatcher(["powershell"])
+        self.assertEqual(
+            matcher.search_chunks(["run power", "sh", "ell -c"]), "powershell"
+        )
+        self.assertEqual(
+            matcher.search_chunks([b"POWER", memoryview(b"SHELL")]), "POWERSHELL"
+        )
+        self.assertIsNone(matcher.search_chunks(["power", " shell"]))
+
+    def test_empty_keyword_list_never_matches(self):
+        self.assertIsNone(KeywordMatcher([]).search("anything"))
+        self.assertIsNone(KeywordMatcher([]).search_chunks([b"a", b"b"]))
+
+    def test_for_keywords_reuses_compiled_matchers(self):
+        self.assertIs(
+            KeywordMatcher.for_keywords(["a", "b"]),
+            KeywordMatcher.for_keywords(("a", "b")),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
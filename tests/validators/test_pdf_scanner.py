@@ -0,0 +1,86 @@
+import unittest
+import zlib
+
+from validators.pdf_scanner import scan_pdf
+
+
+NAMES = ["/JavaScript", "/JS", "/EmbeddedFiles", "/Launch", "/URI"]
+MAX_SIZE = 1024 * 1024
+
+
+def make_stream(dictionary, data):
+    return (
+        b"5 0 obj\n<< "
+        + dictionary
+        + b" /Length %d >>\nstream\n" % len(data)
+        + data
+        + b"\nendstream\nendobj\n"
+    )
+
+
+def make_document(*objects):
+    return b"%PDF-1.7\n" + b"".join(objects) + b"trailer\n<< /Root 1 0 R >>\n%%EOF\n"
+
+
+class TestScanPDF(unittest.TestCase):
+    def test_finds_names_in_object_dictionaries(self):
+        data = make_document(
+            b"1 0 obj\n<< /Type /Catalog /OpenAction << /S /JavaScript /JS (x) >> >>\nendobj\n"
+        )
+        result = scan_pdf(data, NAMES, MAX_SIZE)
+        self.assertEqual(result.names, {"/JavaScript", "/JS"})
+
+    def test_decodes_escaped_names_and_respects_token_ends(self):
+        data = make_document(
+            b"1 0 obj\n<< /J#61vaScript 1 /JSON 2 /URIs 3 >>\nendobj\n"
+        )
+        self.assertEqual(scan_pdf(data, NAMES, MAX_SIZE).names, {"/JavaScript"})
+
+    def test_accepts_memoryview(self):
+        data = make_document(b"1 0 obj\n<</Launch<<>>>>\nendobj\n")
+        self.assertEqual(scan_pdf(memoryview(data), NAMES, MAX_SIZE).names, {"/Launch"})
+
+    def test_skips_content_streams(self):
+        data = make_document(make_stream(b"", b"BT (/JS /URI) Tj ET"))
+        self.assertEqual(scan_pdf(data, NAMES, MAX_SIZE).names, set())
+
+    def test_stream_keywords_in_strings_and_comments_do_not_start_streams(self):
+        for hiding_place in (b"(>>stream\n)", b"<3e3e>\n% >>stream\n"):
+            data = make_document(
+                b"1 0 obj << /Type /Catalog /Pages 2 0 R /Dummy "
+                + hiding_place
+                + b" /OpenAction << /S /JavaScript /JS (app.alert(1)) >> "
+                b"/Dummy2 (endstream) >>\nendobj\n"
+            )
+            result = scan_pdf(data, NAMES, MAX_SIZE)
+            self.assertEqual(result.names, {"/JavaScript", "/JS"})
+
+    def test_skips_stream_data_by_direct_length(self):
+        data = make_document(
+            make_stream(b"", b"(endstream /JS)"),
+            b"6 0 obj\n<< /URI (x) >>\nendobj\n",
+        )
+        self.assertEqual(scan_pdf(data, NAMES, MAX_SIZE).names, {"/URI"})
+
+    def test_inflates_object_streams(self):
+        objects = b"1 0 << /Type /Catalog /Names << /EmbeddedFiles 2 0 R >> >>"
+        data = make_document(
+            make_stream(
+                b"/Type /ObjStm /N 1 /First 4 /Filter /FlateDecode",
+                zlib.compress(objects),
+            )
+        )
+        self.assertEqual(scan_pdf(data, NAMES, MAX_SIZE).names, {"/EmbeddedFiles"})
+
+    def test_skips_object_streams_it_cannot_inflate(self):
+        objects = b"1 0 << /OpenAction << /S /JavaScript >> >>" + b" " * 4096
+        oversized = make_stream(
+            b"/Type /ObjStm /Filter /FlateDecode", zlib.compress(objects)
+        )
+        other_filter = make_stream(b"/Type /ObjStm /Filter /LZWDecode", b"\x80\x0b")
+        for data in (oversized, other_filter):
+            self.assertEqual(scan_pdf(make_document(data), NAMES, 1024).names, set())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import dataclasses
+import io
+import unittest
+from unittest import mock
+
+from pypdf import PageObject, PdfWriter
+from pypdf.generic import (
+    DecodedStreamObject,
+    DictionaryObject,
+    NameObject,
+    TextStringObject,
+)
+
+from config.validation_config import FileValidationConfig
+from utils.upload_context import UploadContext
+from validators.pdf_scanner import PDFScanResult
+from validators.pdf_validator import PDFValidator
+
+
+def make_pdf(page_texts, page_extras=None):
+    writer = PdfWriter()
+    font = DictionaryObject(
+        {
+            NameObject("/Type"): NameObject("/Font"),
+            NameObject("/Subtype"): NameObject("/Type1"),
+            NameObject("/BaseFont"): NameObject("/Helvetica"),
+        }
+    )
+    for index, text in enumerate(page_texts):
+        page = writer.add_blank_page(300, 300)
+        page[NameObject("/Resources")] = DictionaryObject(
+            {NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})}
+        )
+        stream = DecodedStreamObject()
+        stream.set_data(f"BT /F1 12 Tf 20 150 Td ({text}) Tj ET".encode())
+        page[NameObject("/Contents")] = writer._add_object(stream)
+        for key, value in (page_extras or {}).get(index, {}).items():
+            page[NameObject(key)] = TextStringObject(value)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return UploadContext.from_buffer(buffer.getvalue(), "a.pdf")
+
+
+class TestPDFValidator(unittest.TestCase):
+    def setUp(self):
+        self.validator = PDFValidator()
+
+    def test_accepts_plain_document(self):
+        self.assertTrue(self.validator.is_valid(make_pdf(["hello", "world"])))
+
+    def test_rejects_javascript_on_any_page(self):
+        upload = make_pdf(["one", "two", "three"], {2: {"/JS": "app.alert(1)"}})
+        self.assertFalse(self.validator.is_valid(upload))
+
+    def test_rejects_document_level_actions_before_parsing(self):
+        upload = UploadContext.from_buffer(
+            b"%PDF-1.7\n1 0 obj\n<< /Type /Catalog /OpenAction "
+            b"<< /S /Launch /F (cmd.exe) >> >>\nendobj\n",
+            "a.pdf",
+        )
+        with mock.patch("validators.pdf_validator.PdfReader") as pdf_reader:
+            self.assertFalse(self.validator.is_valid(upload))
+        pdf_reader.assert_not_called()
+
+    def test_rejects_actions_after_a_stream_keyword_in_a_string(self):
+        upload = UploadContext.from_buffer(
+            b"%PDF-1.7\n1 0 obj << /Type /Catalog /Pages 2 0 R /Dummy (>>stream\n) "
+            b"/OpenAction << /S /JavaScript /JS (app.alert(1)) >> "
+            b"/Dummy2 (endstream) >>\nendobj\n",
+            "a.pdf",
+        )
+        with mock.patch("validators.pdf_validator.PdfReader") as pdf_reader:
+            self.assertFalse(self.validator.is_valid(upload))
+        pdf_reader.assert_not_called()
+
+    def test_runs_pypdf_checks_after_a_clean_scan(self):
+        upload = make_pdf(["one", "two"], {1: {"/JS": "app.alert(1)"}})
+        with mock.patch(
+            "validators.pdf_validator.scan_pdf", return_value=PDFScanResult()
+        ):
+            self.assertFalse(self.validator.is_valid(upload))
+
+    def test_rejects_keywords_and_links(self):
+        self.assertFalse(self.validator.is_valid(make_pdf(["fine", "call eval now"])))
+        self.assertFalse(self.validator.is_valid(make_pdf(["import OS.path"])))
+        self.assertFalse(self.validator.is_valid(make_pdf(["see www.example.com"])))
+        self.assertFalse(self.validator.is_valid(make_pdf(["see HTTPS://EXAMPLE.COM"])))
+
+    def test_extracts_each_page_once_and_stops_early(self):
+        upload = make_pdf(["clean", "run exec", "clean", "clean"])
+        original = PageObject.extract_text
+        with mock.patch.object(
+            PageObject, "extract_text", autospec=True, side_effect=original
+        ) as extract_text:
+            self.assertFalse(self.validator.is_valid(upload))
+        self.assertEqual(extract_text.call_count, 2)
+
+    def test_rejects_documents_over_max_pages_before_extracting(self):
+        self.validator.config = dataclasses.replace(
+            FileValidationConfig.get_config("pdf"), max_pages=2
+        )
+        with mock.patch.object(PageObject, "extract_text") as extract_text:
+            self.assertFalse(self.validator.is_valid(make_pdf(["a", "b", "c"])))
+        extract_text.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
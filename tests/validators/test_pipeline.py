@@ -0,0 +1,80 @@
+import unittest
+
+from validators.pipeline import Check, CheckCost, CheckMetrics, CheckPipeline
+
+
+class TestCheckPipeline(unittest.TestCase):
+    def setUp(self):
+        self.metrics = CheckMetrics()
+        self.calls = []
+
+    def check(self, name, cost, result=True):
+        def run(subject):
+            self.calls.append(name)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        return Check(name, cost, run)
+
+    def test_runs_cheapest_first_keeping_declared_order(self):
+        pipeline = CheckPipeline(
+            "test",
+            [
+                self.check("decode", CheckCost.CONTENT),
+                self.check("walk", CheckCost.STRUCTURE),
+                self.check("size", CheckCost.METADATA),
+                self.check("header", CheckCost.METADATA),
+            ],
+            self.metrics,
+        )
+        self.assertTrue(pipeline.run(object()))
+        self.assertEqual(self.calls, ["size", "header", "walk", "decode"])
+
+    def test_stops_at_the_first_failure(self):
+        pipeline = CheckPipeline(
+            "test",
+            [
+                self.check("decode", CheckCost.CONTENT),
+                self.check("walk", CheckCost.STRUCTURE, result=False),
+            ],
+            self.metrics,
+        )
+        self.assertFalse(pipeline.run(object()))
+        self.assertEqual(self.calls, ["walk"])
+        stats = self.metrics.stats()["test"]
+        self.assertEqual([(s["check"], s["failures"]) for s in stats], [("walk", 1)])
+
+    def test_records_errors_and_reraises(self):
+        pipeline = CheckPipeline(
+            "test",
+            [self.check("walk", CheckCost.STRUCTURE, result=ValueError("bad"))],
+            self.metrics,
+        )
+        with self.assertRaises(ValueError):
+            pipeline.run(object())
+        (stats,) = self.metrics.stats()["test"]
+        self.assertEqual((stats["calls"], stats["errors"]), (1, 1))
+
+    def test_stats_order_checks_by_total_time(self):
+        self.metrics.record("pdf", "size", True, 0.001)
+        self.metrics.record("pdf", "pages", True, 0.5)
+        self.metrics.record("pdf", "pages", False, 0.3)
+        pages, size = self.metrics.stats()["pdf"]
+        self.assertEqual((pages["check"], size["check"]), ("pages", "size"))
+        self.assertEqual(pages["mean_ms"], 400.0)
+        self.assertEqual(pages["max_ms"], 500.0)
+
+    def test_merges_drained_counters(self):
+        worker = CheckMetrics()
+        worker.record("pdf", "pages", False, 0.5)
+        self.metrics.record("pdf", "pages", True, 0.1)
+        self.metrics.merge(worker.drain())
+        self.assertEqual(worker.stats(), {})
+        (pages,) = self.metrics.stats()["pdf"]
+        self.assertEqual((pages["calls"], pages["failures"]), (2, 1))
+        self.assertEqual(pages["max_ms"], 500.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
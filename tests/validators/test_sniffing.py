@@ -0,0 +1,89 @@
+import unittest
+
+from config.validation_config import FileValidationConfig
+from utils.upload_context import UploadContext
+from validators.factory import ValidatorFactory
+from validators.image_validator import ImageValidator
+from validators.sniffing import (
+    DOCX_MIME_TYPE,
+    ContentTypeMismatchError,
+    content_mime_type,
+    detect_mime_type,
+    validator_type_for_mime,
+)
+
+PNG = b"\x89PNG\r\n\x1a\n...."
+
+
+class TestSniffing(unittest.TestCase):
+    def test_detects_signatures(self):
+        self.assertEqual(detect_mime_type(PNG), "image/png")
+        self.assertEqual(detect_mime_type(b"GIF89a...."), "image/gif")
+        self.assertEqual(
+            validator_type_for_mime(detect_mime_type(b"PK\x03\x04..")), "docx"
+        )
+        self.assertEqual(
+            validator_type_for_mime(
+                detect_mime_type(b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1")
+            ),
+            "doc",
+        )
+
+    def test_pdf_header_may_follow_leading_bytes(self):
+        self.assertEqual(detect_mime_type(b"\r\n%PDF-1.4"), "application/pdf")
+        self.assertNotEqual(
+            detect_mime_type(b"x" * 2048 + b"%PDF-1.4"), "application/pdf"
+        )
+
+    def test_falls_back_to_libmagic(self):
+        self.assertEqual(detect_mime_type(b"plain text\n"), "text/plain")
+        self.assertIsNone(validator_type_for_mime("text/plain"))
+
+
+class TestContentRouting(unittest.TestCase):
+    def test_extension_lookup_is_case_insensitive(self):
+        self.assertEqual(FileValidationConfig.get_validator_type("JPG"), "image")
+        self.assertEqual(FileValidationConfig.get_validator_type("exe"), "unknown")
+        self.assertFalse(FileValidationConfig.is_extension_allowed("exe"))
+
+    def test_routes_by_content_and_records_mime_type(self):
+        upload = UploadContext.from_buffer(PNG, "a.PNG")
+        validator = ValidatorFactory().get_validator("PNG", upload)
+        self.assertIsInstance(validator, ImageValidator)
+        self.assertEqual(upload.mime_type, "image/png")
+
+    def test_rejects_other_type_of_the_same_validator(self):
+        upload = UploadContext.from_buffer(b"GIF89a....", "a.png")
+        with self.assertRaises(ContentTypeMismatchError):
+            ValidatorFactory().get_validator("png", upload)
+        self.assertEqual(upload.mime_type, "image/gif")
+
+    def test_containers_match_their_document_type(self):
+        self.assertEqual(content_mime_type("application/zip"), DOCX_MIME_TYPE)
+        self.assertEqual(
+            content_mime_type("application/x-ole-storage"), "application/msword"
+        )
+        self.assertEqual(content_mime_type("image/png"), "image/png")
+
+    def test_rejects_content_not_matching_extension(self):
+        upload = UploadContext.from_buffer(b"%PDF-1.7\n", "a.png")
+        with self.assertRaises(ContentTypeMismatchError):
+            ValidatorFactory().get_validator("png", upload)
+
+    def test_rejects_disallowed_extension(self):
+        with self.assertRaises(ValueError):
+            ValidatorFactory().get_validator("exe", UploadContext.from_buffer(PNG))
+
+    def test_shares_one_validator_per_type(self):
+        factory = ValidatorFactory()
+        validators = {
+            id(factory.get_validator(extension))
+            for extension in ("png", "JPG", "jpeg", "gif")
+        }
+        self.assertEqual(validators, {id(factory.validators["image"])})
+        with self.assertRaises(TypeError):
+            FileValidationConfig.EXTENSION_TYPES["exe"] = "image"
+
+
+if __name__ == "__main__":
+    unittest.main()
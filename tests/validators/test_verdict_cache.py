@@ -0,0 +1,104 @@
+import dataclasses
+import os
+import shutil
+import tempfile
+import unittest
+
+from flask import Flask
+
+from config.app_config import AppConfig
+from config.validation_config import ImageValidationConfig
+from interfaces.validation_interface import IFileValidator
+from storage.local_storage import LocalFileSystemStorage
+from utils.file_route_handler import FileRouteHandler
+from utils.upload_context import UploadContext
+from validators.budget import ValidationBudgetExceeded
+from validators.verdict_cache import VerdictCache, config_fingerprint
+
+
+class CountingValidator(IFileValidator):
+    def __init__(self, verdict):
+        self.verdict = verdict
+        self.calls = 0
+
+    def is_valid(self, upload):
+        self.calls += 1
+        if isinstance(self.verdict, BaseException):
+            raise self.verdict
+        return self.verdict
+
+
+class TestVerdictCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_fingerprint_follows_config_changes(self):
+        config = ImageValidationConfig()
+        self.assertEqual(
+            config_fingerprint(config), config_fingerprint(ImageValidationConfig())
+        )
+        changed = dataclasses.replace(config, max_dimensions=(100, 100))
+        self.assertNotEqual(config_fingerprint(config), config_fingerprint(changed))
+
+    def test_evicts_least_recently_used(self):
+        cache = VerdictCache(max_entries=2)
+        cache.put("a", "fp", True)
+        cache.put("b", "fp", True)
+        cache.get("a", "fp")
+        cache.put("c", "fp", True)
+        self.assertIsNone(cache.get("b", "fp"))
+        self.assertTrue(cache.get("a", "fp"))
+        self.assertIsNone(cache.get("a", "other-fp"))
+
+    def test_persists_verdicts(self):
+        db_path = os.path.join(self.temp_dir, "verdicts.sqlite3")
+        VerdictCache(max_entries=10, db_path=db_path).put("a", "fp", True)
+        self.assertTrue(VerdictCache(max_entries=10, db_path=db_path).get("a", "fp"))
+
+    def test_handler_skips_validator_for_known_content(self):
+        handler = FileRouteHandler(
+            AppConfig(),
+            storage_strategy=LocalFileSystemStorage(self.temp_dir),
+            verdict_cache=VerdictCache(max_entries=10),
+        )
+        validator = CountingValidator(True)
+        for _ in range(2):
+            upload = UploadContext.from_buffer(b"content", "a.png")
+            self.assertIsNone(handler._validate(validator, "png", upload))
+        self.assertEqual(validator.calls, 1)
+
+    def test_handler_does_not_cache_rejections(self):
+        handler = FileRouteHandler(
+            AppConfig(),
+            storage_strategy=LocalFileSystemStorage(self.temp_dir),
+            verdict_cache=VerdictCache(max_entries=10),
+        )
+        validator = CountingValidator(False)
+        for _ in range(2):
+            upload = UploadContext.from_buffer(b"content", "a.png")
+            with Flask(__name__).app_context():
+                _, status = handler._validate(validator, "png", upload)
+            self.assertEqual(status, 400)
+        self.assertEqual(validator.calls, 2)
+
+    def test_handler_rejects_uploads_over_budget(self):
+        handler = FileRouteHandler(
+            AppConfig(),
+            storage_strategy=LocalFileSystemStorage(self.temp_dir),
+            verdict_cache=VerdictCache(max_entries=10),
+        )
+        validator = CountingValidator(ValidationBudgetExceeded("max_frames", 1))
+        upload = UploadContext.from_buffer(b"content", "a.png")
+        with Flask(__name__).app_context():
+            response, status = handler._validate(validator, "png", upload)
+        self.assertEqual(status, 422)
+        self.assertEqual(
+            response.json["error"], "File could not be validated within limits"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,10 @@
-from typing import Union, Tuple
+from datetime import datetime, timezone
+from typing import BinaryIO, Iterator, Optional, Union, Tuple
 from werkzeug.datastructures.file_storage import FileStorage
+from werkzeug.exceptions import HTTPException
+from werkzeug.http import is_resource_modified
 from werkzeug.utils import secure_filename
+from werkzeug.wsgi import wrap_file
 
 from config.app_config import AppConfig
 from extensions.logger import logger
@@ -11,20 +15,44 @@ from flask import (
 )
 from interfaces.file_handler_interface import IFileHandler
 import os
+import secrets
+import time
 
+from config.validation_config import FileValidationConfig
+
+from interfaces.validation_interface import IFileValidator
 from validators.factory import ValidatorFactory
-from storage.storage_strategy import StorageStrategy
+from validators.budget import ValidationBudgetExceeded
+from validators.sniffing import ContentTypeMismatchError, content_mime_type
+from validators.verdict_cache import VerdictCache, config_fingerprint
+from storage.metadata_index import (
+    FileMetadata,
+    InMemoryMetadataIndex,
+    MetadataIndex,
+    compute_sha256,
+    guess_mime_type,
+)
+from storage.compressed_variants import CompressedVariantStore
+from storage.storage_strategy import FileStat, StorageStrategy
 from storage.local_storage import LocalFileSystemStorage
+from utils.upload_context import UploadContext
+from utils.range_requests import MultipartByteRanges, content_range, resolve_ranges
 
 
 class FileRouteHandler(IFileHandler):
     """
     FileRouteHandler manages file handling requests, including retrieving and uploading files.
 
+    One handler serves all requests of an app, from any thread, so it keeps no
+    per-request state.
+
     Attributes:
         config (dict): Flask app configuration settings.
         storage_strategy (StorageStrategy): Storage strategy for handling file operations.
         validator_factory (ValidatorFactory): Factory for file validators based on file extensions.
+        metadata_index (MetadataIndex): Index of content hashes recorded for stored files.
+        variant_store (Optional[CompressedVariantStore]): Store of compressed variants, None to disable compression.
+        verdict_cache (Optional[VerdictCache]): Cache of validation verdicts, None to always validate.
     """
 
     def __init__(
@@ -32,6 +60,9 @@ class FileRouteHandler(IFileHandler):
         config: AppConfig,
         storage_strategy: StorageStrategy = None,
         validator_factory: ValidatorFactory = None,
+        metadata_index: MetadataIndex = None,
+        variant_store: Optional[CompressedVariantStore] = None,
+        verdict_cache: Optional[VerdictCache] = None,
     ) -> None:
         """
         Initializes the FileRouteHandler with storage and validation strategies.
@@ -40,18 +71,30 @@ class FileRouteHandler(IFileHandler):
             config (dict): Flask app configuration settings.
             storage_strategy (StorageStrategy, optional): Custom storage strategy. Defaults to LocalFileSystemStorage.
             validator_factory (ValidatorFactory, optional): Custom validator factory. Defaults to ValidatorFactory.
+            metadata_index (MetadataIndex, optional): Custom metadata index. Defaults to InMemoryMetadataIndex.
+            variant_store (CompressedVariantStore, optional): Store of compressed variants. Defaults to no compression.
+            verdict_cache (VerdictCache, optional): Cache of validation verdicts. Defaults to no caching.
         """
         self.config = config
         self.storage_strategy = storage_strategy or LocalFileSystemStorage(
             media_files_dest=config.MEDIA_FILES_DEST
         )
         self.validator_factory = validator_factory or ValidatorFactory()
+        self.metadata_index = metadata_index or InMemoryMetadataIndex()
+        self.variant_store = variant_store
+        self.verdict_cache = verdict_cache
 
     def handle_get_request(
         self, file_path: str
     ) -> Union[Response, Tuple[Response, int]]:
         """
-        Handles GET requests to retrieve a file from the media directory.
+        Handles GET and HEAD requests to retrieve a file from the media directory.
+
+        HEAD requests are answered from the metadata index and a stat, without
+        opening the file. Compressible files are sent in the best content coding the
+        client accepts, using a variant generated once per content hash. HEAD
+        requests never generate one: they describe the stored variant, or the
+        identity coding if there is none yet.
 
         Args:
             file_path (str): Relative path to the requested file.
@@ -59,13 +102,66 @@ class FileRouteHandler(IFileHandler):
         Returns:
             Union[Response, Tuple[Response, int]]: Flask response object with the file content or an error message.
         """
-        logger.info("'GET' method detected")
+        logger.debug("'GET' method detected")
+
+        if file_path.split("/", 1)[0] not in self.config.ALLOWED_DIRECTORIES:
+            return jsonify({"error": "File not found"}), 404
+
+        try:
+            file_stat = self.storage_strategy.stat_file(file_path)
+        except (FileNotFoundError, NotADirectoryError):
+            return jsonify({"error": "File not found"}), 404
 
+        file_stream = None
         try:
-            file_content = self.storage_strategy.get_file(file_path)
-            return Response(file_content, mimetype="application/octet-stream")
-        except FileNotFoundError:
+            metadata = self.metadata_index.get(file_path)
+            if metadata is None or not metadata.matches(file_stat):
+                file_stream = self.storage_strategy.open_file(file_path)
+                metadata = self._index_file(file_path, file_stream, file_stat)
+
+            encoding = self._select_encoding(metadata)
+            variant_size = None
+            if encoding is not None and request.method == "HEAD":
+                variant_size = self.variant_store.variant_size(
+                    metadata.sha256, encoding
+                )
+                if variant_size is None:
+                    encoding = None
+            etag = (
+                metadata.sha256 if encoding is None else f"{metadata.sha256}-{encoding}"
+            )
+            last_modified = datetime.fromtimestamp(file_stat.mtime, tz=timezone.utc)
+            if not is_resource_modified(
+                request.environ, etag=etag, last_modified=last_modified
+            ):
+                response = Response(status=304)
+            elif request.method == "HEAD":
+                response = Response(mimetype=metadata.mime_type)
+                response.content_length = (
+                    file_stat.size if variant_size is None else variant_size
+                )
+            elif encoding is not None:
+                response = self._build_encoded_response(file_path, metadata, encoding)
+            else:
+                if file_stream is None:
+                    file_stream = self.storage_strategy.open_file(file_path)
+                response = self._build_file_response(file_stream, file_stat, metadata)
+                # The response closes the stream once it has been sent.
+                file_stream = None
+        except (FileNotFoundError, IsADirectoryError):
             return jsonify({"error": "File not found"}), 404
+        finally:
+            if file_stream is not None:
+                file_stream.close()
+
+        response.set_etag(etag)
+        response.accept_ranges = "bytes"
+        response.last_modified = last_modified
+        if encoding is not None:
+            response.content_encoding = encoding
+        if self._is_compressible(metadata):
+            response.vary.add("Accept-Encoding")
+        return response
 
     def handle_post_request(
         self, origin_file_path: str
@@ -79,35 +175,490 @@ class FileRouteHandler(IFileHandler):
         Returns:
             Union[Response, Tuple[Response, int]]: Flask response object indicating success or error.
         """
-        logger.info("'POST' method detected")
+        logger.debug("'POST' method detected")
+
+        rejection = self._check_content_length(origin_file_path)
+        if rejection is not None:
+            return rejection
 
-        uploaded_file, file_key = self._get_uploaded_file()
+        try:
+            uploaded_file, file_key = self._get_uploaded_file()
+        except HTTPException as e:
+            # Raised while the body is spooled: too large, mislabelled or not allowed.
+            logger.warning(f"Upload rejected: {e}")
+            return jsonify({"error": e.description}), e.code
         if uploaded_file is None:
             return jsonify({"error": "No file part or empty filename"}), 400
 
         file_extension = self._get_file_extension(uploaded_file.filename)
-        logger.info(f"File extension: {file_extension}")
+        logger.debug(f"File extension: {file_extension}")
 
+        upload = UploadContext(uploaded_file.stream, uploaded_file.filename or "")
+        try:
+            return self._store_upload(
+                origin_file_path, file_key, file_extension, upload
+            )
+        finally:
+            upload.close()
+
+    def _store_upload(
+        self,
+        origin_file_path: str,
+        file_key: str,
+        file_extension: str,
+        upload: UploadContext,
+    ) -> Tuple[Response, int]:
+        """
+        Validates the upload and publishes it together with its metadata.
+        """
         try:
-            validator = self.validator_factory.get_validator(file_extension)
-            logger.info(f"Validator: {validator}")
-            if not validator.is_valid(uploaded_file):
-                return jsonify({"error": "Invalid file"}), 400
-            # uploaded_file.stream.seek(0)
+            validator = self.validator_factory.get_validator(file_extension, upload)
+            logger.debug(f"Validator: {validator}")
+            rejection = self._check_upload_size(file_extension, upload)
+            if rejection is not None:
+                return rejection
+            rejection = self._validate(validator, file_extension, upload)
+            if rejection is not None:
+                return rejection
+        except ContentTypeMismatchError as e:
+            logger.warning(str(e))
+            return jsonify({"error": "File content does not match its type"}), 415
         except ValueError as e:
             return jsonify({"error": str(e)}), 400
 
         try:
             secured_path = self._secure_file_path(origin_file_path, file_key)
-            # uploaded_file.stream.seek(0)
-            self.storage_strategy.save_file(secured_path, uploaded_file.read())
-            # os.chmod(secured_path, stat.S_IRUSR | stat.S_IWUSR | stat.S_IXUSR | stat.S_IRGRP | stat.S_IXGRP | stat.S_IROTH | stat.S_IXOTH)
-            os.chmod(secured_path, 0o755)
+            previous = self.metadata_index.get(secured_path)
+            self.storage_strategy.save_stream(
+                secured_path,
+                upload.file_stream,
+                upload.sha256,
+                previous.sha256 if previous is not None else None,
+            )
+            try:
+                file_stat = self.storage_strategy.stat_file(secured_path)
+                metadata = FileMetadata(
+                    path=secured_path,
+                    sha256=upload.sha256,
+                    size=file_stat.size,
+                    mtime=file_stat.mtime,
+                    mime_type=content_mime_type(upload.mime_type),
+                    validator=FileValidationConfig.get_validator_type(file_extension),
+                    verdict="valid",
+                    uploaded_at=time.time(),
+                )
+                self.metadata_index.put(metadata)
+            except Exception:
+                self._unpublish(secured_path)
+                raise
+            if previous is not None and previous.sha256 != metadata.sha256:
+                self._release_variants(previous.sha256)
+            if self.config.PRECOMPRESS_ON_UPLOAD and self._is_compressible(metadata):
+                for encoding in self.variant_store.encodings:
+                    self.variant_store.ensure_variant(
+                        metadata.sha256,
+                        encoding,
+                        lambda: self.storage_strategy.open_file(secured_path),
+                    )
             return jsonify({"message": "OK"}), 200
         except (ValueError, Exception) as e:
             logger.error(f"Error uploading file: {str(e)}")
             return jsonify({"error": str(e)}), 501
 
+    def _unpublish(self, file_path: str) -> None:
+        """
+        Removes a published file and its catalog record after the record could
+        not be written, so no file is served without one.
+        """
+        for remove in (self.storage_strategy.delete_file, self.metadata_index.delete):
+            try:
+                remove(file_path)
+            except Exception as e:
+                logger.error(f"Error removing {file_path}: {str(e)}")
+
+    def _check_content_length(
+        self, origin_file_path: str
+    ) -> Optional[Tuple[Response, int]]:
+        """
+        Rejects an upload whose declared size is over the limit before any of the
+        body is read.
+
+        The limit is `MAX_CONTENT_LENGTH`, lowered to the size limit of the file
+        type named in the URL plus room for the form encoding. The uploaded file
+        name is checked again while the body is spooled.
+
+        Returns:
+            Optional[Tuple[Response, int]]: A 413 response, or None to proceed.
+        """
+        content_length = request.content_length
+        if content_length is None:
+            return None
+        limit = self.config.MAX_CONTENT_LENGTH
+        file_name = origin_file_path.rsplit("/", 1)[-1]
+        if "." in file_name:
+            file_extension = self._get_file_extension(file_name)
+            if FileValidationConfig.is_extension_allowed(file_extension):
+                type_config = FileValidationConfig.get_config(
+                    FileValidationConfig.get_validator_type(file_extension)
+                )
+                limit = min(
+                    limit, type_config.max_file_size + self.config.UPLOAD_FORM_OVERHEAD
+                )
+        if content_length > limit:
+            logger.warning(f"Upload of {content_length} bytes refused, limit: {limit}")
+            return jsonify({"error": f"Upload exceeds {limit} bytes"}), 413
+        return None
+
+    @staticmethod
+    def _check_upload_size(
+        file_extension: str, upload: UploadContext
+    ) -> Optional[Tuple[Response, int]]:
+        """
+        Checks the size of the received file against the limit of its type.
+        Spooled uploads were already cut off while they arrived; this covers
+        uploads that were not spooled.
+
+        Returns:
+            Optional[Tuple[Response, int]]: A 413 response, or None to proceed.
+        """
+        validator_type = FileValidationConfig.get_validator_type(file_extension)
+        max_file_size = FileValidationConfig.get_config(validator_type).max_file_size
+        if upload.size > max_file_size:
+            return jsonify({"error": f"File exceeds {max_file_size} bytes"}), 413
+        return None
+
+    def _validate(
+        self, validator: IFileValidator, file_extension: str, upload: UploadContext
+    ) -> Optional[Tuple[Response, int]]:
+        """
+        Runs the validator unless the same content already passed it under the
+        current validation config.
+
+        Only passing verdicts are cached: a rejection may come from a timeout or
+        an I/O error rather than from the content itself.
+
+        Returns:
+            Optional[Tuple[Response, int]]: A 400 response for an invalid file, a
+            422 response if validation used up its budget, or None to proceed.
+        """
+        fingerprint = None
+        if self.verdict_cache is not None:
+            fingerprint = config_fingerprint(
+                FileValidationConfig.get_config(
+                    FileValidationConfig.get_validator_type(file_extension.lower())
+                )
+            )
+            if self.verdict_cache.get(upload.sha256, fingerprint):
+                logger.info(f"Reusing validation verdict for: {upload.sha256}")
+                return None
+        try:
+            passed = validator.is_valid(upload)
+        except ValidationBudgetExceeded as e:
+            # A BaseException, raised by inline validators and re-raised from
+            # worker processes alike; it must not reach the broad handlers.
+            logger.warning(f"Upload rejected: {e}")
+            return jsonify({"error": "File could not be validated within limits"}), 422
+        if not passed:
+            return jsonify({"error": "Invalid file"}), 400
+        if fingerprint is not None:
+            self.verdict_cache.put(upload.sha256, fingerprint, True)
+        return None
+
+    def _is_compressible(self, metadata: FileMetadata) -> bool:
+        """
+        Checks whether compressing the file is worthwhile. Formats that are already
+        compressed (JPEG, PNG, GIF, DOCX, ...) are not in the configured list.
+        """
+        return (
+            self.variant_store is not None
+            and metadata.size >= self.config.COMPRESSION_MIN_SIZE
+            and (
+                metadata.mime_type.startswith("text/")
+                or metadata.mime_type in self.config.COMPRESSIBLE_MIME_TYPES
+            )
+        )
+
+    def _select_encoding(self, metadata: FileMetadata) -> Optional[str]:
+        """
+        Negotiates the content coding from `Accept-Encoding`.
+
+        Range requests are always served from the identity representation.
+
+        Args:
+            metadata (FileMetadata): Indexed metadata of the requested file.
+
+        Returns:
+            Optional[str]: The selected coding, or None for the identity coding.
+        """
+        if not self._is_compressible(metadata) or "Range" in request.headers:
+            return None
+        encoding = request.accept_encodings.best_match(
+            self.variant_store.encodings + ("identity",)
+        )
+        return None if encoding in (None, "identity") else encoding
+
+    def _build_encoded_response(
+        self, file_path: str, metadata: FileMetadata, encoding: str
+    ) -> Response:
+        """
+        Builds a response from the compressed variant of the file.
+
+        Args:
+            file_path (str): Path of the file relative to the media directory.
+            metadata (FileMetadata): Indexed metadata of the file.
+            encoding (str): The negotiated content coding.
+
+        Returns:
+            Response: Streaming Flask response with the compressed content.
+        """
+        variant, variant_size = self.variant_store.open_variant(
+            metadata.sha256,
+            encoding,
+            lambda: self.storage_strategy.open_file(file_path),
+        )
+        return self._stream_file(variant, variant_size, metadata.mime_type)
+
+    def _release_variants(self, sha256: str) -> None:
+        """
+        Deletes the compressed variants of content no indexed file refers to anymore.
+        """
+        if self.variant_store is not None and not self.metadata_index.get_by_hash(
+            sha256
+        ):
+            self.variant_store.discard(sha256)
+
+    def _index_file(
+        self, file_path: str, file_stream: BinaryIO, file_stat: FileStat
+    ) -> FileMetadata:
+        """
+        Hashes a file that has no current index record and stores the result.
+
+        This only happens for files that were not uploaded through this service or
+        were modified behind its back; the stream is rewound afterwards.
+
+        Args:
+            file_path (str): Path of the file relative to the media directory.
+            file_stream (BinaryIO): Opened file positioned at the start.
+            file_stat (FileStat): Current size and modification time of the file.
+
+        Returns:
+            FileMetadata: The freshly indexed record.
+        """
+        logger.info(f"Indexing content hash for: {file_path}")
+        metadata = FileMetadata(
+            path=file_path,
+            sha256=compute_sha256(file_stream, self.config.STREAM_CHUNK_SIZE),
+            size=file_stat.size,
+            mtime=file_stat.mtime,
+            mime_type=guess_mime_type(file_path),
+        )
+        file_stream.seek(0)
+        self.metadata_index.put(metadata)
+        return metadata
+
+    def _build_file_response(
+        self, file_stream: BinaryIO, file_stat: FileStat, metadata: FileMetadata
+    ) -> Response:
+        """
+        Builds a full, partial (206) or unsatisfiable (416) response for the file.
+
+        Args:
+            file_stream (BinaryIO): Opened file positioned at the start.
+            file_stat (FileStat): Size and modification time of the file.
+            metadata (FileMetadata): Indexed metadata of the current file content.
+
+        Returns:
+            Response: Flask response streaming the requested bytes.
+        """
+        mimetype = metadata.mime_type
+        byte_ranges = None
+        if self._if_range_matches(file_stat, metadata.sha256):
+            byte_ranges = resolve_ranges(
+                request.range, file_stat.size, self.config.MAX_BYTE_RANGES
+            )
+
+        if byte_ranges is None:
+            return self._stream_file(file_stream, file_stat.size, mimetype)
+
+        if not byte_ranges:
+            file_stream.close()
+            response = Response(status=416)
+            response.headers["Content-Range"] = f"bytes */{file_stat.size}"
+            return response
+
+        if len(byte_ranges) == 1:
+            start, stop = byte_ranges[0]
+            response = Response(
+                self._read_range(file_stream, start, stop - start),
+                status=206,
+                mimetype=mimetype,
+                direct_passthrough=True,
+            )
+            response.content_length = stop - start
+            response.headers["Content-Range"] = content_range(
+                byte_ranges[0], file_stat.size
+            )
+        else:
+            multipart = MultipartByteRanges(
+                byte_ranges, file_stat.size, mimetype, secrets.token_hex(16)
+            )
+            response = Response(
+                multipart.iter_body(file_stream, self._read_range),
+                status=206,
+                mimetype=multipart.mimetype,
+                direct_passthrough=True,
+            )
+            response.content_length = multipart.content_length
+
+        response.call_on_close(file_stream.close)
+        return response
+
+    def _read_range(
+        self, file_stream: BinaryIO, start: int, length: int
+    ) -> Iterator[bytes]:
+        return self.storage_strategy.iter_range(
+            file_stream, start, length, self.config.STREAM_CHUNK_SIZE
+        )
+
+    @staticmethod
+    def _if_range_matches(file_stat: FileStat, etag: str) -> bool:
+        """
+        Evaluates the `If-Range` precondition.
+
+        A range request is only honoured if `If-Range` is absent or still identifies
+        the current representation; otherwise the whole file is sent.
+
+        Args:
+            file_stat (FileStat): Size and modification time of the file.
+            etag (str): Strong entity tag of the current file content.
+
+        Returns:
+            bool: True if the `Range` header may be applied.
+        """
+        if not request.headers.get("If-Range"):
+            return True
+        if_range = request.if_range
+        if if_range.date is not None:
+            return int(if_range.date.timestamp()) == int(file_stat.mtime)
+        return if_range.etag == etag
+
+    def _stream_file(
+        self, file_stream: BinaryIO, file_size: int, mimetype: str
+    ) -> Response:
+        """
+        Builds a response that streams the file instead of buffering it.
+
+        `wrap_file` uses the server's `wsgi.file_wrapper` (and therefore `sendfile`)
+        when available and falls back to chunked reads otherwise. The file is closed
+        by the WSGI server once the response has been sent.
+
+        Args:
+            file_stream (BinaryIO): Opened file positioned at the start.
+            file_size (int): Size of the file in bytes.
+            mimetype (str): Content type of the file.
+
+        Returns:
+            Response: Streaming Flask response.
+        """
+        response = Response(
+            wrap_file(request.environ, file_stream, self.config.STREAM_CHUNK_SIZE),
+            mimetype=mimetype,
+            direct_passthrough=True,
+        )
+        response.content_length = file_size
+        return response
+
+    def handle_delete_request(
+        self, file_path: str
+    ) -> Union[Response, Tuple[Response, int]]:
+        """
+        Handles DELETE requests removing a file and its metadata.
+
+        Args:
+            file_path (str): Relative path to the file.
+
+        Returns:
+            Union[Response, Tuple[Response, int]]: Flask response object indicating success or error.
+        """
+        logger.debug("'DELETE' method detected")
+
+        if file_path.split("/", 1)[0] not in self.config.ALLOWED_DIRECTORIES:
+            return jsonify({"error": "File not found"}), 404
+
+        metadata = self.metadata_index.get(file_path)
+        try:
+            self.storage_strategy.delete_file(
+                file_path, metadata.sha256 if metadata is not None else None
+            )
+        except (FileNotFoundError, IsADirectoryError):
+            return jsonify({"error": "File not found"}), 404
+        self.metadata_index.delete(file_path)
+        if metadata is not None:
+            self._release_variants(metadata.sha256)
+        return jsonify({"message": "OK"}), 200
+
+    def handle_list_request(self) -> Union[Response, Tuple[Response, int]]:
+        """
+        Handles requests listing the files of one allowed directory.
+
+        The listing is served from the metadata index, one keyset-paginated page at
+        a time, so its cost depends on the page size rather than the directory size.
+
+        Query parameters:
+            directory: One of the allowed media directories (required).
+            prefix: Only list files whose name starts with this prefix.
+            sort: `name` (default), `mtime` or `size`.
+            order: `asc` (default) or `desc`.
+            limit: Page size, capped at `LIST_MAX_PAGE_SIZE`.
+            cursor: The `next_cursor` returned with the previous page.
+
+        Returns:
+            Union[Response, Tuple[Response, int]]: The page of files or an error message.
+        """
+        logger.debug("'LIST' request detected")
+
+        directory = request.args.get("directory", "")
+        if directory not in self.config.ALLOWED_DIRECTORIES:
+            return jsonify({"error": "Directory not allowed"}), 400
+
+        order = request.args.get("order", "asc")
+        if order not in ("asc", "desc"):
+            return jsonify({"error": "Invalid order"}), 400
+
+        try:
+            limit = int(request.args.get("limit", self.config.LIST_PAGE_SIZE))
+        except ValueError:
+            return jsonify({"error": "Invalid limit"}), 400
+        limit = max(1, min(limit, self.config.LIST_MAX_PAGE_SIZE))
+
+        try:
+            page = self.metadata_index.list_files(
+                directory,
+                prefix=request.args.get("prefix", ""),
+                sort=request.args.get("sort", "name"),
+                descending=order == "desc",
+                limit=limit,
+                cursor=request.args.get("cursor"),
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        return jsonify(
+            {
+                "items": [
+                    {
+                        "path": metadata.path,
+                        "size": metadata.size,
+                        "mtime": metadata.mtime,
+                        "mime_type": metadata.mime_type,
+                        "sha256": metadata.sha256,
+                    }
+                    for metadata in page.items
+                ],
+                "next_cursor": page.next_cursor,
+            }
+        )
+
     def _get_uploaded_file(self) -> Tuple[Union[FileStorage, None], str]:
         """
         Retrieves the uploaded file from the request.
@@ -131,7 +682,7 @@ class FileRouteHandler(IFileHandler):
             file_key (str): The key used to identify the uploaded file (either "image" or "file").
 
         Returns:
-            str: A secured, sanitized file path to save the file.
+            str: A secured, sanitized file path relative to the media directory.
 
         Raises:
             ValueError: If the destination directory is not allowed.
@@ -143,8 +694,7 @@ class FileRouteHandler(IFileHandler):
         if dest_dir not in ["images", "files"]:
             raise ValueError("Directory not allowed")
 
-        allowed_path = os.path.join(self.config.MEDIA_FILES_DEST, dest_dir)
-        return os.path.join(allowed_path, secured_filename)
+        return os.path.join(dest_dir, secured_filename)
 
     @staticmethod
     def _get_file_extension(filename: str) -> str:
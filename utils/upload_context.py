@@ -0,0 +1,147 @@
+from typing import BinaryIO, Optional
+import hashlib
+import io
+import mmap
+
+
+class BufferReader(io.RawIOBase):
+    """
+    Read-only, seekable file object over a buffer, for parsers that expect a file
+    (Pillow, pypdf, zipfile, olefile). Unlike `io.BytesIO` it does not copy the
+    buffer up front; only the bytes actually read are copied.
+    """
+
+    def __init__(self, buffer: memoryview) -> None:
+        self._buffer = buffer
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += len(self._buffer)
+        if offset < 0:
+            raise ValueError(f"Negative seek position {offset}")
+        self._position = offset
+        return offset
+
+    def read(self, size: int = -1) -> bytes:
+        end = len(self._buffer) if size is None or size < 0 else self._position + size
+        data = self._buffer[self._position : end].tobytes()
+        self._position += len(data)
+        return data
+
+    def readall(self) -> bytes:
+        return self.read()
+
+    def readinto(self, b) -> int:
+        data = self._buffer[self._position : self._position + len(b)]
+        b[: len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+
+class UploadContext:
+    """
+    One uploaded file, shared by the validators and the storage backend.
+
+    The content is materialized at most once: a file-backed upload (the spooled
+    temporary file) is memory-mapped read-only, any other stream is read into a
+    single buffer. Validators work on `content` or on a `reader()` over it instead
+    of reading and rewinding the stream themselves, and the digest is computed
+    once, on first use.
+
+    Attributes:
+        file_stream (BinaryIO): The stream the upload was received into.
+        filename (str): Client-supplied file name.
+        mime_type (Optional[str]): Content type sniffed from the leading bytes,
+            once known (the spool sniffs it while the upload arrives).
+    """
+
+    def __init__(self, file_stream: BinaryIO, filename: str = "") -> None:
+        self.file_stream = file_stream
+        self.filename = filename
+        self.mime_type: Optional[str] = getattr(file_stream, "mime_type", None)
+        self._mmap: Optional[mmap.mmap] = None
+        self._content: Optional[memoryview] = None
+        self._sha256: Optional[str] = None
+
+    @classmethod
+    def from_buffer(cls, buffer: bytes, filename: str = "") -> "UploadContext":
+        """
+        Creates a context over content that is already in memory.
+        """
+        upload = cls(io.BytesIO(), filename)
+        upload._content = memoryview(buffer).toreadonly()
+        return upload
+
+    @property
+    def content(self) -> memoryview:
+        """
+        Read-only view of the whole upload.
+        """
+        if self._content is None:
+            self._content = self._materialize()
+        return self._content
+
+    @property
+    def size(self) -> int:
+        return len(self.content)
+
+    @property
+    def sha256(self) -> str:
+        if self._sha256 is None:
+            self._sha256 = hashlib.sha256(self.content).hexdigest()
+        return self._sha256
+
+    def head(self, size: int) -> bytes:
+        """
+        Returns a copy of the first `size` bytes, for APIs that only take bytes.
+        """
+        return self.content[:size].tobytes()
+
+    def reader(self) -> BinaryIO:
+        """
+        Returns a new file object reading the upload from the start.
+        """
+        return io.BufferedReader(BufferReader(self.content))
+
+    def close(self) -> None:
+        """
+        Releases the buffer. The upload stream itself belongs to the request.
+        """
+        if self._content is not None:
+            self._content.release()
+            self._content = None
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # A validator still holds a slice; the map goes with it.
+                pass
+            self._mmap = None
+
+    def _materialize(self) -> memoryview:
+        self.file_stream.flush()
+        try:
+            fileno = self.file_stream.fileno()
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            fileno = None
+        if fileno is not None:
+            try:
+                self._mmap = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files cannot be mapped.
+                return memoryview(b"")
+            return memoryview(self._mmap)
+        self.file_stream.seek(0)
+        return memoryview(self.file_stream.read()).toreadonly()
@@ -0,0 +1,213 @@
+from typing import IO, List, Optional
+import os
+import tempfile
+
+from flask import Request, current_app
+from werkzeug.exceptions import BadRequest, RequestEntityTooLarge, UnsupportedMediaType
+from werkzeug.formparser import FormDataParser, MultiPartParser
+
+from config.validation_config import FileValidationConfig
+from validators.sniffing import SNIFF_SIZE, detect_mime_type, validator_type_for_mime
+
+
+class SpooledUpload:
+    """
+    Temporary file receiving an uploaded file straight from the request body.
+
+    The file is created in the staging directory, which lives on the same file
+    system as the media directory, so a validated upload can be published with a
+    single atomic `os.replace` instead of being copied. Writes are buffered in
+    blocks of `chunk_size` bytes, so memory use does not depend on the upload size.
+    The file is deleted on close unless it has been published.
+
+    Uploads are checked while they arrive: writing past `max_size` bytes, or a
+    start of file whose sniffed content type does not route to `expected_type`,
+    closes the spool and aborts the request before the rest of the body is read.
+
+    Attributes:
+        name (str): Path of the temporary file.
+        mime_type (Optional[str]): Content type sniffed from the first
+            `SNIFF_SIZE` bytes, once that many have been written.
+    """
+
+    def __init__(
+        self,
+        staging_dir: str,
+        chunk_size: int,
+        max_size: Optional[int] = None,
+        expected_type: Optional[str] = None,
+    ) -> None:
+        os.makedirs(staging_dir, exist_ok=True)
+        fd, self.name = tempfile.mkstemp(dir=staging_dir, prefix=".upload-")
+        self._file = os.fdopen(fd, "w+b", buffering=chunk_size)
+        self.published = False
+        self.max_size = max_size
+        self.mime_type: Optional[str] = None
+        self._expected_type = expected_type
+        self._head = b""
+        self._written = 0
+
+    def write(self, data: bytes) -> int:
+        """
+        Appends a block of the upload.
+
+        Raises:
+            RequestEntityTooLarge: If the upload grows beyond `max_size`.
+            UnsupportedMediaType: If the content does not match `expected_type`.
+        """
+        self._written += len(data)
+        if self.max_size is not None and self._written > self.max_size:
+            self.close()
+            raise RequestEntityTooLarge(f"File exceeds {self.max_size} bytes")
+        if self.mime_type is None and self._expected_type is not None:
+            self._head += data[: SNIFF_SIZE - len(self._head)]
+            if len(self._head) >= SNIFF_SIZE:
+                self.mime_type = detect_mime_type(self._head)
+                if validator_type_for_mime(self.mime_type) != self._expected_type:
+                    self.close()
+                    raise UnsupportedMediaType("File content does not match its type")
+        return self._file.write(data)
+
+    def __getattr__(self, name: str):
+        return getattr(self._file, name)
+
+    def __iter__(self):
+        return iter(self._file)
+
+    def __enter__(self) -> "SpooledUpload":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def link(self, dest_path: str) -> None:
+        """
+        Hard-links the upload at `dest_path`, which must not exist yet. The
+        temporary name is still removed on close.
+
+        Raises:
+            FileExistsError: If `dest_path` already exists.
+        """
+        self._sync()
+        os.link(self.name, dest_path)
+
+    def publish(self, dest_path: str) -> None:
+        """
+        Atomically moves the upload to its final location. Readers see either the
+        previous file or the complete new one, never a partial write.
+
+        Args:
+            dest_path (str): Full path the upload is published at.
+        """
+        self._sync()
+        os.replace(self.name, dest_path)
+        self.published = True
+
+    def _sync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        os.chmod(self.name, 0o755)
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self._file.close()
+        if not self.published:
+            try:
+                os.unlink(self.name)
+            except FileNotFoundError:
+                pass
+
+
+class ChunkedFormDataParser(FormDataParser):
+    """
+    Form parser reading the request body in blocks of `buffer_size` bytes.
+    """
+
+    def __init__(self, *args, buffer_size: int = 64 * 1024, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.buffer_size = buffer_size
+
+    def _parse_multipart(self, stream, mimetype, content_length, options):
+        parser = MultiPartParser(
+            stream_factory=self.stream_factory,
+            max_form_memory_size=self.max_form_memory_size,
+            max_form_parts=self.max_form_parts,
+            cls=self.cls,
+            buffer_size=self.buffer_size,
+        )
+        boundary = options.get("boundary", "").encode("ascii")
+        if not boundary:
+            raise ValueError("Missing boundary")
+        form, files = parser.parse(stream, boundary, content_length)
+        return stream, form, files
+
+
+class MediaRequest(Request):
+    """
+    Request class streaming uploaded files into `SpooledUpload` files in the
+    upload staging directory, `UPLOAD_CHUNK_SIZE` bytes at a time.
+
+    The extension of each uploaded file name selects its size limit and
+    signature from the validation config, so oversized or mislabelled files are
+    refused while the body is being read.
+    """
+
+    form_data_parser_class = ChunkedFormDataParser
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._spools: List[SpooledUpload] = []
+
+    def close(self) -> None:
+        """
+        Closes the request, removing spooled files that were not published,
+        including those of a body whose parsing was aborted.
+        """
+        super().close()
+        for spool in self._spools:
+            spool.close()
+
+    def make_form_data_parser(self) -> FormDataParser:
+        return self.form_data_parser_class(
+            stream_factory=self._get_file_stream,
+            max_form_memory_size=self.max_form_memory_size,
+            max_content_length=self.max_content_length,
+            max_form_parts=self.max_form_parts,
+            cls=self.parameter_storage_class,
+            buffer_size=current_app.config["UPLOAD_CHUNK_SIZE"],
+        )
+
+    def _get_file_stream(
+        self,
+        total_content_length: Optional[int],
+        content_type: Optional[str],
+        filename: Optional[str] = None,
+        content_length: Optional[int] = None,
+    ) -> IO[bytes]:
+        staging_dir = get_upload_staging_dir()
+        chunk_size = current_app.config["UPLOAD_CHUNK_SIZE"]
+        if not filename:
+            spool = SpooledUpload(staging_dir, chunk_size)
+        else:
+            extension = filename.rsplit(".", 1)[1].lower() if "." in filename else ""
+            if not FileValidationConfig.is_extension_allowed(extension):
+                raise BadRequest(f"File extension not allowed: {extension}")
+            validator_type = FileValidationConfig.get_validator_type(extension)
+            spool = SpooledUpload(
+                staging_dir,
+                chunk_size,
+                max_size=FileValidationConfig.get_config(validator_type).max_file_size,
+                expected_type=validator_type,
+            )
+        self._spools.append(spool)
+        return spool
+
+
+def get_upload_staging_dir() -> str:
+    """
+    Returns the staging directory for uploads of the current app.
+    """
+    return current_app.config["UPLOAD_STAGING_DIR"] or os.path.join(
+        current_app.config["MEDIA_FILES_DEST"], ".uploads"
+    )
@@ -0,0 +1,204 @@
+from typing import Optional
+import os
+import signal
+import threading
+import time
+
+from config.validation_config import ValidationBudget
+
+
+class ValidationBudgetExceeded(BaseException):
+    """
+    A validation used up part of its `ValidationBudget`; the upload is rejected.
+
+    Derives from BaseException rather than Exception, so the broad handlers
+    around parsers and validators neither swallow it nor turn it into an
+    ordinary verdict.
+
+    Attributes:
+        resource (str): The budget field that was exceeded.
+        limit (float): Its configured limit.
+    """
+
+    def __init__(self, resource: str, limit: float) -> None:
+        super().__init__(resource, limit)
+        self.resource = resource
+        self.limit = limit
+
+    def __str__(self) -> str:
+        return f"Validation exceeded {self.resource}: {self.limit}"
+
+
+_active = threading.local()
+_cpu_timer_enabled = False
+_memory_budget_enabled = False
+
+
+def enable_cpu_timer() -> None:
+    """
+    Lets budgets interrupt a validation running in the main thread as soon as
+    its CPU time is used up, rather than at the next checkpoint.
+
+    Only for processes doing nothing but validation: the timer counts the CPU
+    time of the whole process and takes over SIGPROF.
+    """
+    global _cpu_timer_enabled
+    _cpu_timer_enabled = hasattr(signal, "setitimer")
+
+
+def enable_memory_budget() -> None:
+    """
+    Lets budgets limit the growth of resident memory during a validation.
+
+    Only for processes validating one upload at a time: resident memory is
+    measured for the whole process, so concurrent validations would be charged
+    for each other's memory.
+    """
+    global _memory_budget_enabled
+    _memory_budget_enabled = True
+
+
+class BudgetTracker:
+    """
+    Tracks one validation against its budget.
+
+    CPU time and memory growth are compared with the budget at checkpoints:
+    between the checks of a pipeline and from the loops over pages and parts.
+    Memory growth is only tracked once `enable_memory_budget` was called.
+    Decompressed bytes and frames are charged by the code producing them.
+
+    Used as a context manager, the tracker becomes the one `checkpoint`,
+    `charge_decompressed` and `charge_frame` apply to in the calling thread.
+
+    Attributes:
+        budget (ValidationBudget): The limits.
+        decompressed_bytes (int): Decompressed bytes charged so far.
+        frames (int): Frames charged so far.
+    """
+
+    def __init__(self, budget: ValidationBudget) -> None:
+        self.budget = budget
+        self.decompressed_bytes = 0
+        self.frames = 0
+        self._cpu_started = time.thread_time()
+        self._memory_started = _start_memory()
+        self._previous: Optional[BudgetTracker] = None
+        self._timer_armed = False
+
+    def __enter__(self) -> "BudgetTracker":
+        self._previous = current_tracker()
+        _active.tracker = self
+        self._cpu_started = time.thread_time()
+        self._memory_started = _start_memory()
+        if _cpu_timer_enabled and threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGPROF, self._on_cpu_timer)
+            self._timer_armed = True
+            signal.setitimer(signal.ITIMER_PROF, self.budget.max_cpu_seconds)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._timer_armed:
+            # Disarmed before the timer is stopped, so a signal still pending
+            # is ignored.
+            self._timer_armed = False
+            signal.setitimer(signal.ITIMER_PROF, 0)
+        _active.tracker = self._previous
+
+    def checkpoint(self) -> None:
+        """
+        Raises:
+            ValidationBudgetExceeded: If the CPU time or memory growth budget is
+                used up.
+        """
+        if time.thread_time() - self._cpu_started > self.budget.max_cpu_seconds:
+            raise ValidationBudgetExceeded(
+                "max_cpu_seconds", self.budget.max_cpu_seconds
+            )
+        if self._memory_started is None:
+            return
+        memory = _resident_memory()
+        if (
+            memory is not None
+            and memory - self._memory_started > self.budget.max_memory_growth
+        ):
+            raise ValidationBudgetExceeded(
+                "max_memory_growth", self.budget.max_memory_growth
+            )
+
+    def charge_decompressed(self, size: int) -> None:
+        """
+        Charges `size` decompressed bytes, then checks the rest of the budget.
+
+        Raises:
+            ValidationBudgetExceeded: If any part of the budget is used up.
+        """
+        self.decompressed_bytes += size
+        if self.decompressed_bytes > self.budget.max_decompressed_bytes:
+            raise ValidationBudgetExceeded(
+                "max_decompressed_bytes", self.budget.max_decompressed_bytes
+            )
+        self.checkpoint()
+
+    def charge_frame(self) -> None:
+        """
+        Raises:
+            ValidationBudgetExceeded: If the image has more than `max_frames` frames.
+        """
+        self.frames += 1
+        if self.frames > self.budget.max_frames:
+            raise ValidationBudgetExceeded("max_frames", self.budget.max_frames)
+
+    def _on_cpu_timer(self, signum, frame) -> None:
+        if self._timer_armed:
+            raise ValidationBudgetExceeded(
+                "max_cpu_seconds", self.budget.max_cpu_seconds
+            )
+
+
+def current_tracker() -> Optional[BudgetTracker]:
+    """
+    Returns the tracker of the validation running in the calling thread, if any.
+    """
+    return getattr(_active, "tracker", None)
+
+
+def checkpoint() -> None:
+    tracker = current_tracker()
+    if tracker is not None:
+        tracker.checkpoint()
+
+
+def charge_decompressed(size: int) -> None:
+    tracker = current_tracker()
+    if tracker is not None:
+        tracker.charge_decompressed(size)
+
+
+def charge_frame() -> None:
+    tracker = current_tracker()
+    if tracker is not None:
+        tracker.charge_frame()
+
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _start_memory() -> Optional[int]:
+    return _resident_memory() if _memory_budget_enabled else None
+
+
+def _resident_memory() -> Optional[int]:
+    """
+    Returns the resident memory of the process in bytes, or None where
+    /proc/self/statm is not available.
+    """
+    try:
+        fd = os.open("/proc/self/statm", os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        return int(os.read(fd, 128).split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+    finally:
+        os.close(fd)
@@ -1,17 +1,43 @@
-import os
 from interfaces.validation_interface import IFileValidator
 from extensions.logger import logger
 from config.validation_config import FileValidationConfig, DOCValidationConfig
-import re
-import io
 import olefile
-import tempfile
-from werkzeug.datastructures.file_storage import FileStorage
-from typing import Optional, cast
+from utils.upload_context import UploadContext
+from validators.keyword_matcher import KeywordMatcher
+from validators.pipeline import Check, CheckCost, CheckPipeline
+from functools import partial
+from typing import Iterable, Iterator, Optional, cast
 import traceback
 
 
+class _DOCSubject:
+    """
+    Per-upload state shared by the DOC checks: the OLE container, parsed in
+    memory on first use.
+    """
+
+    def __init__(self, upload: UploadContext) -> None:
+        self.upload = upload
+        self._ole: Optional[olefile.OleFileIO] = None
+
+    @property
+    def ole(self) -> olefile.OleFileIO:
+        # olefile reads the header, FAT and directory up front; stream data is
+        # only read for the streams the checks open
+        if self._ole is None:
+            self._ole = olefile.OleFileIO(self.upload.reader())
+        return self._ole
+
+    def close(self) -> None:
+        if self._ole is not None:
+            self._ole.close()
+
+
 class DOCValidator(IFileValidator):
+    STREAM_CHUNK_SIZE = 64 * 1024
+    TABLE_STREAMS = ("1Table", "0Table")
+    LINK_MATCHER = KeywordMatcher.for_keywords(["http://", "https://"])
+
     def __init__(self) -> None:
         """
         Initializes the ImageValidator with configuration from the validation config.
@@ -21,104 +47,80 @@ class DOCValidator(IFileValidator):
         self.config: DOCValidationConfig = cast(
             DOCValidationConfig, FileValidationConfig.get_config("DOC")
         )
+        self.pipeline: CheckPipeline[_DOCSubject] = CheckPipeline(
+            "doc",
+            [
+                Check(
+                    "not_empty",
+                    CheckCost.METADATA,
+                    lambda subject: self._check_not_empty(subject.upload.size),
+                ),
+                Check(
+                    "file_size",
+                    CheckCost.METADATA,
+                    lambda subject: self._validate_file_size(subject.upload.size),
+                ),
+                Check(
+                    "word_document",
+                    CheckCost.STRUCTURE,
+                    lambda subject: self._check_if_word(subject.ole),
+                ),
+                Check(
+                    "macros",
+                    CheckCost.STRUCTURE,
+                    lambda subject: self._check_macros(subject.ole),
+                ),
+                Check(
+                    "embedded_objects",
+                    CheckCost.STRUCTURE,
+                    lambda subject: self._check_embedded_objects(subject.ole),
+                ),
+                Check(
+                    "external_links",
+                    CheckCost.CONTENT,
+                    lambda subject: self._check_external_links(subject.ole),
+                ),
+                Check(
+                    "word_data",
+                    CheckCost.CONTENT,
+                    lambda subject: self._check_word_document(subject.ole),
+                ),
+            ],
+        )
 
-    def is_valid(self, uploaded_file: FileStorage) -> bool:
+    def is_valid(self, upload: UploadContext) -> bool:
         logger.info("Validating DOC file")
 
-        file_content = self._get_file_content(uploaded_file)
-        if not file_content:
-            logger.warning("Failed to read file content")
-            return False
-
-        temp_file_path = None
+        subject = _DOCSubject(upload)
         try:
-            temp_file_path = self._create_temp_file(file_content)
-            if not temp_file_path:
-                logger.warning("Failed to create temporary file")
-                return False
-
-            if not self._validate_ole_file(temp_file_path):
-                return False
-
-            if not self._validate_file_size(file_content):
-                return False
-
-            self._reset_file_stream(uploaded_file, file_content)
-            return True
+            return self.pipeline.run(subject, self.config.budget)
         except Exception as error:
-            # Log the error and return None if the file could not be read
+            # Log the error and return False if the file could not be read
             logger.warning(f"Error validating DOC file: {error}")
+            logger.warning(traceback.format_exc())
             return False
         finally:
-            if temp_file_path and os.path.exists(temp_file_path):
-                os.unlink(temp_file_path)
+            subject.close()
 
     @staticmethod
-    def _get_file_content(uploaded_file: FileStorage) -> Optional[bytes]:
-        """
-        Creates a DOC reader object from the uploaded file.
-
-        Args:
-            uploaded_file (FileStorage): The uploaded file object.
-
-        Returns:
-            Optional[bytes]: The file content as bytes, or None if the file could not be read.
-        """
-        try:
-            # Read the file content
-            return uploaded_file.read()
-        except Exception as error:
-            # Log the error and return None if the file could not be read
-            logger.warning(f"Error reading DOC: {error}")
-            return None
+    def _check_not_empty(file_size: int) -> bool:
+        if not file_size:
+            logger.warning("Failed to read file content")
+            return False
+        return True
 
-    @staticmethod
-    def _create_temp_file(file_content: bytes) -> Optional[str]:
+    def _check_word_document(self, ole: olefile.OleFileIO) -> bool:
         """
-        Creates a temporary file from the uploaded file content.
+        Reads the WordDocument stream and validates its data.
 
         Args:
-            file_content (bytes): The uploaded file content as bytes.
+            ole (olefile.OleFileIO): The OleFileIO object.
 
         Returns:
-            str: The path to the temporary file.
+            bool: True if the stream could be read and passes the checks, False otherwise.
         """
-        try:
-            # Create a temporary file
-            with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-                # Write the file content to the temporary file
-                temp_file.write(file_content)
-                # Flush the buffer to ensure the file is written
-                temp_file.flush()
-                # Return the path to the temporary file
-                return temp_file.name
-        except Exception as error:
-            # Log the error and return None if the file could not be created
-            logger.warning(f"Error creating temporary file: {error}")
-            logger.warning(traceback.format_exc())
-            return None
-
-    def _validate_ole_file(self, file_path: str) -> bool:
-        try:
-            with olefile.OleFileIO(file_path) as ole:
-                if not self._check_if_word(ole):
-                    return False
-                if not self._check_macros(ole):
-                    return False
-                if not self._check_external_links(ole):
-                    return False
-                if not self._check_embedded_objects(ole):
-                    return False
-
-                word_data = self._get_word_document_data(ole)
-                if not word_data or not self._validate_word_data(word_data):
-                    return False
-
-            return True
-        except Exception as error:
-            logger.warning(f"Error processing OLE file: {error}")
-            logger.warning(traceback.format_exc())
-            return False
+        word_data = self._read_stream(ole, "WordDocument")
+        return word_data is not None and self._validate_word_data(word_data)
 
     @staticmethod
     def _check_if_word(ole: olefile.OleFileIO) -> bool:
@@ -163,8 +165,7 @@ class DOCValidator(IFileValidator):
         # Return True to indicate that the file does not contain macros
         return True
 
-    @staticmethod
-    def _check_external_links(ole: olefile.OleFileIO) -> bool:
+    def _check_external_links(self, ole: olefile.OleFileIO) -> bool:
         """
         Checks if the uploaded file contains external links.
 
@@ -176,16 +177,19 @@ class DOCValidator(IFileValidator):
         Returns:
             bool: True if the file does not contain external links, False otherwise.
         """
-        # Check for external links
-        if ole.exists("\\1Table"):
-            table_data = ole.openstream("\\1Table").read()
-            if any(
-                protocol in table_data.upper() for protocol in [b"HTTP://", b"HTTPS://"]
-            ):
+        # Hyperlink fields are stored in the table stream, "1Table" or "0Table"
+        # depending on the document
+        for table_name in self.TABLE_STREAMS:
+            if not ole.exists(table_name):
+                continue
+            table_data = self._read_stream(ole, table_name)
+            if table_data is None:
+                return False
+            if self.LINK_MATCHER.search_chunks(table_data) is not None:
                 # Log a warning if the file contains external links
                 logger.warning(
-                    "Document contains external links. Potential security risk.\
-                    This can be used to execute malicious code."
+                    "Document contains external links. Potential security risk. "
+                    "This can be used to execute malicious code."
                 )
                 # Return False to indicate that the file contains external links
                 return False
@@ -217,129 +221,79 @@ class DOCValidator(IFileValidator):
         # If the file does not contain embedded objects, return True
         return True
 
-    @staticmethod
-    def _get_word_document_data(ole: olefile.OleFileIO) -> Optional[bytes]:
+    def _read_stream(
+        self, ole: olefile.OleFileIO, stream_name: str
+    ) -> Optional[Iterator[bytes]]:
         """
-        Reads the WordDocument stream from the uploaded file.
+        Opens a stream of the uploaded file for reading in chunks.
+
+        olefile loads the whole stream into memory when it is opened, so
+        memory is capped by the size check: streams declaring a size larger
+        than the file size limit are refused before they are opened. Reading
+        in chunks only spares the matcher a second, transformed copy.
 
         Args:
             ole (olefile.OleFileIO): The OleFileIO object representing the
                 uploaded file.
+            stream_name (str): Name of the stream to read.
 
         Returns:
-            Optional[bytes]: The data from the WordDocument stream, or None if
-                there was an error reading it.
+            Optional[Iterator[bytes]]: The stream data in chunks of
+                `STREAM_CHUNK_SIZE`, or None if the stream could not be opened.
         """
         try:
-            # Open the WordDocument stream
-            with ole.openstream("WordDocument") as word_stream:
-                # Read the data from the stream
-                return word_stream.read()
+            if ole.get_size(stream_name) > self.config.max_file_size:
+                logger.warning(f"DOC stream {stream_name} is suspiciously large")
+                return None
+            stream = ole.openstream(stream_name)
         except Exception as error:
-            # Log a warning if there was an error reading the stream
-            logger.warning(f"Error reading WordDocument stream: {error}")
+            # Log a warning if there was an error opening the stream
+            logger.warning(f"Error reading {stream_name} stream: {error}")
             return None
+        return iter(partial(stream.read, self.STREAM_CHUNK_SIZE), b"")
 
-    def _validate_word_data(self, word_data: bytes) -> bool:
+    def _validate_word_data(self, word_data: Iterable[bytes]) -> bool:
         """
         Validates the data from the WordDocument stream.
 
         This method checks if the uploaded Word document contains potential
-        script injection and suspicious keywords.
+        script injection ("<script", "javascript:", "data:", ignoring case) or
+        suspicious keywords. Both are searched for in a single pass.
 
         Args:
-            word_data (bytes): The data from the WordDocument stream.
+            word_data (Iterable[bytes]): The data from the WordDocument stream,
+                in chunks.
 
         Returns:
             bool: True if the file passes all the checks, False otherwise.
         """
-        # Check for potential script injection and suspicious keywords
-        return all(
-            [
-                self._check_script_injection(word_data),
-                self._check_suspicious_keywords(word_data),
-            ]
+        matcher = KeywordMatcher.for_keywords(
+            [*self.config.suspicious_keywords, *self.config.script_markers]
         )
-
-    @staticmethod
-    def _check_script_injection(word_data: bytes) -> bool:
-        """
-        Checks if the uploaded Word document contains potential script injection.
-
-        This is a security risk, as it could allow an attacker to execute malicious code.
-        We check for the strings "<script", "javascript:", and "data:" (ignoring case)
-        because these are commonly used to inject malicious code into a Word document.
-
-        Args:
-            word_data (bytes): The Word document data as bytes.
-
-        Returns:
-            bool: True if the file does not contain script injection, False otherwise.
-        """
-        # Check Word document for potential script injection
-        if re.search(b"(?i)<script|javascript:|data:", word_data, re.IGNORECASE):
+        found = matcher.search_chunks(word_data)
+        if found is None:
+            return True
+        if found.lower() in self.config.script_markers:
             logger.warning("DOC file contains potential script injection")
-            return False
-        # If the file does not contain script injection, return True
-        return True
-
-    def _check_suspicious_keywords(self, word_data: bytes) -> bool:
-        """
-        Checks if the uploaded Word document contains any suspicious keywords.
-
-        If the file contains any of the configured suspicious keywords, we log a warning
-        and return False to indicate that the file is not valid.
-
-        Args:
-            word_data (bytes): The Word document data as bytes.
-
-        Returns:
-            bool: True if the file does not contain any suspicious keywords, False otherwise.
-        """
-        # Check if the file contains any suspicious keywords
-        if any(
-            keyword in word_data.lower() for keyword in self.config.suspicious_keywords
-        ):
-            # Log a warning if the file contains suspicious keywords
+        else:
             logger.warning("DOC file contains suspicious keywords")
-            # Return False to indicate that the file is not valid
-            return False
-        # If the file does not contain any suspicious keywords, return True
-        return True
+        return False
 
-    def _validate_file_size(self, file_content: bytes) -> bool:
+    def _validate_file_size(self, file_size: int) -> bool:
         """
         Checks if the uploaded file exceeds the maximum allowed file size.
 
         Args:
-            file_content (bytes): The uploaded file content as bytes.
+            file_size (int): Size of the uploaded file in bytes.
 
         Returns:
             bool: True if the file size is valid, False if too large.
         """
         # Check if the file size exceeds the maximum allowed
-        if len(file_content) > self.config.max_file_size:
+        if file_size > self.config.max_file_size:
             # Log a warning if the file size is suspiciously large
             logger.warning("DOC file is suspiciously large")
             # Return False to indicate that the file is not valid
             return False
         # If the file size is valid, return True
         return True
-
-    @staticmethod
-    def _reset_file_stream(uploaded_file: FileStorage, file_content: bytes) -> None:
-        """
-        Resets the file stream to the beginning and assigns the file content back to the uploaded file.
-
-        This method is used to reset the file stream after it has been read to check its MIME type,
-        so it can be read again by the application.
-
-        Args:
-            uploaded_file (FileStorage): The uploaded file object.
-            file_content (bytes): The file content as bytes.
-        """
-        # Reset the file stream to the beginning
-        file_stream = io.BytesIO(file_content)
-        file_stream.seek(0)
-        # Assign the file content back to the uploaded file
-        uploaded_file.stream = file_stream
@@ -1,15 +1,60 @@
-from werkzeug.datastructures.file_storage import FileStorage
 from interfaces.validation_interface import IFileValidator
+from utils.upload_context import UploadContext
 from config.validation_config import FileValidationConfig, DOCXValidationConfig
 from extensions.logger import logger
+import posixpath
 import zipfile
 import docx
-import io
-from typing import cast, Optional
-import re
+from functools import partial
+from typing import (
+    BinaryIO,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    cast,
+)
+from xml.parsers import expat
+from validators.budget import charge_decompressed
+from validators.keyword_matcher import KeywordMatcher
+from validators.pipeline import Check, CheckCost, CheckPipeline
+
+
+# Namespaces of WordprocessingML (transitional and strict)
+WORDPROCESSING_NAMESPACES = (
+    "http://schemas.openxmlformats.org/wordprocessingml/2006/main",
+    "http://purl.oclc.org/ooxml/wordprocessingml/main",
+)
+PACKAGE_RELATIONSHIPS = "_rels/.rels"
+
+
+class _DOCXSubject:
+    """
+    Per-upload state shared by the DOCX checks: the zip archive, whose central
+    directory is read on first use.
+    """
+
+    def __init__(self, upload: UploadContext) -> None:
+        self.upload = upload
+        self._zip_file: Optional[zipfile.ZipFile] = None
+
+    @property
+    def zip_file(self) -> zipfile.ZipFile:
+        if self._zip_file is None:
+            self._zip_file = zipfile.ZipFile(self.upload.reader())
+        return self._zip_file
+
+    def close(self) -> None:
+        if self._zip_file is not None:
+            self._zip_file.close()
 
 
 class DOCXValidator(IFileValidator):
+    PART_CHUNK_SIZE = 64 * 1024
+
     def __init__(self) -> None:
         """
         Initializes the ImageValidator with configuration from the validation config.
@@ -19,58 +64,203 @@ class DOCXValidator(IFileValidator):
         self.config: DOCXValidationConfig = cast(
             DOCXValidationConfig, FileValidationConfig.get_config("DOCX")
         )
+        self.pipeline: CheckPipeline[_DOCXSubject] = CheckPipeline(
+            "docx",
+            [
+                Check(
+                    "not_empty", CheckCost.METADATA, lambda subject: subject.upload.size
+                ),
+                Check(
+                    "file_size",
+                    CheckCost.METADATA,
+                    lambda subject: self._validate_file_size(subject.upload.size),
+                ),
+                Check(
+                    "archive_limits",
+                    CheckCost.STRUCTURE,
+                    lambda subject: self._check_archive_limits(subject.zip_file),
+                ),
+                Check(
+                    "macros",
+                    CheckCost.STRUCTURE,
+                    lambda subject: self._check_macros(subject.zip_file),
+                ),
+                Check(
+                    "embedded_objects",
+                    CheckCost.STRUCTURE,
+                    lambda subject: self._check_embedded_objects(subject.zip_file),
+                ),
+                Check("document", CheckCost.CONTENT, self._check_document),
+            ],
+        )
 
-    def is_valid(self, uploaded_file: FileStorage) -> bool:
+    def is_valid(self, upload: UploadContext) -> bool:
         logger.info("Validating DOCX file")
 
-        file_content = self._get_file_content(uploaded_file)
-        if not file_content:
+        subject = _DOCXSubject(upload)
+        try:
+            return self.pipeline.run(subject, self.config.budget)
+        except zipfile.BadZipFile:
+            logger.warning("File is not a valid ZIP archive")
             return False
-
-        if not self._validate_file_size(file_content):
+        except Exception as error:
+            logger.warning(f"Error checking ZIP file: {error}")
             return False
+        finally:
+            subject.close()
 
-        io_object = io.BytesIO(file_content)
+    def _check_document(self, subject: _DOCXSubject) -> bool:
+        # Inspect the document content as configured by `inspection_mode`
+        if self.config.inspection_mode == "document":
+            return self._check_docx_file(subject.upload.reader())
+        return self._check_docx_parts(subject.zip_file)
 
-        if not self._check_zip_file(io_object):
+    @staticmethod
+    def _check_macros(zip_file: zipfile.ZipFile) -> bool:
+        if "word/vbaProject.bin" in zip_file.namelist():
+            logger.warning("DOCX file contains VBA macros")
             return False
+        return True
 
-        io_object.seek(0)
-
-        if not self._check_docx_file(io_object):
+    def _check_archive_limits(self, zip_file: zipfile.ZipFile) -> bool:
+        # Check the central directory before anything is decompressed. zipfile
+        # never inflates an entry past its declared size, so the declared sizes
+        # bound the work done later.
+        entries = zip_file.infolist()
+        if len(entries) > self.config.max_entries:
+            logger.warning(f"DOCX file has too many entries: {len(entries)}")
+            return False
+        uncompressed_size = sum(entry.file_size for entry in entries)
+        if uncompressed_size > self.config.max_uncompressed_size:
+            logger.warning(
+                f"DOCX file is suspiciously large when uncompressed: {uncompressed_size}"
+            )
             return False
-
         return True
 
-    @staticmethod
-    def _get_file_content(uploaded_file: FileStorage) -> Optional[bytes]:
-        try:
-            file_content = uploaded_file.read()
-            uploaded_file.seek(0)
-            return file_content
-        except Exception as error:
-            logger.warning(f"Error reading file content: {error}")
+    def _check_docx_parts(self, zip_file: zipfile.ZipFile) -> bool:
+        # Stream the main document part and its relationships through expat
+        # instead of loading the document with python-docx
+        part_names = set(zip_file.namelist())
+        document_part = self._find_document_part(zip_file, part_names)
+        if document_part not in part_names:
+            logger.warning("File is not a valid DOCX document")
+            return False
+        directory, name = posixpath.split(document_part)
+        relationships_part = posixpath.join(directory, "_rels", f"{name}.rels")
+        if relationships_part in part_names and any(
+            relationship_type.endswith("/hyperlink")
+            for relationship_type, _ in self._read_relationships(
+                zip_file, relationships_part
+            )
+        ):
+            logger.warning(
+                "DOCX file contains external links, which could be potentially harmful"
+            )
+            return False
+        return self._check_text(self._read_document_text(zip_file, document_part))
+
+    def _find_document_part(
+        self, zip_file: zipfile.ZipFile, part_names: Set[str]
+    ) -> Optional[str]:
+        # Follow the package relationships to the main document part
+        if PACKAGE_RELATIONSHIPS not in part_names:
             return None
+        for relationship_type, target in self._read_relationships(
+            zip_file, PACKAGE_RELATIONSHIPS
+        ):
+            if relationship_type.endswith("/officeDocument"):
+                return posixpath.normpath(target.lstrip("/"))
+        return None
 
-    def _check_zip_file(self, io_object: io.BytesIO) -> bool:
-        try:
-            with zipfile.ZipFile(io_object) as zip_file:
-                if "word/vbaProject.bin" in zip_file.namelist():
-                    logger.warning("DOCX file contains VBA macros")
-                    return False
+    def _read_relationships(
+        self, zip_file: zipfile.ZipFile, part_name: str
+    ) -> List[Tuple[str, str]]:
+        # Collect (type, target) of every relationship in a .rels part
+        relationships = []
 
-                if not self._check_embedded_objects(zip_file):
-                    return False
+        def start(name: str, attributes: dict) -> None:
+            if name.rpartition(" ")[2] == "Relationship":
+                relationships.append(
+                    (attributes.get("Type", ""), attributes.get("Target", ""))
+                )
 
-            return True
-        except zipfile.BadZipFile:
-            logger.warning("File is not a valid ZIP archive")
-            return False
-        except Exception as error:
-            logger.warning(f"Error checking ZIP file: {error}")
-            return False
+        for _ in self._parse_part(zip_file, part_name, start=start):
+            pass
+        return relationships
+
+    def _read_document_text(
+        self, zip_file: zipfile.ZipFile, part_name: str
+    ) -> Iterator[str]:
+        # Yield the document text as python-docx joins it: the runs of each
+        # paragraph, tabs and breaks, and a newline after each paragraph
+        pieces: List[str] = []
+        in_text = False
+
+        def start(name: str, attributes: dict) -> None:
+            nonlocal in_text
+            namespace, _, tag = name.rpartition(" ")
+            if namespace not in WORDPROCESSING_NAMESPACES:
+                return
+            if tag == "t":
+                in_text = True
+            elif tag == "tab":
+                pieces.append("\t")
+            elif tag in ("br", "cr"):
+                pieces.append("\n")
+
+        def end(name: str) -> None:
+            nonlocal in_text
+            namespace, _, tag = name.rpartition(" ")
+            if namespace not in WORDPROCESSING_NAMESPACES:
+                return
+            if tag == "t":
+                in_text = False
+            elif tag == "p":
+                pieces.append("\n")
 
-    def _check_docx_file(self, io_object: io.BytesIO) -> bool:
+        def data(text: str) -> None:
+            if in_text:
+                pieces.append(text)
+
+        for _ in self._parse_part(zip_file, part_name, start, end, data):
+            if pieces:
+                yield "".join(pieces)
+                pieces.clear()
+
+    def _parse_part(
+        self,
+        zip_file: zipfile.ZipFile,
+        part_name: str,
+        start: Optional[Callable] = None,
+        end: Optional[Callable] = None,
+        data: Optional[Callable] = None,
+    ) -> Iterator[None]:
+        # Feed a part to expat chunk by chunk, yielding after each chunk so the
+        # caller can consume what the handlers collected. The inflated chunks
+        # are charged to the validation budget.
+        parser = expat.ParserCreate(namespace_separator=" ")
+        parser.StartDoctypeDeclHandler = self._reject_doctype
+        if start:
+            parser.StartElementHandler = start
+        if end:
+            parser.EndElementHandler = end
+        if data:
+            parser.CharacterDataHandler = data
+        with zip_file.open(part_name) as part:
+            for chunk in iter(partial(part.read, self.PART_CHUNK_SIZE), b""):
+                charge_decompressed(len(chunk))
+                parser.Parse(chunk, False)
+                yield
+        parser.Parse(b"", True)
+        yield
+
+    @staticmethod
+    def _reject_doctype(*args) -> None:
+        # Office never writes DTDs; refusing them rules out entity expansion
+        raise ValueError("DOCX part declares a DOCTYPE")
+
+    def _check_docx_file(self, io_object: BinaryIO) -> bool:
         try:
             doc = docx.Document(io_object)
             return self._check_external_links(doc) and self._check_malicious_elements(
@@ -110,33 +300,25 @@ class DOCXValidator(IFileValidator):
 
     def _check_malicious_elements(self, doc: docx.Document) -> bool:
         # Check document content for potential malicious elements
-        full_text = "\n".join(paragraph.text for paragraph in doc.paragraphs)
-        return self._check_suspicious_keywords(
-            full_text
-        ) and self._check_script_injection(full_text)
+        return self._check_text(paragraph.text + "\n" for paragraph in doc.paragraphs)
 
-    @staticmethod
-    def _check_script_injection(full_text: str) -> bool:
-        # Check for potential script injection
-        if re.search(r"<script|javascript:|data:>", full_text, re.IGNORECASE):
+    def _check_text(self, text_chunks: Iterable[str]) -> bool:
+        # Check the text for suspicious keywords and script injection in one pass
+        matcher = KeywordMatcher.for_keywords(
+            [*self.config.suspicious_keywords, *self.config.script_markers]
+        )
+        found = matcher.search_chunks(text_chunks)
+        if found is None:
+            return True
+        if found.lower() in self.config.script_markers:
             logger.warning("DOCX file contains potential script injection")
-            return False
-        return True
-
-    def _check_suspicious_keywords(self, full_text: str) -> bool:
-        suspicious_words = [
-            kw for kw in self.config.suspicious_keywords if kw in full_text.lower()
-        ]
-        if suspicious_words:
-            logger.warning(
-                f"DOCX file contains suspicious keywords: {suspicious_words}"
-            )
-            return False
-        return True
+        else:
+            logger.warning(f"DOCX file contains suspicious keywords: {[found]}")
+        return False
 
-    def _validate_file_size(self, file_content: bytes) -> bool:
+    def _validate_file_size(self, file_size: int) -> bool:
         # Check file size (arbitary limit 10MB)
-        if len(file_content) > self.config.max_file_size:
+        if file_size > self.config.max_file_size:
             logger.warning("DOCX file is suspiciously large")
             return False
         return True
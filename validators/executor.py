@@ -0,0 +1,306 @@
+from multiprocessing.connection import Connection
+from typing import Dict, List, Optional, Union
+import atexit
+import multiprocessing
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+import weakref
+
+from extensions.logger import logger
+from interfaces.validation_interface import IFileValidator
+from utils.upload_context import UploadContext
+from validators.budget import (
+    ValidationBudgetExceeded,
+    enable_cpu_timer,
+    enable_memory_budget,
+)
+from validators.pipeline import check_metrics
+
+
+class ValidationWorker:
+    """
+    A warm worker process validating one upload at a time.
+
+    The upload's content is sent over a pipe and the worker answers with the
+    verdict, so a worker that hangs or crashes can be killed without affecting
+    the request threads.
+
+    The worker is a fresh interpreter started by `executable`, rather than a
+    fork: forking a threaded server process is unsafe. It is not a
+    multiprocessing child either, so the exit handler of a process forked from
+    the one that started it leaves it alone.
+    """
+
+    def __init__(self, executable: str) -> None:
+        self.conn, child_conn = multiprocessing.Pipe()
+        self.process = subprocess.Popen(
+            [executable, "-c", _WORKER_COMMAND, str(child_conn.fileno())],
+            pass_fds=(child_conn.fileno(),),
+            env=_worker_env(),
+        )
+        child_conn.close()
+
+    def validate(
+        self, validator_type: str, upload: UploadContext, timeout: float
+    ) -> bool:
+        """
+        Validates the upload in the worker.
+
+        Raises:
+            TimeoutError: If the worker did not answer within `timeout` seconds.
+            EOFError, OSError: If the worker died.
+            ValidationBudgetExceeded: If validation used up its budget.
+        """
+        deadline = time.monotonic() + timeout
+        self.conn.send((validator_type, upload.filename, upload.mime_type))
+        self.conn.send_bytes(upload.content)
+        if not self.conn.poll(max(deadline - time.monotonic(), 0)):
+            raise TimeoutError(f"Validation exceeded {timeout} seconds")
+        verdict, stats = self.conn.recv()
+        check_metrics.merge(stats)
+        if isinstance(verdict, ValidationBudgetExceeded):
+            raise verdict
+        return verdict
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.wait()
+        self.conn.close()
+
+
+class ValidationWorkerPool:
+    """
+    Pool of warm worker processes running CPU-bound validation off the request
+    threads.
+
+    Each upload is validated by one worker under a wall-clock timeout, which
+    also bounds the wait for an idle worker. A worker that times out or dies is
+    killed and replaced in the background; the upload is rejected.
+
+    Workers are started on first use in each process, so a pool created before
+    a preforking server forks its workers is not shared by them: every server
+    process starts workers of its own.
+
+    Attributes:
+        workers (int): Number of worker processes.
+        timeout (float): Seconds a single validation may take.
+        executable (str): Python interpreter running the workers. Defaults to
+            `sys.executable`, which is not a Python interpreter when the app is
+            embedded in a server such as uWSGI.
+    """
+
+    def __init__(
+        self, workers: int, timeout: float, executable: Optional[str] = None
+    ) -> None:
+        self.workers = workers
+        self.timeout = timeout
+        self.executable = executable or sys.executable
+        self._reset()
+        _pools.add(self)
+
+    def validate(self, validator_type: str, upload: UploadContext) -> bool:
+        """
+        Validates the upload in a worker, waiting for one to become idle.
+
+        Args:
+            validator_type (str): Type of the validator to run.
+            upload (UploadContext): The uploaded file.
+
+        Returns:
+            bool: The verdict; False if no worker became idle or validation
+            timed out within `timeout` seconds, or the worker died.
+
+        Raises:
+            ValidationBudgetExceeded: If validation used up its budget.
+        """
+        self._start()
+        try:
+            worker = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            logger.warning(
+                f"No validation worker became idle in {self.timeout} seconds"
+            )
+            return False
+        try:
+            verdict = worker.validate(validator_type, upload, self.timeout)
+        except ValidationBudgetExceeded:
+            # The worker stopped validating by itself and can be reused.
+            self._release(worker)
+            raise
+        except TimeoutError as e:
+            logger.warning(f"Killing validation worker: {e}")
+            self._replace(worker)
+            return False
+        except (EOFError, OSError) as e:
+            logger.warning(f"Validation worker died: {e!r}")
+            self._replace(worker)
+            return False
+        self._release(worker)
+        return verdict
+
+    def shutdown(self) -> None:
+        with self._lock:
+            workers, self._all = self._all, []
+        for worker in workers:
+            worker.kill()
+
+    def _reset(self) -> None:
+        """
+        Forgets the workers, which belong to the process that started them.
+        """
+        self._pid: Optional[int] = None
+        self._start_lock = threading.Lock()
+        self._idle: "queue.LifoQueue[ValidationWorker]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._all: List[ValidationWorker] = []
+
+    def _start(self) -> None:
+        """
+        Starts the workers of the calling process unless it already has them.
+        """
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._start_lock:
+            if self._pid == pid:
+                return
+            for _ in range(self.workers):
+                self._release(self._spawn())
+            self._pid = pid
+
+    def _spawn(self) -> ValidationWorker:
+        worker = ValidationWorker(self.executable)
+        with self._lock:
+            self._all.append(worker)
+        return worker
+
+    def _release(self, worker: ValidationWorker) -> None:
+        self._idle.put(worker)
+
+    def _replace(self, worker: ValidationWorker) -> None:
+        """
+        Kills the worker and starts its replacement in a background thread, so
+        the request that found it hung or dead is answered right away.
+        """
+        with self._lock:
+            if worker in self._all:
+                self._all.remove(worker)
+        threading.Thread(
+            target=self._respawn, args=(worker,), name="validation-respawn", daemon=True
+        ).start()
+
+    def _respawn(self, worker: ValidationWorker) -> None:
+        worker.kill()
+        try:
+            self._release(self._spawn())
+        except Exception as e:
+            logger.error(f"Failed to start validation worker: {e}")
+
+
+# Pools of this process, forgotten by forked children; see `_reset_after_fork`.
+_pools: "weakref.WeakSet[ValidationWorkerPool]" = weakref.WeakSet()
+
+# Run by the workers: serves the pipe end whose descriptor is passed as argument.
+_WORKER_COMMAND = (
+    "import sys; from multiprocessing.connection import Connection; "
+    "from validators.executor import _worker_main; "
+    "_worker_main(Connection(int(sys.argv[1])))"
+)
+
+
+def _worker_env() -> Dict[str, str]:
+    """
+    Returns the environment of a worker, whose imports are resolved from the
+    module search path of this process.
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(path or os.getcwd() for path in sys.path)
+    return env
+
+
+def _reset_after_fork() -> None:
+    """
+    Runs in a forked child: drops the workers and locks inherited from the
+    parent, so the child starts its own workers on first use. The child's
+    copies of the workers' pipes are closed; the workers keep serving the
+    parent.
+    """
+    for pool in list(_pools):
+        for worker in pool._all:
+            worker.conn.close()
+        pool._reset()
+
+
+def _shutdown_pools() -> None:
+    """
+    Kills the workers of this process's pools when it exits; a forked child
+    has none of its parent's.
+    """
+    for pool in list(_pools):
+        pool.shutdown()
+
+
+atexit.register(_shutdown_pools)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class PooledValidator(IFileValidator):
+    """
+    Validator delegating to the validator of `validator_type` in a worker process.
+    """
+
+    def __init__(self, validator_type: str, pool: ValidationWorkerPool) -> None:
+        self.validator_type = validator_type
+        self.pool = pool
+
+    def __repr__(self) -> str:
+        return f"PooledValidator({self.validator_type!r})"
+
+    def is_valid(self, upload: UploadContext) -> bool:
+        return self.pool.validate(self.validator_type, upload)
+
+
+def _worker_main(conn: Connection) -> None:
+    """
+    Worker loop: receives uploads and answers with verdicts until the pipe closes.
+    A validation that used up its budget is answered with the exception. Each
+    answer carries the check counters recorded since the previous one.
+    """
+    # Imported here: the factory itself imports this module.
+    from validators.factory import ValidatorFactory
+
+    # The worker does nothing but validate, one upload at a time, so budgets may
+    # interrupt it and limit its memory growth.
+    enable_cpu_timer()
+    enable_memory_budget()
+    # Validators are created on first use and kept for the life of the worker.
+    validators: Dict[str, IFileValidator] = {}
+
+    while True:
+        try:
+            validator_type, filename, mime_type = conn.recv()
+            content = conn.recv_bytes()
+        except EOFError:
+            return
+        upload = UploadContext.from_buffer(content, filename)
+        upload.mime_type = mime_type
+        verdict: Union[bool, ValidationBudgetExceeded]
+        try:
+            validator = validators.get(validator_type)
+            if validator is None:
+                validator = ValidatorFactory.create_validator(validator_type)
+                validators[validator_type] = validator
+            verdict = bool(validator.is_valid(upload))
+        except ValidationBudgetExceeded as e:
+            verdict = e
+        except Exception as e:
+            logger.warning(f"Validation failed in worker: {e}")
+            verdict = False
+        finally:
+            upload.close()
+        conn.send((verdict, check_metrics.drain()))
@@ -1,58 +1,155 @@
-from typing import Union
+from types import MappingProxyType
+from typing import Mapping, Optional, Union
+from interfaces.validation_interface import IFileValidator
+from utils.upload_context import UploadContext
 from validators.image_validator import ImageValidator
 from validators.doc_validator import DOCValidator
 from validators.docx_validator import DOCXValidator
 from validators.pdf_validator import PDFValidator
+from validators.executor import PooledValidator, ValidationWorkerPool
+from validators.sniffing import (
+    EXTENSION_MIME_TYPES,
+    SNIFF_SIZE,
+    ContentTypeMismatchError,
+    content_mime_type,
+    detect_mime_type,
+    validator_type_for_mime,
+)
 from config.validation_config import FileValidationConfig
 from extensions.logger import logger
 
 
 class ValidatorFactory:
+    """
+    Picks the validator of an upload.
+
+    One validator of each type is created with the factory and shared by all
+    uploads: validators keep no per-upload state, so a factory can serve every
+    request thread of the app.
+
+    Attributes:
+        worker_pool (Optional[ValidationWorkerPool]): Pool running the validators.
+        validators (Mapping[str, IFileValidator]): Read-only table of the
+            validator of each type.
+    """
+
+    # Validator class by validator type, see `FileValidationConfig.get_validator_type`.
     _validators = {
-        "image": {
-            "jpeg": ImageValidator,
-            "jpg": ImageValidator,
-            "png": ImageValidator,
-            "gif": ImageValidator,
-        },
-        "doc": {"doc": DOCValidator},
-        "docx": {"docx": DOCXValidator},
-        "pdf": {"pdf": PDFValidator},
+        "image": ImageValidator,
+        "doc": DOCValidator,
+        "docx": DOCXValidator,
+        "pdf": PDFValidator,
     }
 
-    @classmethod
+    def __init__(self, worker_pool: Optional[ValidationWorkerPool] = None) -> None:
+        """
+        Args:
+            worker_pool (Optional[ValidationWorkerPool]): Pool of worker processes
+                running the validators; validation runs inline if not given.
+        """
+        self.worker_pool = worker_pool
+        self.validators: Mapping[str, IFileValidator] = MappingProxyType(
+            {
+                validator_type: (
+                    self.create_validator(validator_type)
+                    if worker_pool is None
+                    else PooledValidator(validator_type, worker_pool)
+                )
+                for validator_type in self._validators
+            }
+        )
+
     def get_validator(
-        cls, file_extension: str
-    ) -> Union[DOCValidator, DOCXValidator, ImageValidator, PDFValidator]:
+        self, file_extension: str, upload: Optional[UploadContext] = None
+    ) -> IFileValidator:
         """
-        Gets the appropriate validator for the given file extension.
+        Gets the shared validator for an upload, running in the worker pool if the
+        factory has one.
+
+        With an upload, the validator is picked by `route` from the sniffed content
+        type, which must agree with the extension.
 
         Args:
-            file_extension: The file extension for which to get the validator.
+            file_extension: The extension of the uploaded file name.
+            upload: The uploaded file.
 
         Returns:
-            Union[DOCValidator, DOCXValidator, ImageValidator, PDFValidator]: The validator instance for the given extension.
+            IFileValidator: The validator for the upload.
 
         Raises:
-            ValueError: If the file extension is not allowed or if there is no validator available for the file extension.
+            ContentTypeMismatchError: If the content does not match the extension.
+            ValueError: If the file extension is not allowed.
         """
-        file_extension = file_extension.lower()
+        if upload is not None:
+            validator_type = self.route(file_extension, upload)
+        else:
+            validator_type = self.get_validator_type(file_extension)
+        validator = self.validators.get(validator_type)
+        if validator is None:
+            raise ValueError(f"No validator available for type: {validator_type}")
+        return validator
 
-        if not FileValidationConfig.is_extension_allowed(file_extension):
-            raise ValueError(f"File extension not allowed: {file_extension}")
+    @classmethod
+    def route(cls, file_extension: str, upload: UploadContext) -> str:
+        """
+        Picks the validator type from the content of the upload.
 
-        validator_type = FileValidationConfig.get_validator_type(file_extension)
-        logger.info(f"Validator type: {validator_type}")
+        The content must be of the MIME type the extension claims (a GIF named
+        x.png is rejected); extensions without a known MIME type only need
+        content routed to their validator type.
 
-        validator_dict = cls._validators.get(validator_type, {})
-        logger.info(f"Validator dict: {validator_dict}")
+        The leading bytes are sniffed once (unless the spool already did) and the
+        detected MIME type is recorded on the upload, so validators do not detect
+        it again.
 
-        validator_class = cls._validators.get(validator_type, {}).get(file_extension)
-        logger.info(f"Validator class: {validator_class}")
+        Returns:
+            str: The validator type.
 
-        if validator_class is None:
-            raise ValueError(
-                f"No validator available for file extension: {file_extension}"
+        Raises:
+            ContentTypeMismatchError: If the content does not match the extension.
+            ValueError: If the file extension is not allowed.
+        """
+        validator_type = cls.get_validator_type(file_extension)
+        if upload.mime_type is None:
+            upload.mime_type = detect_mime_type(upload.head(SNIFF_SIZE))
+        logger.debug(f"Detected MIME type: {upload.mime_type}")
+        expected = EXTENSION_MIME_TYPES.get(file_extension.lower())
+        if expected is None:
+            matches = validator_type_for_mime(upload.mime_type) == validator_type
+        else:
+            matches = content_mime_type(upload.mime_type) == expected
+        if not matches:
+            raise ContentTypeMismatchError(
+                f"Content type {upload.mime_type} does not match extension: "
+                f"{file_extension}"
             )
+        return validator_type
+
+    @staticmethod
+    def get_validator_type(file_extension: str) -> str:
+        """
+        Looks up the validator type of an extension.
+
+        Raises:
+            ValueError: If the file extension is not allowed.
+        """
+        extension = file_extension.lower()
+        validator_type = FileValidationConfig.EXTENSION_TYPES.get(extension)
+        if validator_type is None:
+            raise ValueError(f"File extension not allowed: {extension}")
+        return validator_type
 
+    @classmethod
+    def create_validator(
+        cls, validator_type: str
+    ) -> Union[DOCValidator, DOCXValidator, ImageValidator, PDFValidator]:
+        """
+        Creates the validator of the given type.
+
+        Raises:
+            ValueError: If there is no validator for the type.
+        """
+        validator_class = cls._validators.get(validator_type)
+        if validator_class is None:
+            raise ValueError(f"No validator available for type: {validator_type}")
         return validator_class()
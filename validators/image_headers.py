@@ -0,0 +1,179 @@
+from typing import Iterator, List, Optional, Tuple
+import struct
+
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+JPEG_SOI = b"\xff\xd8"
+GIF_SIGNATURES = (b"GIF87a", b"GIF89a")
+
+# Start-of-frame markers carrying the image size; C4, C8 and CC share the range
+# but mean something else.
+JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+JPEG_SOS = 0xDA
+JPEG_EOI = 0xD9
+JPEG_COM = 0xFE
+JPEG_APP_MARKERS = frozenset(range(0xE0, 0xF0))
+# Markers that stand alone, without a length field.
+_JPEG_STANDALONE_MARKERS = frozenset([0x01, 0xD8, *range(0xD0, 0xD8)])
+
+GIF_EXTENSION = 0x21
+GIF_IMAGE_DESCRIPTOR = 0x2C
+GIF_TRAILER = 0x3B
+GIF_PLAIN_TEXT_LABEL = 0x01
+GIF_COMMENT_LABEL = 0xFE
+GIF_APPLICATION_LABEL = 0xFF
+
+
+def iter_png_chunks(content: memoryview) -> Iterator[Tuple[bytes, int, int]]:
+    """
+    Walks the chunks of a PNG file without copying their data.
+
+    Yields:
+        Tuple[bytes, int, int]: Chunk type, offset of the chunk data and its
+            length, up to and including IEND.
+
+    Raises:
+        struct.error: If a chunk header is truncated.
+    """
+    offset = len(PNG_SIGNATURE)
+    while offset < len(content):
+        length, chunk_type = struct.unpack_from(">I4s", content, offset)
+        yield chunk_type, offset + 8, length
+        if chunk_type == b"IEND":
+            return
+        # Length, type, data and CRC.
+        offset += length + 12
+
+
+def iter_jpeg_segments(content: memoryview) -> Iterator[Tuple[int, int, int]]:
+    """
+    Walks the marker segments of a JPEG file without copying them, up to the
+    start of the entropy-coded scan data.
+
+    Yields:
+        Tuple[int, int, int]: Marker, offset of the segment payload (after the
+            length field) and its length.
+
+    Raises:
+        struct.error: If a segment header is truncated.
+    """
+    offset = len(JPEG_SOI)
+    end = len(content)
+    while offset < end:
+        if content[offset] != 0xFF:
+            # Not a marker where one is due; let the decoder judge the file.
+            return
+        # Any number of 0xFF fill bytes may precede the marker code.
+        while offset < end and content[offset] == 0xFF:
+            offset += 1
+        if offset >= end:
+            return
+        marker = content[offset]
+        offset += 1
+        if marker in _JPEG_STANDALONE_MARKERS:
+            continue
+        if marker == JPEG_EOI:
+            return
+        (length,) = struct.unpack_from(">H", content, offset)
+        yield marker, offset + 2, length - 2
+        if marker == JPEG_SOS:
+            return
+        offset += length
+
+
+def iter_gif_extensions(
+    content: memoryview,
+) -> Iterator[Tuple[int, List[memoryview]]]:
+    """
+    Walks the blocks of a GIF file, skipping color tables and image data.
+
+    Yields:
+        Tuple[int, List[memoryview]]: The label and data sub-blocks of each
+            extension block; `GIF_IMAGE_DESCRIPTOR` with no sub-blocks for each
+            frame; after the trailer, `GIF_TRAILER` with whatever follows it in
+            the file.
+
+    Raises:
+        ValueError: If the block structure is malformed or truncated.
+    """
+    try:
+        # Header and logical screen descriptor, then the global color table.
+        offset = 13 + _gif_color_table_size(content[10])
+        while True:
+            block = content[offset]
+            offset += 1
+            if block == GIF_EXTENSION:
+                label = content[offset]
+                sub_blocks, offset = _gif_sub_blocks(content, offset + 1, collect=True)
+                yield label, sub_blocks
+            elif block == GIF_IMAGE_DESCRIPTOR:
+                # Position, size and flags, the local color table, then the LZW
+                # minimum code size.
+                offset += 9 + _gif_color_table_size(content[offset + 8]) + 1
+                _, offset = _gif_sub_blocks(content, offset, collect=False)
+                yield GIF_IMAGE_DESCRIPTOR, []
+            elif block == GIF_TRAILER:
+                yield GIF_TRAILER, [content[offset:]]
+                return
+            else:
+                raise ValueError(f"Unexpected GIF block 0x{block:02x}")
+    except IndexError:
+        raise ValueError("Truncated GIF") from None
+
+
+def _gif_color_table_size(flags: int) -> int:
+    return 3 * 2 ** ((flags & 0x07) + 1) if flags & 0x80 else 0
+
+
+def _gif_sub_blocks(
+    content: memoryview, offset: int, collect: bool
+) -> Tuple[List[memoryview], int]:
+    """
+    Reads a chain of data sub-blocks, returning views of them (if `collect`) and
+    the offset after the terminating empty block.
+    """
+    sub_blocks = []
+    while True:
+        size = content[offset]
+        offset += 1
+        if not size:
+            return sub_blocks, offset
+        if offset + size > len(content):
+            raise IndexError(offset + size)
+        if collect:
+            sub_blocks.append(content[offset : offset + size])
+        offset += size
+
+
+def read_dimensions(content: memoryview) -> Optional[Tuple[int, int]]:
+    """
+    Reads the width and height of a PNG, JPEG or GIF image from its header,
+    without decoding anything: PNG IHDR, the first JPEG start-of-frame segment or
+    the GIF logical screen descriptor.
+
+    Args:
+        content (memoryview): The image file.
+
+    Returns:
+        Optional[Tuple[int, int]]: Width and height, or None if the format is not
+            recognised or the header is malformed.
+    """
+    try:
+        if content[: len(PNG_SIGNATURE)] == PNG_SIGNATURE:
+            for chunk_type, data_offset, _ in iter_png_chunks(content):
+                if chunk_type != b"IHDR":
+                    return None
+                return struct.unpack_from(">II", content, data_offset)
+        elif content[: len(JPEG_SOI)] == JPEG_SOI:
+            for marker, payload_offset, _ in iter_jpeg_segments(content):
+                if marker in JPEG_SOF_MARKERS:
+                    # Sample precision, then height and width.
+                    height, width = struct.unpack_from(
+                        ">HH", content, payload_offset + 1
+                    )
+                    return width, height
+        elif content[:6] in GIF_SIGNATURES:
+            return struct.unpack_from("<HH", content, 6)
+    except struct.error:
+        pass
+    return None
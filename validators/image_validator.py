@@ -1,15 +1,58 @@
 from typing import Optional, cast
 from config.validation_config import FileValidationConfig, ImageValidationConfig
 from interfaces.validation_interface import IFileValidator
-from werkzeug.datastructures.file_storage import FileStorage
+from utils.upload_context import UploadContext
+from validators.image_headers import (
+    GIF_APPLICATION_LABEL,
+    GIF_COMMENT_LABEL,
+    GIF_IMAGE_DESCRIPTOR,
+    GIF_PLAIN_TEXT_LABEL,
+    GIF_TRAILER,
+    JPEG_APP_MARKERS,
+    JPEG_COM,
+    iter_gif_extensions,
+    iter_jpeg_segments,
+    iter_png_chunks,
+    read_dimensions,
+)
+from validators.budget import charge_frame
+from validators.keyword_matcher import KeywordMatcher
+from validators.pipeline import Check, CheckCost, CheckPipeline
+from validators.sniffing import magic_handle
 from extensions.logger import logger
-import magic
 from PIL import Image
-import io
-import struct
+
+
+# Pillow format names of the supported MIME types
+IMAGE_FORMATS = {"image/jpeg": "JPEG", "image/png": "PNG", "image/gif": "GIF"}
+
+
+class _ImageSubject:
+    """
+    Per-upload state shared by the image checks.
+    """
+
+    def __init__(self, upload: UploadContext) -> None:
+        self.upload = upload
+        self.mime_type: Optional[str] = None
+
+    @property
+    def image_format(self) -> Optional[str]:
+        return IMAGE_FORMATS.get(self.mime_type)
 
 
 class ImageValidator(IFileValidator):
+    # libmagic identifies image formats from their headers, so it is only given
+    # the start of the file.
+    MAGIC_SNIFF_SIZE = 1024 * 1024
+    # GIF blocks that can carry text: extensions, and data after the trailer
+    GIF_TEXT_BLOCKS = (
+        GIF_COMMENT_LABEL,
+        GIF_APPLICATION_LABEL,
+        GIF_PLAIN_TEXT_LABEL,
+        GIF_TRAILER,
+    )
+
     def __init__(self) -> None:
         """
         Initializes the ImageValidator with configuration from the validation config.
@@ -19,62 +62,81 @@ class ImageValidator(IFileValidator):
         self.config: ImageValidationConfig = cast(
             ImageValidationConfig, FileValidationConfig.get_config("IMAGE")
         )
+        # Header and format structure checks run before Pillow decodes anything.
+        self.pipeline: CheckPipeline[_ImageSubject] = CheckPipeline(
+            "image",
+            [
+                Check(
+                    "not_empty", CheckCost.METADATA, lambda subject: subject.upload.size
+                ),
+                Check("mime_type", CheckCost.METADATA, self._check_subject_mime_type),
+                Check(
+                    "header_dimensions",
+                    CheckCost.METADATA,
+                    lambda subject: self._check_header_dimensions(
+                        subject.upload.content
+                    ),
+                ),
+                Check(
+                    "format_specific",
+                    CheckCost.STRUCTURE,
+                    lambda subject: self._check_format_specific_vulnerabilities(
+                        subject.image_format, subject.upload.content
+                    ),
+                ),
+                Check("decode", CheckCost.CONTENT, self._verify_image_content),
+            ],
+        )
 
-    def is_valid(self, uploaded_file: FileStorage) -> bool:
+    def is_valid(self, upload: UploadContext) -> bool:
         """
         Validate the uploaded image file by checking its content, MIME type, dimensions,
         and format-specific vulnerabilities.
 
         Args:
-            uploaded_file (FileStorage): The uploaded file object from the request.
+            upload (UploadContext): The uploaded file.
 
         Returns:
             bool: True if the file is valid, False otherwise.
+
+        Raises:
+            ValidationBudgetExceeded: If validation used up `config.budget`.
         """
         logger.info("Validating Image file")
 
         try:
-            file_content = self._read_file_content(uploaded_file)
-            if not file_content:
-                return False
-
-            mime_type = self._check_mime_type(file_content)
-            if not mime_type or not mime_type.startswith("image/"):
-                return False
-            logger.info(f"Detected MIME type: {mime_type}")
-
-            return self._verify_image_content(file_content)
+            return self.pipeline.run(_ImageSubject(upload), self.config.budget)
         except Exception as error:
             logger.warning(f"Failed to validate image: {error}")
             return False
 
-    @staticmethod
-    def _read_file_content(uploaded_file: FileStorage) -> Optional[bytes]:
+    def _check_subject_mime_type(self, subject: _ImageSubject) -> bool:
         """
-        Reads the content of the uploaded file into a bytes object.
+        Determines the MIME type of the upload, sniffed on arrival or by libmagic,
+        and checks that it is an image type.
 
         Args:
-            uploaded_file (FileStorage): The uploaded file object from the request.
+            subject (_ImageSubject): The upload being validated.
 
         Returns:
-            Optional[bytes]: The file content as bytes, or None if the file could not be read.
+            bool: True if the file is an image, False otherwise.
         """
-        try:
-            file_content = uploaded_file.read()
-            uploaded_file.seek(0)
-            return file_content
-        except Exception as e:
-            logger.warning(f"Error reading PDF: {e}")
-            return None
+        subject.mime_type = subject.upload.mime_type or self._check_mime_type(
+            subject.upload.head(self.MAGIC_SNIFF_SIZE)
+        )
+        if not subject.mime_type or not subject.mime_type.startswith("image/"):
+            return False
+        logger.info(f"Detected MIME type: {subject.mime_type}")
+        return True
 
     @staticmethod
-    def _check_mime_type(file_content: bytes) -> Optional[str]:
+    def _check_mime_type(file_head: bytes) -> Optional[str]:
         # Check the MIME type using python-magic
         """
         Checks the MIME type of the uploaded file content using python-magic.
 
         Args:
-            file_content (bytes): The uploaded file content as bytes.
+            file_head (bytes): The start of the uploaded file.
 
         Returns:
             str: The detected MIME type, or None if the MIME type could not be determined.
@@ -83,18 +145,18 @@ class ImageValidator(IFileValidator):
             Exception: If an error occurs while checking the MIME type.
         """
         try:
-            mime = magic.Magic(mime=True)
-            return mime.from_buffer(file_content)
+            return magic_handle().from_buffer(file_head)
         except Exception as e:
             logger.warning(f"Error checking file type: {e}")
             return None
 
-    def _verify_image_content(self, file_content: bytes) -> bool:
+    def _verify_image_content(self, subject: _ImageSubject) -> bool:
         """
-        Verifies the image content, checking format, dimensions, and vulnerabilities.
+        Verifies the image content, checking that it decodes as the detected
+        format and its dimensions.
 
         Args:
-            file_content (bytes): The uploaded file content as bytes.
+            subject (_ImageSubject): The upload being validated.
 
         Returns:
             bool: True if the image is valid, False otherwise.
@@ -104,23 +166,53 @@ class ImageValidator(IFileValidator):
         """
         try:
             # Open and verify the image using Pillow:
-            with Image.open(io.BytesIO(file_content)) as img:
+            with Image.open(subject.upload.reader()) as img:
                 img.verify()
                 logger.info(
                     f"Image format: {img.format}, Size: {img.size}, Mode: "
                     f"{img.mode}"
                 )
 
-                if not self._check_image_dimensions(img):
+                if img.format != subject.image_format:
+                    logger.warning(
+                        f"Image format {img.format} does not match MIME type "
+                        f"{subject.mime_type}"
+                    )
                     return False
 
-                if not self._check_format_specific_vulnerabilities(img, file_content):
+                if not self._check_image_dimensions(img):
                     return False
         except Exception as e:
             logger.warning(f"Error verifying image: {e}")
             return False
         return True
 
+    def _check_header_dimensions(self, file_content: memoryview) -> bool:
+        """
+        Checks the dimensions declared in the image header against the maximum
+        dimensions and pixel count, before anything is decoded.
+
+        Files whose header cannot be read are left to Pillow.
+
+        Args:
+            file_content (memoryview): The uploaded file content.
+
+        Returns:
+            bool: True if the declared dimensions are valid or unknown, False otherwise.
+        """
+        dimensions = read_dimensions(file_content)
+        if dimensions is None:
+            return True
+        width, height = dimensions
+        if (
+            width > self.config.max_dimensions[0]
+            or height > self.config.max_dimensions[1]
+            or width * height > self.config.max_pixels
+        ):
+            logger.warning(f"Image dimensions are suspiciously large: {dimensions}")
+            return False
+        return True
+
     def _check_image_dimensions(self, img: Image.Image) -> bool:
         """
         Checks the dimensions of the image against the maximum allowed dimensions.
@@ -141,19 +233,19 @@ class ImageValidator(IFileValidator):
         return True
 
     def _check_format_specific_vulnerabilities(
-        self, img: Image.Image, file_content: bytes
+        self, image_format: Optional[str], file_content: memoryview
     ) -> bool:
         """
         Checks for format-specific vulnerabilities in the image, such as JPEG comment injection, PNG chunk injection, or GIF polyglot attacks.
 
         Args:
-            img (Image.Image): The Pillow image object.
-            file_content (bytes): The uploaded file content as bytes.
+            image_format (Optional[str]): The Pillow format name of the detected MIME type.
+            file_content (memoryview): The uploaded file content.
 
         Returns:
             bool: True if the image is free of format-specific vulnerabilities, False otherwise.
         """
-        match img.format:
+        match image_format:
             case "JPEG":
                 return self._check_jpeg_vulnerabilities(file_content)
             case "PNG":
@@ -161,65 +253,75 @@ class ImageValidator(IFileValidator):
             case "GIF":
                 return self._check_gif_vulnerabilities(file_content)
             case _:
-                logger.warning(f"Unsupported image format: {img.format}")
+                logger.warning(f"Unsupported image format: {image_format}")
                 return False
 
-    @staticmethod
-    def _check_jpeg_vulnerabilities(file_content: bytes) -> bool:
+    def _check_jpeg_vulnerabilities(self, file_content: memoryview) -> bool:
         """
         Checks for JPEG comment injection vulnerabilities in the image.
 
+        Only the COM and APPn segments before the scan data are searched for
+        `metadata_markers`; the entropy-coded image data is never read.
+
         Args:
-            file_content (bytes): The uploaded file content as bytes.
+            file_content (memoryview): The uploaded file content.
 
         Returns:
             bool: True if the image is free of JPEG comment injection vulnerabilities, False otherwise.
         """
-        if b"comment" in file_content.lower():
-            logger.warning("Potential JPEG comment injection detected")
-            return False
+        matcher = KeywordMatcher.for_keywords(self.config.metadata_markers)
+        for marker, offset, length in iter_jpeg_segments(file_content):
+            if marker != JPEG_COM and marker not in JPEG_APP_MARKERS:
+                continue
+            if matcher.search(file_content[offset : offset + length]) is not None:
+                logger.warning("Potential JPEG comment injection detected")
+                return False
         return True
 
-    def _check_png_vulnerabilities(self, file_content: bytes) -> bool:
+    def _check_png_vulnerabilities(self, file_content: memoryview) -> bool:
         """
         Checks for suspicious PNG chunks in the image that could be used for
         malicious purposes.
 
+        Every chunk must be in `allowed_png_chunks`, which lists the critical
+        chunks and the registered ancillary ones, including Exif and the APNG
+        animation chunks; private and unknown chunks are rejected.
+
         Args:
-            file_content (bytes): The uploaded file content as bytes.
+            file_content (memoryview): The uploaded file content.
 
         Returns:
             bool: True if the image is free of suspicious PNG chunks, False otherwise.
         """
-        offset = 8
-        while offset < len(file_content):
-            chunk_length, chunk_type = struct.unpack(
-                ">I4s", file_content[offset : offset + 8]
-            )
-            if chunk_type in [b"IEND", b"IHDR"]:
-                break
+        for chunk_type, _, _ in iter_png_chunks(file_content):
             if chunk_type not in self.config.allowed_png_chunks:
                 logger.warning(f"Suspicious PNG chunk detected: {chunk_type}")
                 return False
-            offset += chunk_length + 12
         return True
 
-    @staticmethod
-    def _check_gif_vulnerabilities(file_content: bytes) -> bool:
+    def _check_gif_vulnerabilities(self, file_content: memoryview) -> bool:
         """
         Checks for GIF polyglot vulnerabilities in the image.
 
         GIF polyglot attacks involve embedding malicious HTML or JavaScript code within a GIF image.
-        This method checks if the image contains any suspicious tags, such as <script> or <svg>.
+        This method searches the comment, application and plain text extensions, and anything
+        appended after the trailer, for `metadata_markers` such as <script> or <svg>.
         If any such tags are found, the method returns False, indicating that the image is potentially malicious.
+        Each frame is charged to the validation budget, which limits the number of frames.
 
         Args:
-            file_content (bytes): The uploaded file content as bytes.
+            file_content (memoryview): The uploaded file content.
 
         Returns:
             bool: True if the image is free of GIF polyglot vulnerabilities, False otherwise.
         """
-        if b"<script" in file_content or b"<svg" in file_content:
-            logger.warning("Potential GIF polyglot detected")
-            return False
+        matcher = KeywordMatcher.for_keywords(self.config.metadata_markers)
+        for label, sub_blocks in iter_gif_extensions(file_content):
+            if label == GIF_IMAGE_DESCRIPTOR:
+                charge_frame()
+            if label not in self.GIF_TEXT_BLOCKS:
+                continue
+            if matcher.search_chunks(sub_blocks) is not None:
+                logger.warning("Potential GIF polyglot detected")
+                return False
         return True
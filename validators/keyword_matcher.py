@@ -0,0 +1,78 @@
+from functools import lru_cache
+from typing import AnyStr, Iterable, Optional, Pattern, Tuple, Union
+import re
+
+
+Keyword = Union[str, bytes]
+Text = Union[str, bytes, memoryview]
+
+
+class KeywordMatcher:
+    """
+    Finds any of a set of keywords in one case-insensitive pass.
+
+    The keywords are compiled into a single alternation, once for `str` and once
+    for bytes-like input, so the scan cost does not grow with the number of
+    keywords and the input is never lowercased or otherwise copied. Create
+    matchers with `for_keywords`, which reuses the compiled matcher for a
+    keyword list seen before.
+
+    Attributes:
+        keywords (Tuple[str, ...]): The keywords, bytes keywords decoded as UTF-8.
+        overlap (int): Characters to carry over between chunks so that a keyword
+            split across a chunk boundary is still found.
+    """
+
+    def __init__(self, keywords: Iterable[Keyword]) -> None:
+        self.keywords: Tuple[str, ...] = tuple(
+            keyword.decode() if isinstance(keyword, bytes) else keyword
+            for keyword in keywords
+        )
+        self.overlap = max((len(keyword) for keyword in self.keywords), default=1) - 1
+        # Longest first, so a keyword is not hidden by a shorter prefix of it.
+        alternatives = [
+            re.escape(keyword)
+            for keyword in sorted(self.keywords, key=len, reverse=True)
+            if keyword
+        ]
+        pattern = "|".join(alternatives) if alternatives else "(?!)"
+        self._text_pattern: Pattern[str] = re.compile(pattern, re.IGNORECASE)
+        self._bytes_pattern: Pattern[bytes] = re.compile(
+            pattern.encode(), re.IGNORECASE
+        )
+
+    @classmethod
+    def for_keywords(cls, keywords: Iterable[Keyword]) -> "KeywordMatcher":
+        return _cached_matcher(tuple(keywords))
+
+    def search(self, data: Text) -> Optional[str]:
+        """
+        Returns the first keyword found in `data` (as it appears there), or None.
+        """
+        if isinstance(data, str):
+            match = self._text_pattern.search(data)
+            return match.group() if match else None
+        match = self._bytes_pattern.search(data)
+        return match.group().decode(errors="replace") if match else None
+
+    def search_chunks(self, chunks: Iterable[AnyStr]) -> Optional[str]:
+        """
+        Like `search`, over input arriving in chunks of the same type. The end of
+        each chunk is carried into the next, so matches across boundaries are
+        found without joining the chunks.
+        """
+        carry = None
+        for chunk in chunks:
+            data = carry + chunk if carry else chunk
+            found = self.search(data)
+            if found is not None:
+                return found
+            carry = data[max(len(data) - self.overlap, 0) :] if self.overlap else None
+            if isinstance(carry, memoryview):
+                carry = carry.tobytes()
+        return None
+
+
+@lru_cache(maxsize=32)
+def _cached_matcher(keywords: Tuple[Keyword, ...]) -> KeywordMatcher:
+    return KeywordMatcher(keywords)
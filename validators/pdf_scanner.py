@@ -0,0 +1,223 @@
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import FrozenSet, Iterable, Optional, Pattern, Set, Tuple, Union
+import re
+import zlib
+
+from validators.budget import charge_decompressed
+
+# Lookahead for the end of a PDF name token: whitespace, a delimiter or EOF.
+_NAME_END = rb"(?=[\s()<>\[\]{}/%]|\Z)"
+
+# Starts of the tokens that decide where stream data begins: comments, literal
+# and hex strings (whose content is not PDF syntax), dictionary openings (so
+# their `<` is not taken for a hex string) and the `stream` keyword after the
+# stream's dictionary.
+_LEXICAL = re.compile(rb"%|\(|<<|<|>>\s*stream(?:\r\n|\n|\r)")
+_LINE_END = re.compile(rb"[\r\n]")
+_HEX_STRING_END = re.compile(rb">")
+_LITERAL_STRING_TOKEN = re.compile(rb"\\.|[()]", re.DOTALL)
+_STREAM_END = re.compile(rb"endstream")
+_STREAM_END_AT = re.compile(rb"\s*endstream")
+_OBJECT_END = re.compile(rb"endstream\s+endobj")
+_DIRECT_LENGTH = re.compile(rb"/Length\s+(\d+)(?!\d)(?!\s+\d+\s+R)")
+_OBJECT_STREAM_TYPE = re.compile(rb"/Type\s*/ObjStm" + _NAME_END)
+_FLATE_FILTER = re.compile(rb"/Filter\s*(?:\[\s*)?/FlateDecode\s*\]?\s*(?:/|>>)")
+_DECODE_PARMS = re.compile(rb"/DecodeParms" + _NAME_END)
+_ESCAPE = re.compile(rb"#([0-9A-Fa-f]{2})")
+
+# How far before `stream` to look for the start of the stream's dictionary.
+_DICTIONARY_WINDOW = 4096
+
+Buffer = Union[bytes, memoryview]
+
+
+@dataclass
+class PDFScanResult:
+    """
+    Outcome of `scan_pdf`.
+
+    Attributes:
+        names (Set[str]): The searched names that occur in the file.
+    """
+
+    names: Set[str] = field(default_factory=set)
+
+
+def scan_pdf(
+    data: Buffer, names: Iterable[str], max_object_stream_size: int
+) -> PDFScanResult:
+    """
+    Finds names such as `/JavaScript` in the object dictionaries of a PDF without
+    parsing the document.
+
+    Every dictionary of a classic PDF lies outside stream data, so the raw file is
+    searched with stream data skipped. Stream data starts at a `stream` keyword
+    outside comments and strings and ends after its direct `/Length`, or else at
+    the next `endstream`. Newer files keep most dictionaries in
+    compressed object streams (`/Type /ObjStm`); those are inflated and searched
+    as well. Page content, images and fonts are never decompressed. Names written
+    with `#xx` escapes, e.g. `/J#61vaScript`, are found too.
+
+    The scan is an early reject, not a complete check: object streams it cannot
+    inflate and the rest of a file after an unterminated stream are not
+    searched, and are left to pypdf's checks.
+
+    Args:
+        data (Buffer): The PDF file.
+        names (Iterable[str]): Names to look for, with the leading slash.
+        max_object_stream_size (int): Largest decompressed size of an object
+            stream that is searched; larger ones are skipped.
+
+    Returns:
+        PDFScanResult: The names found.
+
+    Raises:
+        ValidationBudgetExceeded: If the inflated object streams use up the
+            budget of the running validation.
+    """
+    pattern = _names_pattern(frozenset(names))
+    result = PDFScanResult()
+    position = 0
+    while True:
+        stream_start = _find_stream_start(data, position)
+        if stream_start is None:
+            _collect(pattern, data, position, len(data), result)
+            return result
+        _collect(pattern, data, position, stream_start, result)
+        dictionary = _stream_dictionary(data, position, stream_start)
+        stream_end = _find_stream_end(data, dictionary, stream_start)
+        if stream_end is None:
+            return result
+        data_end, position = stream_end
+        if _OBJECT_STREAM_TYPE.search(dictionary):
+            _scan_object_stream(
+                pattern,
+                dictionary,
+                data[stream_start:data_end],
+                max_object_stream_size,
+                result,
+            )
+
+
+def _find_stream_start(data: Buffer, position: int) -> Optional[int]:
+    """
+    Returns the offset of the stream data following the next `stream` keyword,
+    skipping comments and strings, so a `>>stream` written inside them does not
+    hide the dictionaries after it.
+    """
+    while True:
+        token = _LEXICAL.search(data, position)
+        if token is None:
+            return None
+        lead = token.group()[:1]
+        if lead == b"%":
+            line_end = _LINE_END.search(data, token.end())
+            position = line_end.end() if line_end else len(data)
+        elif lead == b"(":
+            position = _literal_string_end(data, token.end())
+        elif token.group() == b"<":
+            hex_end = _HEX_STRING_END.search(data, token.end())
+            position = hex_end.end() if hex_end else len(data)
+        elif lead == b"<":
+            position = token.end()
+        else:
+            return token.end()
+
+
+def _literal_string_end(data: Buffer, position: int) -> int:
+    """
+    Returns the offset after the literal string whose opening parenthesis ends at
+    `position`: parentheses nest unless escaped with a backslash.
+    """
+    depth = 1
+    for token in _LITERAL_STRING_TOKEN.finditer(data, position):
+        if token.group() == b"(":
+            depth += 1
+        elif token.group() == b")":
+            depth -= 1
+            if depth == 0:
+                return token.end()
+    return len(data)
+
+
+def _find_stream_end(
+    data: Buffer, dictionary: bytes, start: int
+) -> Optional[Tuple[int, int]]:
+    """
+    Finds the end of the stream data starting at `start`.
+
+    A direct `/Length` is used when `endstream` follows the data it covers and
+    no other object ends within it; otherwise the data ends at the next
+    `endstream`.
+
+    Returns:
+        Optional[Tuple[int, int]]: The offsets of the end of the data and of the
+        `endstream` keyword, or None if the stream is not terminated.
+    """
+    length = _DIRECT_LENGTH.search(dictionary)
+    if length is not None:
+        end = start + int(length.group(1))
+        keyword = _STREAM_END_AT.match(data, end)
+        if keyword is not None and not _OBJECT_END.search(data, start, end):
+            return end, keyword.end()
+    keyword = _STREAM_END.search(data, start)
+    if keyword is None:
+        return None
+    return keyword.start(), keyword.end()
+
+
+@lru_cache(maxsize=16)
+def _names_pattern(names: FrozenSet[str]) -> Pattern[bytes]:
+    """
+    Compiles one alternation of all names, each character matched literally or
+    as a `#xx` escape, anchored at the end of the name token.
+    """
+    alternatives = [
+        b"/"
+        + b"".join(
+            rb"(?:%s|#(?i:%02x))" % (re.escape(bytes([byte])), byte)
+            for byte in name.lstrip("/").encode()
+        )
+        for name in sorted(names, key=len, reverse=True)
+    ]
+    return re.compile(b"(?:" + b"|".join(alternatives) + b")" + _NAME_END)
+
+
+def _collect(
+    pattern: Pattern[bytes], data: Buffer, start: int, end: int, result: PDFScanResult
+) -> None:
+    for match in pattern.finditer(data, start, end):
+        name = _ESCAPE.sub(lambda m: bytes([int(m.group(1), 16)]), match.group())
+        result.names.add(name.decode("latin-1"))
+
+
+def _stream_dictionary(data: Buffer, start: int, end: int) -> bytes:
+    """
+    Returns the dictionary preceding a `stream` keyword, from the `obj` keyword
+    that opens the object.
+    """
+    window = bytes(data[max(start, end - _DICTIONARY_WINDOW) : end])
+    return window[max(window.rfind(b"obj"), 0) :]
+
+
+def _scan_object_stream(
+    pattern: Pattern[bytes],
+    dictionary: bytes,
+    stream_data: Buffer,
+    max_size: int,
+    result: PDFScanResult,
+) -> None:
+    if not _FLATE_FILTER.search(dictionary) or _DECODE_PARMS.search(dictionary):
+        # Other filters and predictors are rare here; pypdf decodes them instead.
+        return
+    decompressor = zlib.decompressobj()
+    try:
+        inflated = decompressor.decompress(stream_data, max_size)
+    except zlib.error:
+        # Also the case for encrypted documents.
+        return
+    if decompressor.unconsumed_tail:
+        return
+    charge_decompressed(len(inflated))
+    _collect(pattern, inflated, 0, len(inflated), result)
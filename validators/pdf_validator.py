@@ -1,11 +1,53 @@
-from werkzeug.datastructures.file_storage import FileStorage
 from interfaces.validation_interface import IFileValidator
+from utils.upload_context import UploadContext
 from extensions.logger import logger
-import io
-from pypdf import PdfReader
+from pypdf import PageObject, PdfReader
 import re
 from config.validation_config import FileValidationConfig, PDFValidationConfig
 from typing import Optional, cast
+from validators.budget import checkpoint
+from validators.keyword_matcher import KeywordMatcher
+from validators.pdf_scanner import PDFScanResult, scan_pdf
+from validators.pipeline import Check, CheckCost, CheckPipeline
+
+
+URL_PATTERN = re.compile(r"https?://\S+|www\.\S+", re.IGNORECASE)
+URL_SCHEME_PREFIX = "https://"
+
+
+class _PDFSubject:
+    """
+    Per-upload state shared by the PDF checks: the raw structure scan and the
+    pypdf reader, each created on first use.
+    """
+
+    def __init__(self, upload: UploadContext, config: PDFValidationConfig) -> None:
+        self.upload = upload
+        self.config = config
+        self._scan: Optional[PDFScanResult] = None
+        self._reader: Optional[PdfReader] = None
+
+    @property
+    def scan(self) -> PDFScanResult:
+        if self._scan is None:
+            self._scan = scan_pdf(
+                self.upload.content,
+                self.config.blocked_names,
+                self.config.max_object_stream_size,
+            )
+        return self._scan
+
+    @property
+    def reader(self) -> PdfReader:
+        if self._reader is None:
+            self._reader = PDFValidator._get_pdf_reader(self.upload)
+            if self._reader is None:
+                raise ValueError("PDF could not be read")
+        return self._reader
+
+    def close(self) -> None:
+        if self._reader is not None:
+            self._reader.close()
 
 
 class PDFValidator(IFileValidator):
@@ -16,91 +58,193 @@ class PDFValidator(IFileValidator):
         self.config: PDFValidationConfig = cast(
             PDFValidationConfig, FileValidationConfig.get_config("PDF")
         )
+        # The raw scan runs before pypdf parses anything; pypdf's own JavaScript
+        # and embedded file checks still run on files that pass it.
+        self.pipeline: CheckPipeline[_PDFSubject] = CheckPipeline(
+            "pdf",
+            [
+                Check(
+                    "file_size",
+                    CheckCost.METADATA,
+                    lambda subject: self._check_file_size(subject.upload),
+                ),
+                Check(
+                    "blocked_names",
+                    CheckCost.STRUCTURE,
+                    lambda subject: self._check_blocked_names(subject.scan),
+                ),
+                Check(
+                    "page_count",
+                    CheckCost.STRUCTURE,
+                    lambda subject: self._check_page_count(subject.reader),
+                ),
+                Check(
+                    "embedded_files",
+                    CheckCost.STRUCTURE,
+                    lambda subject: self._check_for_embedded_files(subject.reader),
+                ),
+                Check(
+                    "pages",
+                    CheckCost.CONTENT,
+                    lambda subject: self._scan_pages(subject.reader),
+                ),
+            ],
+        )
 
-    def is_valid(self, uploaded_file: FileStorage) -> bool:
+    def is_valid(self, upload: UploadContext) -> bool:
         """
         Validates if the uploaded file is a valid PDF.
 
+        The checks run through `pipeline`, cheapest first, and validation stops at
+        the first failure; page content is only extracted once the document-level
+        checks have passed.
+
         Args:
-            uploaded_file (FileStorage): The uploaded file object to validate.
+            upload (UploadContext): The uploaded file to validate.
 
         Returns:
             bool: True if valid, False otherwise.
+
+        Raises:
+            ValidationBudgetExceeded: If validation used up `config.budget`.
         """
         logger.info("Validating PDF file")
 
+        subject = _PDFSubject(upload, self.config)
         try:
-            with self._get_pdf_reader(uploaded_file) as reader:
-                return all(
-                    [
-                        self._check_file_size(uploaded_file),
-                        self._check_for_javascript(reader),
-                        self._check_for_embedded_files(reader),
-                        self._check_for_suspicious_keywords(reader),
-                        self._check_for_external_links(reader),
-                    ]
-                )
+            return self.pipeline.run(subject, self.config.budget)
         except Exception as e:
             logger.warning(f"PDF file validation failed: {e}")
             return False
         finally:
-            # Reset stream after processing
-            uploaded_file.stream.seek(0)
+            subject.close()
 
     @staticmethod
-    def _get_pdf_reader(uploaded_file: FileStorage) -> Optional[PdfReader]:
+    def _get_pdf_reader(upload: UploadContext) -> Optional[PdfReader]:
         """
         Creates a PdfReader object from the uploaded file.
 
         Args:
-            uploaded_file (FileStorage): The uploaded file object.
+            upload (UploadContext): The uploaded file.
 
         Returns:
             PdfReader: PdfReader instance for processing.
         """
         try:
-            uploaded_file.stream.seek(0)
-            pdf_content = uploaded_file.stream.read()
-            return PdfReader(io.BytesIO(pdf_content))
+            return PdfReader(upload.reader())
         except Exception as e:
             logger.warning(f"Error reading PDF: {e}")
             return None
 
-    def _check_file_size(self, uploaded_file: FileStorage) -> bool:
+    def _check_file_size(self, upload: UploadContext) -> bool:
         """
         Checks if the uploaded PDF exceeds the maximum allowed file size.
 
         Args:
-            uploaded_file (FileStorage): The uploaded file object.
+            upload (UploadContext): The uploaded file.
 
         Returns:
             bool: True if the file size is valid, False if too large.
         """
-        if uploaded_file.content_length > self.config.max_file_size:
+        if upload.size > self.config.max_file_size:
             logger.warning(
                 f"PDF file exceeds maximum size of {self.config.max_file_size} bytes"
             )
             return False
         return True
 
-    @staticmethod
-    def _check_for_javascript(reader: PdfReader) -> bool:
+    def _check_page_count(self, reader: PdfReader) -> bool:
         """
-        Checks if the PDF contains JavaScript code.
+        Checks the page count declared by the page tree against `max_pages`,
+        without loading any page.
 
         Args:
             reader (PdfReader): The PDF reader object.
 
         Returns:
-            bool: True if no JavaScript is found, False otherwise.
+            bool: True if the document has at most `max_pages` pages, False otherwise.
         """
-        for page in reader.pages:
-            if "/JS" in page or "/JavaScript" in page:
+        try:
+            page_count = int(reader.trailer["/Root"]["/Pages"]["/Count"])
+        except (KeyError, TypeError, ValueError):
+            page_count = len(reader.pages)
+        if page_count > self.config.max_pages:
+            logger.warning(
+                f"PDF has {page_count} pages, more than the maximum of "
+                f"{self.config.max_pages}"
+            )
+            return False
+        return True
+
+    def _check_blocked_names(self, scan: PDFScanResult) -> bool:
+        """
+        Checks the raw structure scan for names blocked by the configuration.
+
+        Args:
+            scan (PDFScanResult): Result of scanning the raw file.
+
+        Returns:
+            bool: True if no blocked names were found, False otherwise.
+        """
+        if scan.names:
+            logger.warning(f"PDF contains blocked names: {sorted(scan.names)}")
+            return False
+        return True
+
+    def _scan_pages(self, reader: PdfReader) -> bool:
+        """
+        Runs the page-level checks in a single pass over the pages.
+
+        Each page's text is extracted once and fed to the text checks together
+        with the end of the previous page's text, so matches spanning a page break
+        are still found. The scan stops at the first failing check, and also after
+        `max_pages` pages in case the declared page count was wrong. The
+        validation budget is checked before each page.
+
+        Args:
+            reader (PdfReader): The PDF reader object.
+
+        Returns:
+            bool: True if every page passes, False otherwise.
+        """
+        keywords = KeywordMatcher.for_keywords(self.config.suspicious_keywords)
+        carry_length = max(len(URL_SCHEME_PREFIX), keywords.overlap)
+        carry = ""
+        for page_number, page in enumerate(reader.pages, start=1):
+            if page_number > self.config.max_pages:
                 logger.warning(
-                    "PDF contains JavaScript, which could be potentially harmful."
+                    f"PDF has more than the maximum of {self.config.max_pages} pages"
                 )
                 return False
-            return True
+            checkpoint()
+            if not self._check_for_javascript(page):
+                return False
+            text = carry + (page.extract_text() or "")
+            if not (
+                self._check_for_suspicious_keywords(keywords, text)
+                and self._check_for_external_links(text)
+            ):
+                return False
+            carry = text[-carry_length:] if carry_length else ""
+        return True
+
+    @staticmethod
+    def _check_for_javascript(page: PageObject) -> bool:
+        """
+        Checks if a page contains JavaScript code.
+
+        Args:
+            page (PageObject): The page to check.
+
+        Returns:
+            bool: True if no JavaScript is found, False otherwise.
+        """
+        if "/JS" in page or "/JavaScript" in page:
+            logger.warning(
+                "PDF contains JavaScript, which could be potentially harmful."
+            )
+            return False
+        return True
 
     @staticmethod
     def _check_for_embedded_files(reader: PdfReader) -> bool:
@@ -120,44 +264,38 @@ class PDFValidator(IFileValidator):
             return False
         return True
 
-    def _check_for_suspicious_keywords(self, reader: PdfReader) -> bool:
+    @staticmethod
+    def _check_for_suspicious_keywords(keywords: KeywordMatcher, pdf_text: str) -> bool:
         """
-        Checks if the PDF contains suspicious keywords based on the configuration.
+        Checks if the text contains suspicious keywords based on the configuration.
 
         Args:
-            reader (PdfReader): The PDF reader object.
+            keywords (KeywordMatcher): Matcher for the configured keywords.
+            pdf_text (str): Text extracted from the PDF.
 
         Returns:
             bool: True if no suspicious keywords are found, False otherwise.
         """
-        pdf_text = "".join(
-            page.extract_text() for page in reader.pages if page.extract_text()
-        )
-        found_keywords = [
-            kw for kw in self.config.suspicious_keywords if kw in pdf_text
-        ]
-        if found_keywords:
-            logger.warning(f"PDF file contain suspicious keywords: {found_keywords}")
+        found = keywords.search(pdf_text)
+        if found is not None:
+            logger.warning(f"PDF file contain suspicious keywords: {[found]}")
             return False
         return True
 
     @staticmethod
-    def _check_for_external_links(reader: PdfReader) -> bool:
-
+    def _check_for_external_links(pdf_text: str) -> bool:
         """
-        Checks if the PDF contains external links.
+        Checks if the text contains external links.
 
         Args:
-            reader (PdfReader): The PDF reader object.
+            pdf_text (str): Text extracted from the PDF.
 
         Returns:
             bool: True if no external links are found, False otherwise.
         """
-        pdf_text = "".join(page.extract_text().lower() for page in reader.pages)
-        url_pattern = re.compile(r"https?://\S+|www\.\S+")
-        if url_pattern.search(pdf_text):
+        if URL_PATTERN.search(pdf_text):
             logger.warning(
-                f"PDF contains external links, which could lead to potentially harmful content."
+                "PDF contains external links, which could lead to potentially harmful content."
             )
             return False
         return True
@@ -0,0 +1,207 @@
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import (
+    Callable,
+    Dict,
+    Generic,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
+import threading
+import time
+
+from config.validation_config import ValidationBudget
+from extensions.logger import logger
+from validators.budget import BudgetTracker, ValidationBudgetExceeded
+
+
+T = TypeVar("T")
+
+
+class CheckCost(IntEnum):
+    """
+    Rough cost class of a check. Pipelines run cheaper classes first.
+    """
+
+    # Sizes and fixed-offset headers
+    METADATA = 1
+    # Walking the container structure: chunks, segments, directories, objects
+    STRUCTURE = 2
+    # Scanning or decoding the content itself
+    CONTENT = 3
+
+
+@dataclass(frozen=True)
+class Check(Generic[T]):
+    """
+    One named validation check.
+
+    Attributes:
+        name (str): Name used in logs and metrics.
+        cost (CheckCost): Cost class deciding when the check runs.
+        run (Callable[[T], bool]): Returns True if the subject passes.
+    """
+
+    name: str
+    cost: CheckCost
+    run: Callable[[T], bool]
+
+
+@dataclass
+class CheckStats:
+    calls: int = 0
+    failures: int = 0
+    errors: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+
+class CheckMetrics:
+    """
+    Per-check call counts, outcomes and wall time, shared by all pipelines of
+    the process. The counters of validation worker processes are merged into
+    those of the server process they answer.
+    """
+
+    def __init__(self) -> None:
+        self._stats: Dict[Tuple[str, str], CheckStats] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self, pipeline: str, check: str, passed: Optional[bool], seconds: float
+    ) -> None:
+        """
+        Records one run of a check; `passed` is None if the check raised.
+        """
+        with self._lock:
+            stats = self._stats.setdefault((pipeline, check), CheckStats())
+            stats.calls += 1
+            if passed is None:
+                stats.errors += 1
+            elif not passed:
+                stats.failures += 1
+            stats.total_seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+
+    def stats(self) -> Dict[str, List[Dict[str, Union[str, int, float]]]]:
+        """
+        Returns the counters of each check by pipeline, most expensive check
+        (by total time spent) first.
+        """
+        with self._lock:
+            items = sorted(
+                self._stats.items(),
+                key=lambda item: item[1].total_seconds,
+                reverse=True,
+            )
+            result: Dict[str, List[Dict[str, Union[str, int, float]]]] = {}
+            for (pipeline, check), stats in items:
+                result.setdefault(pipeline, []).append(
+                    {
+                        "check": check,
+                        "calls": stats.calls,
+                        "failures": stats.failures,
+                        "errors": stats.errors,
+                        "total_ms": round(stats.total_seconds * 1000, 3),
+                        "mean_ms": round(stats.total_seconds * 1000 / stats.calls, 3),
+                        "max_ms": round(stats.max_seconds * 1000, 3),
+                    }
+                )
+            return result
+
+    def drain(self) -> Dict[Tuple[str, str], CheckStats]:
+        """
+        Returns the counters recorded so far by (pipeline, check) and starts
+        over, so a worker process can pass them on with each verdict.
+        """
+        with self._lock:
+            stats, self._stats = self._stats, {}
+        return stats
+
+    def merge(self, stats: Dict[Tuple[str, str], CheckStats]) -> None:
+        """
+        Adds counters drained from another `CheckMetrics`, e.g. a worker's.
+        """
+        with self._lock:
+            for key, other in stats.items():
+                own = self._stats.setdefault(key, CheckStats())
+                own.calls += other.calls
+                own.failures += other.failures
+                own.errors += other.errors
+                own.total_seconds += other.total_seconds
+                own.max_seconds = max(own.max_seconds, other.max_seconds)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+check_metrics = CheckMetrics()
+
+
+class CheckPipeline(Generic[T]):
+    """
+    Runs checks cheapest first and stops at the first failure.
+
+    Checks of the same cost class keep their declared order, so a check may rely
+    on state left on the subject by an earlier check of its class. Exceptions
+    raised by a check are recorded and propagate to the validator.
+
+    With a `ValidationBudget`, the run is tracked by a `BudgetTracker`: CPU time
+    and memory growth are checked after every check, and code deep inside a
+    check can charge the tracker through `validators.budget`.
+
+    Attributes:
+        name (str): Name of the pipeline in the metrics.
+        checks (Tuple[Check[T], ...]): The checks in the order they run.
+        metrics (CheckMetrics): Where timings and outcomes are recorded.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        checks: Iterable[Check[T]],
+        metrics: Optional[CheckMetrics] = None,
+    ) -> None:
+        self.name = name
+        self.checks = tuple(sorted(checks, key=lambda check: check.cost))
+        self.metrics = metrics if metrics is not None else check_metrics
+
+    def run(self, subject: T, budget: Optional[ValidationBudget] = None) -> bool:
+        """
+        Runs the checks on the subject, within `budget` if given.
+
+        Raises:
+            ValidationBudgetExceeded: If the budget was used up.
+        """
+        if budget is None:
+            return self._run_checks(subject, None)
+        with BudgetTracker(budget) as tracker:
+            return self._run_checks(subject, tracker)
+
+    def _run_checks(self, subject: T, tracker: Optional[BudgetTracker]) -> bool:
+        for check in self.checks:
+            passed: Optional[bool] = None
+            started = time.perf_counter()
+            try:
+                passed = bool(check.run(subject))
+                if tracker is not None:
+                    tracker.checkpoint()
+            except ValidationBudgetExceeded as e:
+                passed = None
+                logger.warning(
+                    f"{self.name} validation stopped at check {check.name}: {e}"
+                )
+                raise
+            finally:
+                self.metrics.record(
+                    self.name, check.name, passed, time.perf_counter() - started
+                )
+            if not passed:
+                logger.debug(f"{self.name} validation failed at check {check.name}")
+                return False
+        return True
@@ -0,0 +1,110 @@
+from typing import Dict, Optional, Tuple
+import threading
+
+import magic
+
+
+# Enough for every signature below; PDF readers accept the header anywhere in
+# the first KiB.
+SNIFF_SIZE = 1024
+
+PDF_HEADER = b"%PDF-"
+
+_SIGNATURES: Tuple[Tuple[bytes, str], ...] = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "application/x-ole-storage"),
+    (b"PK\x03\x04", "application/zip"),
+)
+
+DOCX_MIME_TYPE = (
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+)
+
+# Validator type for each detected MIME type. OLE and ZIP containers are routed
+# to the document validators, which inspect what the container holds.
+MIME_VALIDATOR_TYPES: Dict[str, str] = {
+    "image/png": "image",
+    "image/jpeg": "image",
+    "image/gif": "image",
+    "application/pdf": "pdf",
+    "application/x-ole-storage": "doc",
+    "application/CDFV2": "doc",
+    "application/msword": "doc",
+    "application/zip": "docx",
+    DOCX_MIME_TYPE: "docx",
+}
+
+# MIME type each extension claims; uploads whose content is of another type are
+# rejected, even when the same validator would accept it.
+EXTENSION_MIME_TYPES: Dict[str, str] = {
+    "png": "image/png",
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "gif": "image/gif",
+    "pdf": "application/pdf",
+    "doc": "application/msword",
+    "docx": DOCX_MIME_TYPE,
+}
+
+# Document type of each container signature: the container is accepted as the
+# document whose validator inspects what it holds.
+_CONTAINER_MIME_TYPES: Dict[str, str] = {
+    "application/x-ole-storage": "application/msword",
+    "application/CDFV2": "application/msword",
+    "application/zip": DOCX_MIME_TYPE,
+}
+
+_magic_handles = threading.local()
+
+
+class ContentTypeMismatchError(ValueError):
+    """
+    The content of an upload does not match the type its extension claims.
+    """
+
+
+def magic_handle() -> magic.Magic:
+    """
+    Returns the calling thread's libmagic handle, opening it on first use.
+    Loading the magic database is expensive, so handles are never created per file.
+    """
+    handle = getattr(_magic_handles, "handle", None)
+    if handle is None:
+        handle = magic.Magic(mime=True)
+        _magic_handles.handle = handle
+    return handle
+
+
+def detect_mime_type(head: bytes) -> str:
+    """
+    Detects the MIME type from the start of a file: the built-in signature table
+    first, libmagic for anything it does not know.
+
+    Args:
+        head (bytes): The first `SNIFF_SIZE` bytes of the file (or all of a
+            shorter file).
+
+    Returns:
+        str: The detected MIME type.
+    """
+    for signature, mime_type in _SIGNATURES:
+        if head.startswith(signature):
+            return mime_type
+    if PDF_HEADER in head[:SNIFF_SIZE]:
+        return "application/pdf"
+    return magic_handle().from_buffer(head)
+
+
+def validator_type_for_mime(mime_type: Optional[str]) -> Optional[str]:
+    return MIME_VALIDATOR_TYPES.get(mime_type) if mime_type else None
+
+
+def content_mime_type(mime_type: str) -> str:
+    """
+    Returns the MIME type sniffed content is stored and served as: container
+    signatures are taken for the document type they are validated as.
+    """
+    return _CONTAINER_MIME_TYPES.get(mime_type, mime_type)
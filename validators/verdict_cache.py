@@ -0,0 +1,137 @@
+from collections import OrderedDict
+from dataclasses import asdict
+from typing import Optional, Tuple
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+
+from config.validation_config import ValidatorConfigType
+from extensions.logger import logger
+
+
+# Bump when a validator starts rejecting content it used to accept, so verdicts
+# recorded by the previous code are not reused.
+VALIDATOR_VERSION = 9
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS verdicts (
+    sha256 TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    verdict INTEGER NOT NULL,
+    PRIMARY KEY (sha256, fingerprint)
+);
+"""
+
+
+def config_fingerprint(config: ValidatorConfigType) -> str:
+    """
+    Returns a digest of a validation config, its type and `VALIDATOR_VERSION`.
+
+    Any change to a config field yields a different fingerprint, so verdicts
+    reached under the previous config are no longer found.
+    """
+    fields = json.dumps(
+        asdict(config), sort_keys=True, default=_json_default, ensure_ascii=True
+    )
+    payload = f"{VALIDATOR_VERSION}:{type(config).__name__}:{fields}"
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _json_default(value: object) -> object:
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=repr)
+    if isinstance(value, bytes):
+        return value.hex()
+    return repr(value)
+
+
+class VerdictCache:
+    """
+    Validation verdicts keyed by content hash and config fingerprint.
+
+    Lookups hit an in-process LRU of `max_entries` verdicts first. With a
+    `db_path` verdicts are also stored in SQLite, so they survive restarts and
+    are shared between worker processes.
+
+    Attributes:
+        max_entries (int): Number of verdicts kept in memory.
+        db_path (Optional[str]): Location of the SQLite database, if persistent.
+    """
+
+    def __init__(self, max_entries: int, db_path: Optional[str] = None) -> None:
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self._entries: "OrderedDict[Tuple[str, str], bool]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, sha256: str, fingerprint: str) -> Optional[bool]:
+        """
+        Returns the recorded verdict, or None if the content was not validated
+        under this config.
+        """
+        key = (sha256, fingerprint)
+        with self._lock:
+            verdict = self._entries.get(key)
+            if verdict is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return verdict
+        if self.db_path is not None:
+            row = (
+                self._connection()
+                .execute(
+                    "SELECT verdict FROM verdicts WHERE sha256 = ? AND fingerprint = ?",
+                    key,
+                )
+                .fetchone()
+            )
+            if row is not None:
+                verdict = bool(row[0])
+                self._remember(key, verdict)
+                with self._lock:
+                    self.hits += 1
+                return verdict
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, sha256: str, fingerprint: str, verdict: bool) -> None:
+        key = (sha256, fingerprint)
+        self._remember(key, verdict)
+        if self.db_path is not None:
+            connection = self._connection()
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO verdicts (sha256, fingerprint, verdict) "
+                    "VALUES (?, ?, ?)",
+                    (*key, int(verdict)),
+                )
+
+    def _remember(self, key: Tuple[str, str], verdict: bool) -> None:
+        with self._lock:
+            self._entries[key] = verdict
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        Returns the calling thread's connection, opening it on first use.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.db_path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(_SCHEMA)
+            logger.debug(f"Opened verdict cache: {self.db_path}")
+            self._local.connection = connection
+        return connection